@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""
+Benchmark Course.export on synthetic courses.
+
+Generates courses along several dimensions and measures each export phase:
+- Pages: number of wiki pages and the size of each page
+- Quizzes: number of quizzes, each with Q questions of every question type
+- Files: number of files and their total size (half incompressible media)
+- Modules: indentation depth of module items
+
+Every combination of the given values is one scenario. Each scenario runs in
+a fresh process, and each phase (generate, export, export_parallel,
+export_incremental) runs once. For each phase the benchmark records:
+- wall_seconds: wall time of the phase
+- peak_rss_bytes: peak resident set size during the phase. On Linux the
+  high-water mark is reset before each phase (peak_rss_scope 'phase');
+  elsewhere it is the process's peak so far (peak_rss_scope 'process')
+- stages: for exports, seconds spent writing the members of each part of
+  the package (manifest, settings, assignments, quizzes, pages, files),
+  including generating streamed documents; 'other' is the rest, such as
+  serializing in worker processes
+- tracemalloc_peak_bytes: with --tracemalloc, peak Python allocations during
+  the phase; tracing slows the phase down, so wall times are inflated
+
+Results are written as JSON, so runs on different commits can be compared:
+
+  python benchmark_export.py --pages 100 1000 --output before.json
+  git checkout my-branch
+  python benchmark_export.py --pages 100 1000 --output after.json --compare before.json
+"""
+
+import argparse
+import contextlib
+import functools
+import gc
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from imscc import (
+    Course, Quiz, Assignment,
+    MultipleChoiceQuestion, TrueFalseQuestion,
+    FillInBlankQuestion, FillInMultipleBlanksQuestion,
+    MultipleAnswersQuestion, MultipleDropdownsQuestion,
+    MatchingQuestion, NumericalAnswerQuestion,
+    FormulaQuestion, EssayQuestion,
+    FileUploadQuestion, TextOnlyQuestion
+)
+from imscc.archive import ArchiveWriter
+
+
+# Scenario dimensions and their defaults
+DIMENSIONS = {
+    'pages': 100,
+    'page_size': 8192,
+    'quizzes': 10,
+    'questions': 2,
+    'files': 20,
+    'files_size': 20 * 1024 * 1024,
+    'module_depth': 3,
+}
+
+WORDS = (
+    "cell membrane energy force velocity equation theory experiment data "
+    "analysis model structure function system process result method sample"
+).split()
+
+
+def make_questions(n):
+    """Create one question of every question type, labelled with n."""
+    return [
+        MultipleChoiceQuestion(f"<p>Question {n}: pick one</p>", [
+            {'text': 'Alpha', 'correct': True},
+            {'text': 'Beta', 'correct': False},
+            {'text': 'Gamma', 'correct': False},
+        ]),
+        TrueFalseQuestion(f"<p>Question {n}: true or false?</p>", True),
+        FillInBlankQuestion(f"<p>Question {n}: fill the blank</p>", ['answer', 'Answer']),
+        FillInMultipleBlanksQuestion(f"<p>Question {n}: [a] and [b]</p>", {
+            'a': ['one', '1'], 'b': ['two', '2']
+        }),
+        MultipleAnswersQuestion(f"<p>Question {n}: pick all</p>", [
+            {'text': 'Alpha', 'correct': True},
+            {'text': 'Beta', 'correct': True},
+            {'text': 'Gamma', 'correct': False},
+        ]),
+        MultipleDropdownsQuestion(f"<p>Question {n}: [x] [y]</p>", {
+            'x': [{'text': 'up', 'correct': True}, {'text': 'down', 'correct': False}],
+            'y': [{'text': 'left', 'correct': False}, {'text': 'right', 'correct': True}],
+        }),
+        MatchingQuestion(f"<p>Question {n}: match</p>", [
+            {'prompt': 'H2O', 'answer': 'Water'},
+            {'prompt': 'NaCl', 'answer': 'Salt'},
+        ], distractors=['Sugar']),
+        NumericalAnswerQuestion(f"<p>Question {n}: 6 x 7?</p>", exact_answer=42, margin=0.5),
+        FormulaQuestion(f"<p>Question {n}: [x] + [y]?</p>", 'x + y', {'x': (1, 10), 'y': (1, 10)}),
+        EssayQuestion(f"<p>Question {n}: explain</p>"),
+        FileUploadQuestion(f"<p>Question {n}: upload</p>"),
+        TextOnlyQuestion(f"<p>Section {n}</p>"),
+    ]
+
+
+def make_page_content(rng, size, file_paths):
+    """Create HTML of roughly size bytes with some links to course files."""
+    parts = []
+    length = 0
+    while length < size:
+        words = ' '.join(rng.choice(WORDS) for _ in range(40))
+        if file_paths:
+            link = rng.choice(file_paths)
+            words += f' <a href="$IMS-CC-FILEBASE$/{link}">{os.path.basename(link)}</a>'
+        paragraph = f"<p>{words}</p>\n"
+        parts.append(paragraph)
+        length += len(paragraph)
+    return ''.join(parts)
+
+
+def make_files(directory, rng, count, total_size):
+    """
+    Write synthetic files: odd ones incompressible PDFs, even ones text.
+    
+    Returns:
+        List of (path, destination_path) tuples
+    """
+    files = []
+    if count == 0:
+        return files
+    size = total_size // count
+    for i in range(count):
+        if i % 2:
+            path = directory / f"file-{i}.pdf"
+            path.write_bytes(rng.getrandbits(8 * size).to_bytes(size, 'little') if size else b'')
+        else:
+            line = ' '.join(rng.choice(WORDS) for _ in range(12)) + '\n'
+            path = directory / f"file-{i}.txt"
+            path.write_text((line * (size // len(line) + 1))[:size])
+        files.append((str(path), f"web_resources/week-{i % 10}/{path.name}"))
+    return files
+
+
+def generate_course(scenario, files):
+    """Build a synthetic Course for a scenario."""
+    rng = random.Random(0)
+    course = Course(f"Benchmark {scenario['pages']} pages", course_code="BENCH")
+    
+    for filepath, destination in files:
+        course.add_file(filepath, destination)
+    destinations = [destination for _, destination in files]
+    
+    pages = [
+        course.add_page(f"Page {i}", make_page_content(rng, scenario['page_size'], destinations))
+        for i in range(scenario['pages'])
+    ]
+    
+    quizzes = []
+    for i in range(scenario['quizzes']):
+        quiz = Quiz(f"Quiz {i}", description="<p>Synthetic quiz</p>")
+        for n in range(scenario['questions']):
+            for question in make_questions(n):
+                quiz.add_question(question)
+        course.add_quiz(quiz)
+        quizzes.append(quiz)
+    
+    assignments = []
+    for i in range(max(1, scenario['quizzes'] // 2)):
+        assignment = Assignment(f"Assignment {i}", description=make_page_content(rng, 1024, destinations))
+        course.add_assignment(assignment)
+        assignments.append(assignment)
+    
+    # Ten items per module, indented in a repeating staircase up to module_depth
+    items = ([('page', p) for p in pages] + [('quiz', q) for q in quizzes]
+             + [('assignment', a) for a in assignments])
+    depth = max(1, scenario['module_depth'])
+    for start in range(0, len(items), 10):
+        module = course.create_module(f"Module {start // 10 + 1}")
+        for i, (kind, item) in enumerate(items[start:start + 10]):
+            getattr(module, f'add_{kind}')(item, indent=i % depth)
+    
+    return course
+
+
+def reset_peak_rss():
+    """
+    Reset this process's peak resident set size to its current size.
+    
+    Returns:
+        True if the platform supports it (Linux), so later peaks cover only
+        what ran since
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes():
+    """Get the peak resident set size of this process, if the platform reports it."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024  # Reset by reset_peak_rss()
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# ArchiveWriter methods timed by stage_timer()
+_TIMED_METHODS = ('write_text', 'write_xml', 'write_file')
+
+
+def _stage_of(arcname, quiz_ids, assignment_ids):
+    """Get the part of the package a member belongs to."""
+    top = arcname.split('/', 1)[0]
+    if arcname == 'imsmanifest.xml':
+        return 'manifest'
+    if top == 'course_settings' or arcname == 'non_cc_assessments/.keep':
+        return 'settings'
+    if top == 'wiki_content':
+        return 'pages'
+    if top == 'web_resources':
+        return 'files'
+    if top == 'non_cc_assessments' or top in quiz_ids:
+        return 'quizzes'
+    if top in assignment_ids:
+        return 'assignments'
+    return 'other'
+
+
+@contextlib.contextmanager
+def stage_timer(course, stages):
+    """
+    Time the member writes of exports of a course, adding seconds per stage to stages.
+    
+    Wraps ArchiveWriter's write methods while the block runs. Streamed
+    documents are generated inside write_xml(), so their generation counts
+    towards their stage.
+    """
+    quiz_ids = {quiz.identifier for quiz in course.quizzes}
+    assignment_ids = {assignment.identifier for assignment in course.assignments}
+    originals = {name: getattr(ArchiveWriter, name) for name in _TIMED_METHODS}
+    
+    def timed(method):
+        @functools.wraps(method)
+        def wrapper(self, arcname, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(self, arcname, *args, **kwargs)
+            finally:
+                stage = _stage_of(arcname, quiz_ids, assignment_ids)
+                stages[stage] = stages.get(stage, 0.0) + time.perf_counter() - start
+        return wrapper
+    
+    for name, method in originals.items():
+        setattr(ArchiveWriter, name, timed(method))
+    try:
+        yield stages
+    finally:
+        for name, method in originals.items():
+            setattr(ArchiveWriter, name, method)
+
+
+def measure(phase, trace=False, course=None):
+    """
+    Run a phase once, measuring its wall time and peak RSS.
+    
+    Args:
+        phase: Function to run
+        trace: Also measure peak Python allocations with tracemalloc
+        course: Course the phase exports, to time the stages of the export
+    
+    Returns:
+        Tuple of (result of the phase, measurements dict)
+    """
+    gc.collect()
+    scope = 'phase' if reset_peak_rss() else 'process'
+    stages = {}
+    if trace:
+        tracemalloc.start()
+    try:
+        with stage_timer(course, stages) if course is not None else contextlib.nullcontext():
+            start = time.perf_counter()
+            result = phase()
+            wall = time.perf_counter() - start
+        traced_peak = tracemalloc.get_traced_memory()[1] if trace else None
+    finally:
+        if trace:
+            tracemalloc.stop()
+    
+    measurements = {
+        'wall_seconds': round(wall, 4),
+        'peak_rss_bytes': peak_rss_bytes(),
+        'peak_rss_scope': scope,
+    }
+    if course is not None:
+        stages['other'] = stages.get('other', 0.0) + wall - sum(stages.values())
+        measurements['stages'] = {name: round(seconds, 4) for name, seconds in sorted(stages.items())}
+    if trace:
+        measurements['tracemalloc_peak_bytes'] = traced_peak
+    return result, measurements
+
+
+def run_scenario(scenario, workers, trace=False):
+    """Generate and export one scenario; runs in its own process."""
+    with tempfile.TemporaryDirectory(prefix='imscc-bench-') as temp_dir:
+        temp_path = Path(temp_dir)
+        files_dir = temp_path / 'files'
+        files_dir.mkdir()
+        files = make_files(files_dir, random.Random(1), scenario['files'], scenario['files_size'])
+        output = str(temp_path / 'course.imscc')
+        
+        phases = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            course, phases['generate'] = measure(lambda: generate_course(scenario, files), trace)
+            _, phases['export'] = measure(lambda: course.export(output), trace, course)
+            archive_bytes = os.path.getsize(output)
+            
+            if workers and workers > 1:
+                parallel_output = str(temp_path / 'parallel.imscc')
+                _, phases['export_parallel'] = measure(
+                    lambda: course.export(parallel_output, workers=workers), trace, course
+                )
+            
+            incremental_output = str(temp_path / 'incremental.imscc')
+            _, phases['export_incremental'] = measure(
+                lambda: course.export(incremental_output, base=output), trace, course
+            )
+    
+    return {'scenario': scenario, 'archive_bytes': archive_bytes, 'phases': phases}
+
+
+def current_commit():
+    """Get the short hash of the checked-out commit, if this is a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print the wall time of each phase relative to a previous run."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {json.dumps(r['scenario'], sort_keys=True): r for r in baseline['results']}
+    
+    print(f"\n📊 Compared with {baseline_path} ({baseline.get('commit') or 'unknown commit'}):")
+    for result in results:
+        old = previous.get(json.dumps(result['scenario'], sort_keys=True))
+        if old is None:
+            continue
+        label = ', '.join(f"{k}={v}" for k, v in result['scenario'].items())
+        print(f"   {label}")
+        for phase, stats in result['phases'].items():
+            old_stats = old['phases'].get(phase)
+            if not old_stats or not old_stats['wall_seconds']:
+                continue
+            ratio = stats['wall_seconds'] / old_stats['wall_seconds']
+            print(f"     {phase:<20} {old_stats['wall_seconds']:>9.3f}s → "
+                  f"{stats['wall_seconds']:>9.3f}s  ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark Course.export on synthetic courses',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python benchmark_export.py
+  python benchmark_export.py --pages 100 1000 3000 --files 0 200
+  python benchmark_export.py --workers 4 --output results.json --compare old.json
+  python benchmark_export.py --tracemalloc
+
+Every combination of the dimension values is run as a separate scenario.
+        """
+    )
+    
+    for name, default in DIMENSIONS.items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=int,
+            nargs='+',
+            default=[default],
+            help=f'Values to benchmark (default: {default})'
+        )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Also measure a parallel export with this many workers'
+    )
+    
+    parser.add_argument(
+        '--tracemalloc',
+        action='store_true',
+        help='Also record peak Python allocations of each phase; slows phases down'
+    )
+    
+    parser.add_argument(
+        '-o', '--output',
+        help='Write results to this JSON file (default: print them)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--compare',
+        help='Previous results JSON to compare wall times against',
+        default=None
+    )
+    
+    args = parser.parse_args()
+    
+    values = [getattr(args, name) for name in DIMENSIONS]
+    scenarios = [dict(zip(DIMENSIONS, combination)) for combination in itertools.product(*values)]
+    
+    results = []
+    # A fresh process per scenario keeps peak RSS from carrying over
+    context = multiprocessing.get_context('spawn')
+    for i, scenario in enumerate(scenarios, 1):
+        label = ', '.join(f"{k}={v}" for k, v in scenario.items())
+        print(f"⏱️  [{i}/{len(scenarios)}] {label}")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_scenario, scenario, args.workers, args.tracemalloc).result()
+        for phase, stats in result['phases'].items():
+            line = f"     {phase:<20} {stats['wall_seconds']:>9.3f}s"
+            if stats['peak_rss_bytes'] is not None:
+                line += f"  peak RSS {stats['peak_rss_bytes'] / 1e6:,.1f} MB"
+            if 'tracemalloc_peak_bytes' in stats:
+                line += f"  tracemalloc peak {stats['tracemalloc_peak_bytes'] / 1e6:,.1f} MB"
+            print(line)
+            for stage, seconds in stats.get('stages', {}).items():
+                print(f"       {stage:<18} {seconds:>9.3f}s")
+        results.append(result)
+    
+    report = {
+        'benchmark': 'export',
+        'commit': current_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+    
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,9 +13,18 @@ This script:
 """
 
 import os
+import io
+import hashlib
+import sys
 import json
 import re
 import argparse
+import contextlib
+import functools
+import itertools
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from html.parser import HTMLParser
 from imscc import (
@@ -25,8 +34,11 @@ from imscc import (
     MultipleAnswersQuestion, MultipleDropdownsQuestion,
     MatchingQuestion, NumericalAnswerQuestion,
     FormulaQuestion, EssayQuestion,
-    FileUploadQuestion, TextOnlyQuestion
+    FileUploadQuestion, TextOnlyQuestion, QuestionSource,
+    LinkRewriter, LinkRule, reproducible_build, stable_identifiers,
+    BuildCache, MemoryCache, code_version
 )
+from imscc.utils import record_identifiers, reproducible_state, restore_reproducible_state
 
 
 def parse_canvas_meta(html_content):
@@ -83,6 +95,45 @@ def title_to_slug(title):
     return slug
 
 
+def _page_link_to_canvas(match, context):
+    """Rewrite a local page.html link to a Canvas page reference."""
+    page_ref = match.group(1)
+    
+    # Skip external links
+    if 'http://' in page_ref or 'https://' in page_ref:
+        return None
+    
+    # Remove .html extension
+    filename_base = page_ref.replace('.html', '')
+    
+    # Look up the title slug for this filename
+    # Fallback: use filename as slug (for backwards compatibility)
+    page_slug = context['filename_to_slug_map'].get(filename_base, filename_base)
+    
+    return f'href="$CANVAS_OBJECT_REFERENCE$/pages/{page_slug}"'
+
+
+# page.html links, unless already converted
+PAGE_LINK_PATTERN = r'href="([^"$]+\.html)"'
+
+# Local → Canvas link rules, applied in a single pass per page
+LOCAL_TO_CANVAS_LINKS = LinkRewriter([
+    # ../web_resources/file.ext or web_resources/file.ext → $IMS-CC-FILEBASE$/web_resources/file.ext
+    LinkRule('file', r'(href|src)="(?:\.\./)?web_resources/([^"]+)"', r'\1="$IMS-CC-FILEBASE$/web_resources/\2"'),
+    # page.html → $CANVAS_OBJECT_REFERENCE$/pages/page-title-slug
+    LinkRule('page', PAGE_LINK_PATTERN, _page_link_to_canvas),
+])
+
+
+def linked_page_names(html_content):
+    """Get the filenames (without .html) of the local pages a page links to."""
+    return {
+        page_ref.replace('.html', '')
+        for page_ref in re.findall(PAGE_LINK_PATTERN, html_content)
+        if 'http://' not in page_ref and 'https://' not in page_ref
+    }
+
+
 def convert_links(html_content, page_filename, filename_to_slug_map=None):
     """
     Convert local links to Canvas format.
@@ -97,65 +148,9 @@ def convert_links(html_content, page_filename, filename_to_slug_map=None):
         page_filename: Current page filename (for context)
         filename_to_slug_map: Dict mapping filename (without .html) to title slug
     """
-    if filename_to_slug_map is None:
-        filename_to_slug_map = {}
-    
-    # Convert file links: ../web_resources/file.ext → $IMS-CC-FILEBASE$/web_resources/file.ext
-    html_content = re.sub(
-        r'href="\.\.\/web_resources\/([^"]+)"',
-        r'href="$IMS-CC-FILEBASE$/web_resources/\1"',
-        html_content
-    )
-    
-    # Convert file links: web_resources/file.ext → $IMS-CC-FILEBASE$/web_resources/file.ext
-    html_content = re.sub(
-        r'href="web_resources\/([^"]+)"',
-        r'href="$IMS-CC-FILEBASE$/web_resources/\1"',
-        html_content
+    return LOCAL_TO_CANVAS_LINKS.rewrite(
+        html_content, {'filename_to_slug_map': filename_to_slug_map or {}}
     )
-    
-    # Convert src attributes for images/resources too
-    html_content = re.sub(
-        r'src="\.\.\/web_resources\/([^"]+)"',
-        r'src="$IMS-CC-FILEBASE$/web_resources/\1"',
-        html_content
-    )
-    
-    html_content = re.sub(
-        r'src="web_resources\/([^"]+)"',
-        r'src="$IMS-CC-FILEBASE$/web_resources/\1"',
-        html_content
-    )
-    
-    # Convert page links: page.html → $CANVAS_OBJECT_REFERENCE$/pages/page-title-slug
-    # Match .html links that aren't already converted
-    def replace_page_link(match):
-        full_href = match.group(0)
-        page_ref = match.group(1)
-        
-        # Skip if it's already a Canvas reference or external link
-        if '$' in full_href or 'http://' in full_href or 'https://' in full_href:
-            return full_href
-        
-        # Remove .html extension
-        filename_base = page_ref.replace('.html', '')
-        
-        # Look up the title slug for this filename
-        if filename_base in filename_to_slug_map:
-            page_slug = filename_to_slug_map[filename_base]
-        else:
-            # Fallback: use filename as slug (for backwards compatibility)
-            page_slug = filename_base
-        
-        return f'href="$CANVAS_OBJECT_REFERENCE$/pages/{page_slug}"'
-    
-    html_content = re.sub(
-        r'href="([^"]+\.html)"',
-        replace_page_link,
-        html_content
-    )
-    
-    return html_content
 
 
 def parse_css(css_content):
@@ -191,12 +186,234 @@ def parse_css(css_content):
     return rules
 
 
+def _calculate_specificity(selector):
+    """
+    Calculate CSS specificity as a tuple (ids, classes, elements).
+    Returns a tuple that can be compared: higher values = higher specificity.
+    """
+    # Handle comma-separated selectors - use the highest specificity
+    if ',' in selector:
+        return max(_calculate_specificity(s.strip()) for s in selector.split(','))
+    
+    ids = 0
+    classes = 0
+    elements = 0
+    
+    # Remove child combinators and split by spaces
+    selector_cleaned = selector.replace('>', ' ')
+    parts = [p.strip() for p in selector_cleaned.split() if p.strip()]
+    
+    for part in parts:
+        # Count IDs
+        ids += part.count('#')
+        # Count classes (including pseudo-classes)
+        classes += part.count('.')
+        classes += part.count('[')  # Attribute selectors
+        # Count elements - check if there's a tag name at the START
+        # Tag names come before any . # [ : characters
+        # Extract tag name (everything before first special char)
+        tag_match = re.match(r'^([a-zA-Z][a-zA-Z0-9]*)', part)
+        if tag_match:
+            elements += 1
+    
+    return (ids, classes, elements)
+
+
+class SimpleSelector:
+    """A compound selector such as 'div', '.a.b', '#main' or 'p#intro'."""
+    
+    def __init__(self, selector):
+        self.tag = None
+        self.element_id = None
+        self.classes = []
+        
+        # Handle multiple classes (e.g., .class1.class2 or tag.class1.class2)
+        if '.' in selector:
+            # Split by dots to get tag (if any) and classes
+            parts = selector.split('.')
+            self.tag = parts[0] or None
+            self.classes = [p for p in parts[1:] if p]
+        elif selector.startswith('#'):
+            self.element_id = selector[1:]
+        elif '#' in selector:
+            self.tag, self.element_id = selector.split('#', 1)
+        else:
+            self.tag = selector
+    
+    def index_key(self):
+        """Get the (kind, value) key an element must have to match, or None for any element."""
+        if self.element_id is not None:
+            return ('id', self.element_id)
+        if self.classes:
+            return ('class', self.classes[0])
+        if self.tag is not None:
+            return ('tag', self.tag)
+        return None
+    
+    def matches(self, tag, element_id, element_classes):
+        """Match this selector against an element."""
+        if self.tag is not None and self.tag != tag:
+            return False
+        if self.element_id is not None and self.element_id != element_id:
+            return False
+        for class_name in self.classes:
+            if class_name not in element_classes:
+                return False
+        return True
+
+
+class CompiledSelector:
+    """A selector without commas, parsed once into its parts and combinators."""
+    
+    def __init__(self, selector):
+        selector = selector.strip()
+        self.parts = []
+        self.combinators = []
+        
+        if ' ' not in selector:
+            # Single selector ('>' without spaces is not treated as a combinator)
+            self.parts.append(SimpleSelector(selector))
+            return
+        
+        # Parse descendant selector parts, keeping track of combinators
+        parts = []
+        current_part = []
+        for char in selector:
+            if char == '>':
+                # Child combinator
+                if current_part:
+                    parts.append(''.join(current_part).strip())
+                    current_part = []
+                self.combinators.append('>')
+            elif char == ' ':
+                # Descendant combinator (space)
+                if current_part:
+                    part = ''.join(current_part).strip()
+                    if part:
+                        parts.append(part)
+                        current_part = []
+                        # Only add combinator if we actually have a part before the space
+                        # and if the last combinator wasn't already added
+                        if len(parts) > len(self.combinators) + 1:
+                            self.combinators.append(' ')
+            else:
+                current_part.append(char)
+        
+        # Add final part
+        if current_part:
+            part = ''.join(current_part).strip()
+            if part:
+                parts.append(part)
+        
+        self.parts = [SimpleSelector(part) for part in parts]
+    
+    def index_key(self):
+        """Get the index key of the rightmost part, which must match the element itself."""
+        return self.parts[-1].index_key() if self.parts else None
+    
+    def matches(self, element_stack):
+        """Check if this selector matches the last element of the stack."""
+        if not self.parts or len(self.parts) > len(element_stack):
+            return False
+        
+        # Check if the last part matches the current element
+        if not self.parts[-1].matches(*element_stack[-1]):
+            return False
+        
+        # Work backwards through the selector parts and element stack
+        stack_idx = len(element_stack) - 2
+        
+        for i in range(len(self.parts) - 2, -1, -1):
+            selector_part = self.parts[i]
+            combinator = self.combinators[i] if i < len(self.combinators) else ' '
+            
+            if combinator == '>':
+                # Child combinator: must match immediate parent only
+                if stack_idx < 0 or not selector_part.matches(*element_stack[stack_idx]):
+                    return False
+                stack_idx -= 1
+            else:
+                # Descendant combinator: search up the stack
+                while stack_idx >= 0:
+                    matched = selector_part.matches(*element_stack[stack_idx])
+                    stack_idx -= 1
+                    if matched:
+                        break
+                else:
+                    return False
+        
+        return True
+
+
+class CompiledStylesheet:
+    """
+    CSS rules with selectors compiled once and indexed for matching.
+    
+    Each selector is indexed by the id, first class or tag of its rightmost
+    part, so an element is only checked against rules that could match it.
+    """
+    
+    def __init__(self, css_rules):
+        """
+        Args:
+            css_rules: List of (selector, declarations_dict) from parse_css()
+        """
+        self.rules = list(css_rules)
+        self.specificities = [_calculate_specificity(selector) for selector, _ in self.rules]
+        self.index = {}
+        self.unindexed = []  # (rule index, selector) pairs that can match any element
+        
+        for rule_index, (selector, _) in enumerate(self.rules):
+            for alternative in selector.strip().split(','):
+                compiled = CompiledSelector(alternative)
+                key = compiled.index_key()
+                entry = (rule_index, compiled)
+                if key is None:
+                    self.unindexed.append(entry)
+                else:
+                    self.index.setdefault(key, []).append(entry)
+    
+    def styles_for(self, element_stack):
+        """
+        Get the declarations that apply to the last element of the stack.
+        
+        Matching rules are applied in specificity order, and in stylesheet
+        order between rules of equal specificity.
+        """
+        tag, element_id, element_classes = element_stack[-1]
+        
+        candidates = list(self.unindexed)
+        candidates.extend(self.index.get(('tag', tag), ()))
+        candidates.extend(self.index.get(('id', element_id), ()))
+        for class_name in element_classes:
+            candidates.extend(self.index.get(('class', class_name), ()))
+        
+        # A rule matches if any of its comma-separated selectors does
+        matched = set()
+        for rule_index, compiled in candidates:
+            if rule_index not in matched and compiled.matches(element_stack):
+                matched.add(rule_index)
+        
+        # Apply rules in specificity order (lower specificity first, so higher overwrites)
+        applicable_styles = {}
+        for rule_index in sorted(matched, key=lambda i: (self.specificities[i], i)):
+            applicable_styles.update(self.rules[rule_index][1])
+        return applicable_styles
+
+
 class CSSInliner(HTMLParser):
     """HTML parser that applies CSS rules inline and removes link tags."""
     
     def __init__(self, css_rules):
+        """
+        Args:
+            css_rules: List of (selector, declarations_dict) or a CompiledStylesheet
+        """
         super().__init__()
-        self.css_rules = css_rules
+        if not isinstance(css_rules, CompiledStylesheet):
+            css_rules = CompiledStylesheet(css_rules)
+        self.stylesheet = css_rules
+        self.css_rules = css_rules.rules
         self.output = []
         self.element_stack = []  # Track element hierarchy
     
@@ -213,20 +430,8 @@ class CSSInliner(HTMLParser):
         element_id = attrs_dict.get('id', '')
         self.element_stack.append((tag, element_id, element_classes))
         
-        # Find matching CSS rules and sort by specificity
-        matching_rules = []
-        for selector, styles in self.css_rules:
-            if self._selector_matches(selector):
-                specificity = self._calculate_specificity(selector)
-                matching_rules.append((specificity, selector, styles))
-        
-        # Sort by specificity (lower specificity first, so higher overwrites)
-        matching_rules.sort(key=lambda x: x[0])
-        
-        # Apply rules in specificity order
-        applicable_styles = {}
-        for specificity, selector, styles in matching_rules:
-            applicable_styles.update(styles)
+        # Find matching CSS rules, merged in specificity order
+        applicable_styles = self.stylesheet.styles_for(self.element_stack)
         
         # Merge with existing inline styles (inline styles take precedence)
         if applicable_styles:
@@ -289,38 +494,6 @@ class CSSInliner(HTMLParser):
     def handle_decl(self, decl):
         self.output.append(f'<!{decl}>')
     
-    def _calculate_specificity(self, selector):
-        """
-        Calculate CSS specificity as a tuple (ids, classes, elements).
-        Returns a tuple that can be compared: higher values = higher specificity.
-        """
-        # Handle comma-separated selectors - use the highest specificity
-        if ',' in selector:
-            return max(self._calculate_specificity(s.strip()) for s in selector.split(','))
-        
-        ids = 0
-        classes = 0
-        elements = 0
-        
-        # Remove child combinators and split by spaces
-        selector_cleaned = selector.replace('>', ' ')
-        parts = [p.strip() for p in selector_cleaned.split() if p.strip()]
-        
-        for part in parts:
-            # Count IDs
-            ids += part.count('#')
-            # Count classes (including pseudo-classes)
-            classes += part.count('.')
-            classes += part.count('[')  # Attribute selectors
-            # Count elements - check if there's a tag name at the START
-            # Tag names come before any . # [ : characters
-            # Extract tag name (everything before first special char)
-            tag_match = re.match(r'^([a-zA-Z][a-zA-Z0-9]*)', part)
-            if tag_match:
-                elements += 1
-        
-        return (ids, classes, elements)
-    
     def _merge_styles(self, existing_style, new_styles):
         """Merge CSS styles, preferring existing inline styles."""
         existing_dict = {}
@@ -337,138 +510,129 @@ class CSSInliner(HTMLParser):
         
         return '; '.join(f'{prop}: {value}' for prop, value in merged.items())
     
-    def _selector_matches(self, selector):
-        """Check if selector matches current element."""
-        selector = selector.strip()
-        
-        # Handle comma-separated selectors
-        if ',' in selector:
-            return any(self._selector_matches(s.strip()) for s in selector.split(','))
-        
-        # Handle descendant selectors (space-separated)
-        if ' ' in selector:
-            return self._matches_descendant_selector(selector)
-        
-        # Single selector
-        if not self.element_stack:
-            return False
-        
-        current_tag, current_id, current_classes = self.element_stack[-1]
-        return self._matches_simple_selector(selector, current_tag, current_id, current_classes)
+    def get_output(self):
+        return ''.join(self.output)
+
+
+def _file_key(path):
+    """Get (resolved path, mtime_ns, size) for a file, or None if it does not exist."""
+    try:
+        resolved = Path(path).resolve()
+        stat = resolved.stat()
+    except OSError:
+        return None
+    return (str(resolved), stat.st_mtime_ns, stat.st_size)
+
+
+class StylesheetCache:
+    """
+    Parsed and compiled stylesheets shared by every page built in this process.
     
-    def _matches_descendant_selector(self, selector):
-        """Match descendant selector like '.parent .child' or '.parent > .child'."""
-        # Parse selector parts, keeping track of combinators
-        parts = []
-        combinators = []
-        current_part = []
-        
-        i = 0
-        while i < len(selector):
-            char = selector[i]
-            if char == '>':
-                # Child combinator
-                if current_part:
-                    parts.append(''.join(current_part).strip())
-                    current_part = []
-                combinators.append('>')
-                i += 1
-            elif char == ' ':
-                # Descendant combinator (space)
-                if current_part:
-                    part = ''.join(current_part).strip()
-                    if part:
-                        parts.append(part)
-                        current_part = []
-                        # Only add combinator if we actually have a part before the space
-                        # and if the last combinator wasn't already added
-                        if len(parts) > len(combinators) + 1:
-                            combinators.append(' ')
-                i += 1
-            else:
-                current_part.append(char)
-                i += 1
-        
-        # Add final part
-        if current_part:
-            part = ''.join(current_part).strip()
-            if part:
-                parts.append(part)
+    Files are keyed by resolved path, mtime and size, so a stylesheet that
+    changes on disk is parsed again on its next use. invalidate() drops
+    entries explicitly, e.g. for long-running watch or server processes.
+    
+    When store is set to a BuildCache, parsed rules are also kept there,
+    keyed by the file's content, so processes sharing the cache directory
+    (batch and -j workers) parse each stylesheet once between them.
+    """
+    
+    def __init__(self):
+        self._rules = {}  # Resolved path -> ((mtime_ns, size), parsed rules)
+        self._compiled = {}  # Tuple of file keys -> CompiledStylesheet
+        self.store = None  # BuildCache shared with other processes, if any
+        self.hits = 0
+        self.misses = 0
+    
+    def load(self, css_paths):
+        """
+        Get the compiled rules of one or more stylesheets, in order.
         
-        if len(parts) > len(self.element_stack):
-            return False
+        Args:
+            css_paths: Stylesheet paths; paths that do not exist are skipped
         
-        # Check if the last part matches the current element
-        current_tag, current_id, current_classes = self.element_stack[-1]
-        if not self._matches_simple_selector(parts[-1], current_tag, current_id, current_classes):
-            return False
+        Returns:
+            CompiledStylesheet with the rules of all the files
+        """
+        keys = tuple(key for key in map(_file_key, css_paths) if key is not None)
         
-        # Work backwards through the selector parts and element stack
-        stack_idx = len(self.element_stack) - 2
+        compiled = self._compiled.get(keys)
+        if compiled is not None:
+            self.hits += 1
+            return compiled
         
-        for i in range(len(parts) - 2, -1, -1):
-            selector_part = parts[i]
-            combinator = combinators[i] if i < len(combinators) else ' '
-            
-            if combinator == '>':
-                # Child combinator: must match immediate parent only
-                if stack_idx < 0:
-                    return False
-                tag, elem_id, classes = self.element_stack[stack_idx]
-                if not self._matches_simple_selector(selector_part, tag, elem_id, classes):
-                    return False
-                stack_idx -= 1
-            else:
-                # Descendant combinator: search up the stack
-                matched = False
-                while stack_idx >= 0:
-                    tag, elem_id, classes = self.element_stack[stack_idx]
-                    if self._matches_simple_selector(selector_part, tag, elem_id, classes):
-                        matched = True
-                        stack_idx -= 1
-                        break
-                    stack_idx -= 1
-                
-                if not matched:
-                    return False
+        self.misses += 1
+        all_css_rules = []
+        for path, mtime_ns, size in keys:
+            cached = self._rules.get(path)
+            if cached is None or cached[0] != (mtime_ns, size):
+                cached = ((mtime_ns, size), self._parse(path))
+                self._rules[path] = cached
+                # Drop compiled combinations built from the old version
+                self._forget_compiled(path)
+            all_css_rules.extend(cached[1])
         
-        return True
+        compiled = CompiledStylesheet(all_css_rules)
+        self._compiled[keys] = compiled
+        return compiled
     
-    def _matches_simple_selector(self, selector, tag, element_id, element_classes):
-        """Match a simple selector against an element."""
-        # Handle multiple classes (e.g., .class1.class2 or tag.class1.class2)
-        if '.' in selector:
-            # Split by dots to get tag (if any) and classes
-            parts = selector.split('.')
-            tag_part = parts[0] if parts[0] else None
-            class_parts = [p for p in parts[1:] if p]
-            
-            # Check tag if specified
-            if tag_part and tag_part != tag:
-                return False
-            
-            # Check all classes are present
-            for class_name in class_parts:
-                if class_name not in element_classes:
-                    return False
-            
-            return True
+    def invalidate(self, css_path=None):
+        """
+        Forget cached stylesheets.
         
-        # ID selector
-        if selector.startswith('#'):
-            id_name = selector[1:]
-            return element_id == id_name
+        Args:
+            css_path: Stylesheet to forget (default: forget all)
+        """
+        if css_path is None:
+            self._rules.clear()
+            self._compiled.clear()
+            return
         
-        # Tag with ID
-        if '#' in selector:
-            tag_part, id_part = selector.split('#', 1)
-            return tag == tag_part and element_id == id_part
+        path = str(Path(css_path).resolve())
+        self._rules.pop(path, None)
+        self._forget_compiled(path)
+    
+    def _parse(self, path):
+        """Parse a stylesheet, or get its rules from the store if another process parsed it."""
+        if self.store is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                return parse_css(f.read())
         
-        # Tag selector only
-        return selector == tag
+        key = self.store.key('stylesheet', self.store.file_digest(path))
+        stored = self.store.get('stylesheet', key)
+        if stored is not None:
+            return [tuple(rule) for rule in json.loads(stored)]
+        with open(path, 'r', encoding='utf-8') as f:
+            rules = parse_css(f.read())
+        self.store.put('stylesheet', key, json.dumps(rules))
+        return rules
+    
+    def _forget_compiled(self, path):
+        """Drop compiled stylesheets that include a file."""
+        self._compiled = {
+            keys: compiled for keys, compiled in self._compiled.items()
+            if all(key_path != path for key_path, _, _ in keys)
+        }
+
+
+STYLESHEET_CACHE = StylesheetCache()
+
+
+def stylesheet_paths(html_content, template_dir):
+    """Get the paths of the CSS files a page links, relative to the template directory."""
+    # Find CSS file references
+    css_link_pattern = r'<link\s+rel="stylesheet"\s+href="([^"]+)"'
+    css_files = re.findall(css_link_pattern, html_content, re.IGNORECASE)
     
-    def get_output(self):
-        return ''.join(self.output)
+    # Resolve all referenced CSS files
+    css_paths = []
+    for css_file in css_files:
+        # Handle relative paths
+        css_file_normalized = css_file
+        while css_file_normalized.startswith('../'):
+            css_file_normalized = css_file_normalized[3:]
+        css_paths.append(template_dir / css_file_normalized)
+    return css_paths
 
 
 def inline_css(html_content, template_dir):
@@ -482,35 +646,283 @@ def inline_css(html_content, template_dir):
     Returns:
         str: HTML with inlined CSS and link tags removed
     """
-    # Find CSS file references
-    css_link_pattern = r'<link\s+rel="stylesheet"\s+href="([^"]+)"'
-    css_files = re.findall(css_link_pattern, html_content, re.IGNORECASE)
-    
-    if not css_files:
+    css_paths = stylesheet_paths(html_content, template_dir)
+    if not css_paths:
         return html_content
     
-    # Load and parse all referenced CSS files
-    all_css_rules = []
-    for css_file in css_files:
-        # Handle relative paths
-        css_file_normalized = css_file
-        while css_file_normalized.startswith('../'):
-            css_file_normalized = css_file_normalized[3:]
-        
-        css_path = template_dir / css_file_normalized
-        if css_path.exists():
-            with open(css_path, 'r', encoding='utf-8') as f:
-                css_content = f.read()
-                rules = parse_css(css_content)
-                all_css_rules.extend(rules)
-    
-    # Apply CSS inline
-    inliner = CSSInliner(all_css_rules)
+    # Apply CSS inline, with stylesheets parsed once per process
+    inliner = CSSInliner(STYLESHEET_CACHE.load(css_paths))
     inliner.feed(html_content)
     
     return inliner.get_output()
 
 
+def read_page(html_file):
+    """
+    Read a page and parse its CANVAS_META block.
+    
+    Returns:
+        Tuple of (html_file, html_content, meta, page_title)
+    """
+    html_content = html_file.read_text(encoding='utf-8')
+    meta = parse_canvas_meta(html_content)
+    page_title = meta.get('title', html_file.stem.replace('-', ' ').replace('_', ' ').title())
+    return html_file, html_content, meta, page_title
+
+
+def _init_page_worker(state, cache):
+    """
+    Set up a -j page worker with the parent's reproducible build and stylesheet store.
+    
+    Args:
+        state: State from reproducible_state()
+        cache: BuildCache that parsed stylesheets are shared through, or None
+    """
+    restore_reproducible_state(state)
+    STYLESHEET_CACHE.store = cache
+
+
+def transform_page(html_content, page_filename, template_dir, filename_to_slug_map):
+    """
+    Convert a template page into the HTML body stored in the IMSCC.
+    
+    Inlines CSS, converts links, removes the CANVAS_META comment and extracts
+    the body. Runs in worker processes when building with --jobs.
+    
+    Returns:
+        Converted HTML content
+    """
+    # Inline CSS and remove link tags
+    html_content = inline_css(html_content, template_dir)
+    
+    # Convert links using the filename→slug map
+    converted_html = convert_links(html_content, page_filename, filename_to_slug_map)
+    
+    # Remove the CANVAS_META comment from final output
+    converted_html = re.sub(
+        r'<!--\s*CANVAS_META\s*\n.*?\n\s*-->',
+        '',
+        converted_html,
+        flags=re.DOTALL | re.IGNORECASE
+    )
+    
+    # Extract body content if full HTML document
+    body_match = re.search(r'<body[^>]*>(.*?)</body>', converted_html, re.DOTALL | re.IGNORECASE)
+    if body_match:
+        converted_html = body_match.group(1).strip()
+    
+    return converted_html
+
+
+class SourceCache:
+    """
+    Pages and objects built from template files, kept between builds, e.g. by --watch.
+    
+    Each entry records the inputs it was built from: a page's source, the
+    stylesheets it links and the slugs of the pages it links to; the JSON
+    file of a rubric or quiz; an assignment's JSON file, description and
+    the stylesheets it links. An entry is reused only while those are
+    unchanged, so an edit rebuilds just what depends on the edited file.
+    Objects are reused only if they would get the same identifiers again
+    (see IdentifierRecord).
+    """
+    
+    def __init__(self):
+        self._entries = {}  # (kind, path) -> (dependencies, value, IdentifierRecord or None)
+        self.hits = Counter()
+        self.misses = Counter()
+    
+    def get(self, kind, path, dependencies):
+        """Get what was built from a file, or None if it must be built again."""
+        entry = self._entries.get((kind, str(path)))
+        if (entry is not None and entry[0] == dependencies
+                and (entry[2] is None or entry[2].replay())):
+            self.hits[kind] += 1
+            return entry[1]
+        self.misses[kind] += 1
+        return None
+    
+    def put(self, kind, path, dependencies, value, identifiers=None):
+        """Store what was built from a file with the inputs and identifiers it was built from."""
+        self._entries[(kind, str(path))] = (dependencies, value, identifiers)
+    
+    def retain(self, kind, paths):
+        """Drop the entries of files of a kind that no longer exist."""
+        keep = {(kind, str(path)) for path in paths}
+        self._entries = {
+            key: entry for key, entry in self._entries.items()
+            if key[0] != kind or key in keep
+        }
+
+
+def page_dependencies(html_content, template_dir, filename_to_slug_map):
+    """
+    Get the inputs a page's transformed output depends on.
+    
+    Returns:
+        Tuple of (html_content, stylesheet keys, linked page slugs)
+    """
+    css_keys = tuple(map(_file_key, stylesheet_paths(html_content, template_dir)))
+    linked_slugs = tuple(sorted(
+        (name, filename_to_slug_map.get(name)) for name in linked_page_names(html_content)
+    ))
+    return html_content, css_keys, linked_slugs
+
+
+def assignment_dependencies(assignment_path, assignment_data):
+    """
+    Get the files an assignment loaded by load_assignment_from_json() depends on.
+    
+    Returns:
+        Tuple of file keys of the JSON file, its description file and the
+        stylesheets the description links
+    """
+    keys = [_file_key(assignment_path)]
+    description_file = assignment_data.get('description_file')
+    if description_file:
+        html_path = assignment_path.parent / description_file
+        keys.append(_file_key(html_path))
+        if html_path.exists():
+            description = html_path.read_text(encoding='utf-8')
+            keys.extend(map(_file_key, stylesheet_paths(description, assignment_path.parent.parent)))
+    return tuple(keys)
+
+
+def load_cached(source_cache, kind, path, dependencies, load):
+    """
+    Load an object from a template file, reusing the one from an earlier build.
+    
+    Args:
+        source_cache: SourceCache, or None to always load
+        kind: Kind of object, e.g. 'quiz'
+        path: File the object is loaded from
+        dependencies: Inputs the object is built from
+        load: Function that loads the object
+    
+    Returns:
+        The object
+    """
+    if source_cache is None:
+        return load()
+    loaded = source_cache.get(kind, path, dependencies)
+    if loaded is None:
+        with record_identifiers() as identifiers:
+            loaded = load()
+        source_cache.put(kind, path, dependencies, loaded, identifiers)
+    return loaded
+
+
+def page_cache_key(cache, html_content, template_dir, filename_to_slug_map):
+    """
+    Get the BuildCache key of a page's transformed HTML.
+    
+    The key covers the page source, the content of the stylesheets it links
+    and the slugs of the pages it links to.
+    """
+    css_digests = [cache.file_digest(path) for path in stylesheet_paths(html_content, template_dir)]
+    linked_slugs = sorted(
+        (name, filename_to_slug_map.get(name)) for name in linked_page_names(html_content)
+    )
+    return cache.key('page', html_content, repr(css_digests), repr(linked_slugs))
+
+
+def print_cache_stats(cache):
+    """Print the hit rate and size of a BuildCache."""
+    stats = cache.stats()
+    print(f"\n🗄️  Build cache: {cache.directory}")
+    for kind in sorted(stats['hits'].keys() | stats['misses'].keys()):
+        hits = stats['hits'].get(kind, 0)
+        misses = stats['misses'].get(kind, 0)
+        print(f"   {kind}: {hits} hits, {misses} misses ({hits / (hits + misses):.0%} hit rate)")
+    print(f"   Entries: {stats['entries']} ({stats['size'] / 1024:.1f} KB of "
+          f"{stats['max_size'] / (1024 * 1024):.0f} MB limit)")
+    print(f"   Written: {stats['writes']}, evicted: {stats['evictions']}")
+
+
+def _cpu_time():
+    """CPU time of this process and its finished child processes, in seconds."""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class BuildStats:
+    """
+    Wall time, CPU time, item count and bytes read of each phase of a build.
+    
+    Phases run one after another: begin() ends the current phase and starts
+    the next. CPU time includes worker processes once they have exited, so
+    work done in worker processes with --jobs is counted.
+    """
+    
+    PHASES = ('config', 'pages', 'files', 'rubrics', 'quizzes', 'assignments', 'modules', 'export')
+    
+    def __init__(self):
+        self.phases = {
+            name: {'wall_time': 0.0, 'cpu_time': 0.0, 'items': 0, 'bytes': 0}
+            for name in self.PHASES
+        }
+        self._current = None
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+    
+    def begin(self, name):
+        """End the current phase, if any, and start timing another."""
+        self.end()
+        self._current = name
+        self._wall_start = time.perf_counter()
+        self._cpu_start = _cpu_time()
+    
+    def end(self):
+        """End the current phase."""
+        if self._current is None:
+            return
+        phase = self.phases[self._current]
+        phase['wall_time'] += time.perf_counter() - self._wall_start
+        phase['cpu_time'] += _cpu_time() - self._cpu_start
+        self._current = None
+    
+    def record(self, name, items=0, size=0):
+        """Add to the item count and bytes of a phase."""
+        self.phases[name]['items'] += items
+        self.phases[name]['bytes'] += size
+    
+    def to_dict(self):
+        """
+        Get the statistics as plain data, e.g. for JSON.
+        
+        Returns:
+            dict: 'phases' maps each phase to its wall_time, cpu_time, items
+            and bytes; 'wall_time' and 'cpu_time' are the totals
+        """
+        return {
+            'phases': {name: dict(phase) for name, phase in self.phases.items()},
+            'wall_time': sum(phase['wall_time'] for phase in self.phases.values()),
+            'cpu_time': sum(phase['cpu_time'] for phase in self.phases.values()),
+        }
+
+
+def combine_build_stats(stats_list):
+    """Add up the phase statistics of several builds, e.g. the courses of a batch."""
+    combined = BuildStats().to_dict()
+    for stats in stats_list:
+        for name, phase in stats['phases'].items():
+            for field, value in phase.items():
+                combined['phases'][name][field] += value
+        combined['wall_time'] += stats['wall_time']
+        combined['cpu_time'] += stats['cpu_time']
+    return combined
+
+
+def print_build_stats(stats):
+    """Print build statistics from build_imscc() as a table."""
+    print(f"\n⏱️  Build phases:")
+    print(f"   {'Phase':<12} {'Wall (s)':>9} {'CPU (s)':>9} {'Items':>8} {'Bytes':>14}")
+    for name, phase in stats['phases'].items():
+        print(f"   {name:<12} {phase['wall_time']:>9.3f} {phase['cpu_time']:>9.3f} "
+              f"{phase['items']:>8,} {phase['bytes']:>14,}")
+    print(f"   {'total':<12} {stats['wall_time']:>9.3f} {stats['cpu_time']:>9.3f}")
+
+
 def load_course_config(template_dir):
     """Load course configuration from course.json or return defaults."""
     config_path = template_dir / "course.json"
@@ -538,6 +950,31 @@ def load_modules_config(template_dir):
     return []
 
 
+# Question types create_question_from_json() accepts
+QUESTION_TYPES = (
+    'multiple_choice', 'true_false', 'fill_in_blank', 'fill_in_multiple_blanks',
+    'multiple_answers', 'multiple_dropdowns', 'matching', 'numerical_answer',
+    'formula_question', 'essay_question', 'file_upload_question', 'text_only_question'
+)
+
+
+def question_points_from_json(question_data):
+    """
+    Get the points of a question from JSON data without creating the question.
+    
+    Raises:
+        ValueError: If the data is not a question create_question_from_json() accepts
+    """
+    if not isinstance(question_data, dict):
+        raise ValueError("Question must be a JSON object")
+    qtype = question_data.get('type')
+    if qtype not in QUESTION_TYPES:
+        raise ValueError(f"Unknown question type: {qtype}")
+    if qtype == 'text_only_question':
+        return 0.0
+    return question_data.get('points', 1.0)
+
+
 def create_question_from_json(question_data):
     """Create a quiz question object from JSON data."""
     qtype = question_data.get('type')
@@ -621,11 +1058,8 @@ def create_question_from_json(question_data):
         raise ValueError(f"Unknown question type: {qtype}")
 
 
-def load_quiz_from_json(quiz_path, identifier=None):
-    """Load a quiz from a JSON file."""
-    with open(quiz_path, 'r') as f:
-        quiz_data = json.load(f)
-    
+def create_quiz_from_json(quiz_data, identifier=None):
+    """Create a quiz without questions from JSON data."""
     settings = quiz_data.get('settings', {})
     
     quiz = Quiz(
@@ -643,6 +1077,16 @@ def load_quiz_from_json(quiz_path, identifier=None):
         time_limit=settings.get('time_limit')
     )
     
+    return quiz
+
+
+def load_quiz_from_json(quiz_path, identifier=None):
+    """Load a quiz from a JSON file."""
+    with open(quiz_path, 'r') as f:
+        quiz_data = json.load(f)
+    
+    quiz = create_quiz_from_json(quiz_data, identifier)
+    
     for question_data in quiz_data.get('questions', []):
         question = create_question_from_json(question_data)
         quiz.add_question(question)
@@ -650,6 +1094,51 @@ def load_quiz_from_json(quiz_path, identifier=None):
     return quiz
 
 
+def _read_jsonl_questions(quiz_path):
+    """Create the questions of a JSON Lines quiz one line at a time."""
+    with open(quiz_path, 'r', encoding='utf-8') as f:
+        f.readline()  # Quiz settings
+        for line in f:
+            if line.strip():
+                yield create_question_from_json(json.loads(line))
+
+
+def load_quiz_from_jsonl(quiz_path, identifier=None):
+    """
+    Load a quiz from a JSON Lines question bank.
+    
+    The first line holds the quiz as in a JSON quiz file, without
+    'questions'; each following line is one question. The bank is read
+    once here to check each line and total its points, without creating
+    any question, and again while the package is written, where each
+    question is created once, one at a time, so memory use does not
+    depend on the number of questions.
+    """
+    digest = hashlib.sha256()
+    count = 0
+    points = 0.0
+    with open(quiz_path, 'r', encoding='utf-8') as f:
+        header = f.readline()
+        digest.update(header.encode('utf-8'))
+        quiz_data = json.loads(header)
+        for line_number, line in enumerate(f, start=2):
+            digest.update(line.encode('utf-8'))
+            if not line.strip():
+                continue
+            try:
+                points += question_points_from_json(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"line {line_number}: {e}") from e
+            count += 1
+    
+    quiz = create_quiz_from_json(quiz_data, identifier)
+    quiz.add_question_source(QuestionSource(
+        functools.partial(_read_jsonl_questions, str(quiz_path)),
+        count, points, content_hash=digest.hexdigest()
+    ))
+    return quiz
+
+
 def load_assignment_from_json(assignment_path, identifier=None):
     """Load an assignment from a JSON file."""
     with open(assignment_path, 'r', encoding='utf-8') as f:
@@ -718,8 +1207,20 @@ def load_rubric_from_json(rubric_path):
     return rubric
 
 
-def build_imscc(template_dir, output_file=None):
-    """Build IMSCC file from template directory."""
+def build_imscc(template_dir, output_file=None, dedup=False, reproducible=False, jobs=None,
+                base=None, source_cache=None, cache=None):
+    """
+    Build IMSCC file from template directory.
+    
+    Args:
+        base: Previous package whose unchanged members are copied as-is
+        source_cache: SourceCache of pages and objects built by earlier builds
+        cache: BuildCache of pages, quizzes and assignments kept on disk
+    
+    Returns:
+        dict: Build statistics on success (see BuildStats.to_dict(), plus
+        'course_code', 'output_file' and 'output_bytes'), or False
+    """
     
     template_path = Path(template_dir).resolve()
     
@@ -727,6 +1228,25 @@ def build_imscc(template_dir, output_file=None):
         print(f"❌ Error: Directory '{template_dir}' does not exist!")
         return False
     
+    if reproducible:
+        # Identifiers are derived from the course code, dates from $SOURCE_DATE_EPOCH
+        course_code = load_course_config(template_path)['course_code']
+        with reproducible_build(course_code):
+            return build_imscc(
+                template_dir, output_file, dedup=dedup, jobs=jobs,
+                base=base, source_cache=source_cache, cache=cache
+            )
+    
+    if cache is not None and reproducible_state() is None:
+        # Cached quizzes and assignments embed their identifiers, so derive
+        # them from the course code for entries to match across builds
+        course_code = load_course_config(template_path)['course_code']
+        with stable_identifiers(course_code):
+            return build_imscc(
+                template_dir, output_file, dedup=dedup, jobs=jobs,
+                base=base, source_cache=source_cache, cache=cache
+            )
+    
     wiki_dir = template_path / "wiki_content"
     files_dir = template_path / "web_resources"
     
@@ -742,10 +1262,18 @@ def build_imscc(template_dir, output_file=None):
     print(f"Building IMSCC from Template: {template_path.name}")
     print("=" * 70)
     
+    stats = BuildStats()
+    # Share parsed stylesheets with other builds using the same cache
+    STYLESHEET_CACHE.store = cache
+    
     # Load configuration
+    stats.begin('config')
     print("\n⚙️  Loading configuration...")
     config = load_course_config(template_path)
     modules_config = load_modules_config(template_path)
+    for config_file in (template_path / "course.json", template_path / "modules.json"):
+        if config_file.exists():
+            stats.record('config', items=1, size=config_file.stat().st_size)
     
     print(f"   Course Title: {config['title']}")
     print(f"   Course Code: {config['course_code']}")
@@ -759,58 +1287,74 @@ def build_imscc(template_dir, output_file=None):
     )
     
     # Process pages
+    stats.begin('pages')
     print(f"\n📄 Processing pages from {wiki_dir.name}/...")
     
     html_files = sorted(wiki_dir.glob("*.html"))
     if not html_files:
         print(f"   ⚠️  No HTML files found in {wiki_dir}")
     
-    # First pass: Build filename → title slug mapping
-    filename_to_slug_map = {}
-    for html_file in html_files:
-        html_content = html_file.read_text(encoding='utf-8')
-        meta = parse_canvas_meta(html_content)
-        
-        filename_base = html_file.stem
-        page_title = meta.get('title', filename_base.replace('-', ' ').replace('_', ' ').title())
-        title_slug = title_to_slug(page_title)
-        
-        filename_to_slug_map[filename_base] = title_slug
+    # Read every page and parse its metadata once
+    page_sources = [read_page(html_file) for html_file in html_files]
+    stats.record('pages', items=len(page_sources), size=sum(f.stat().st_size for f in html_files))
+    
+    # Build filename → title slug mapping from the parsed metadata
+    filename_to_slug_map = {
+        html_file.stem: title_to_slug(page_title)
+        for html_file, _, _, page_title in page_sources
+    }
     
-    # Second pass: Process pages with correct link mapping
+    # Process pages with correct link mapping
     pages_map = {}  # Map page slug to page object
     home_page = None
     
-    for html_file in html_files:
-        # Read HTML content
-        html_content = html_file.read_text(encoding='utf-8')
-        
-        # Inline CSS and remove link tags
-        html_content = inline_css(html_content, template_path)
-        
-        # Parse metadata
-        meta = parse_canvas_meta(html_content)
-        
-        # Determine page title
-        filename_base = html_file.stem
-        page_title = meta.get('title', filename_base.replace('-', ' ').replace('_', ' ').title())
-        title_slug = title_to_slug(page_title)
-        
-        # Convert links using the filename→slug map
-        converted_html = convert_links(html_content, html_file.name, filename_to_slug_map)
-        
-        # Remove the CANVAS_META comment from final output
-        converted_html = re.sub(
-            r'<!--\s*CANVAS_META\s*\n.*?\n\s*-->',
-            '',
-            converted_html,
-            flags=re.DOTALL | re.IGNORECASE
-        )
-        
-        # Extract body content if full HTML document
-        body_match = re.search(r'<body[^>]*>(.*?)</body>', converted_html, re.DOTALL | re.IGNORECASE)
-        if body_match:
-            converted_html = body_match.group(1).strip()
+    # Reuse pages whose inputs are unchanged since an earlier build
+    page_contents = [None] * len(page_sources)
+    if source_cache is not None:
+        source_cache.retain('page', (html_file for html_file, _, _, _ in page_sources))
+        dependencies = [
+            page_dependencies(html_content, template_path, filename_to_slug_map)
+            for _, html_content, _, _ in page_sources
+        ]
+        page_contents = [
+            source_cache.get('page', html_file, dependencies_of_page)
+            for (html_file, _, _, _), dependencies_of_page in zip(page_sources, dependencies)
+        ]
+    if cache is not None:
+        cache_keys = {}
+        for i, (_, html_content, _, _) in enumerate(page_sources):
+            if page_contents[i] is None:
+                cache_keys[i] = page_cache_key(cache, html_content, template_path, filename_to_slug_map)
+                page_contents[i] = cache.get('page', cache_keys[i])
+    pending = [i for i, converted_html in enumerate(page_contents) if converted_html is None]
+    
+    # Transform pages, in parallel if requested; results stay in sorted order
+    transform_args = (
+        [page_sources[i][1] for i in pending],
+        [page_sources[i][0].name for i in pending],
+        itertools.repeat(template_path),
+        itertools.repeat(filename_to_slug_map)
+    )
+    if jobs and jobs > 1 and len(pending) > 1:
+        chunksize = max(1, len(pending) // (jobs * 4))
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_page_worker,
+            initargs=(reproducible_state(), cache)
+        ) as executor:
+            transformed = list(executor.map(transform_page, *transform_args, chunksize=chunksize))
+    else:
+        transformed = list(map(transform_page, *transform_args))
+    
+    for i, converted_html in zip(pending, transformed):
+        page_contents[i] = converted_html
+        if source_cache is not None:
+            source_cache.put('page', page_sources[i][0], dependencies[i], converted_html)
+        if cache is not None:
+            cache.put('page', cache_keys[i], converted_html)
+    
+    for (html_file, _, meta, page_title), converted_html in zip(page_sources, page_contents):
+        title_slug = filename_to_slug_map[html_file.stem]
         
         # Check if this is the home page
         is_home = meta.get('home') in ('true', 'True', True, '1', 1)
@@ -831,6 +1375,7 @@ def build_imscc(template_dir, output_file=None):
         print(f"   ✓ {page_title} ({html_file.name}){' [HOME]' if meta.get('home') else ''}")
     
     # Process files
+    stats.begin('files')
     if files_dir.exists():
         print(f"\n📎 Processing files from {files_dir.name}/...")
         
@@ -851,9 +1396,11 @@ def build_imscc(template_dir, output_file=None):
             destination = f"web_resources/{rel_path}"
             
             course.add_file(str(filepath), destination)
+            stats.record('files', items=1, size=filepath.stat().st_size)
             print(f"   ✓ {rel_path}")
     
     # Process rubrics
+    stats.begin('rubrics')
     rubrics_dir = template_path / "rubrics"
     rubrics_map = {}  # Map rubric filename (without .json) to rubric object
     
@@ -863,42 +1410,65 @@ def build_imscc(template_dir, output_file=None):
         json_files = sorted(rubrics_dir.glob("*.json"))
         if not json_files:
             print(f"   ℹ️  No JSON files found in {rubrics_dir}")
+        if source_cache is not None:
+            source_cache.retain('rubric', json_files)
         
         for json_file in json_files:
             rubric_id = json_file.stem
             try:
-                rubric = load_rubric_from_json(json_file)
+                rubric = load_cached(
+                    source_cache, 'rubric', json_file, (_file_key(json_file),),
+                    functools.partial(load_rubric_from_json, json_file)
+                )
                 if rubric:
                     rubrics_map[rubric_id] = rubric
                     course.add_rubric(rubric)
+                    stats.record('rubrics', items=1, size=json_file.stat().st_size)
                     print(f"   ✓ {rubric.title} ({json_file.name})")
             except Exception as e:
                 print(f"   ❌ Error loading {json_file.name}: {e}")
     
     # Process quizzes
+    stats.begin('quizzes')
     quizzes_dir = template_path / "quizzes"
     quizzes_map = {}  # Map quiz filename (without .json) to quiz object
     
     if quizzes_dir.exists():
         print(f"\n📝 Processing quizzes from {quizzes_dir.name}/...")
         
-        quiz_files = sorted(quizzes_dir.glob("*.json"))
+        # .jsonl question banks are streamed into the package one question at a time
+        quiz_files = sorted(quizzes_dir.glob("*.json")) + sorted(quizzes_dir.glob("*.jsonl"))
         if not quiz_files:
             print(f"   ℹ️  No JSON files found in {quizzes_dir}")
+        if source_cache is not None:
+            source_cache.retain('quiz', quiz_files)
         
+        quiz_files_by_id = {}  # Quiz id -> first file with that stem
         for quiz_file in quiz_files:
             quiz_id = quiz_file.stem
+            if quiz_id in quiz_files_by_id:
+                # Both would be written to the same members and module item
+                print(f"   ❌ Error loading {quiz_file.name}: quiz id '{quiz_id}' is already "
+                      f"used by {quiz_files_by_id[quiz_id].name}")
+                continue
+            quiz_files_by_id[quiz_id] = quiz_file
             try:
-                quiz = load_quiz_from_json(quiz_file, identifier=quiz_id)
+                load_quiz = load_quiz_from_jsonl if quiz_file.suffix == '.jsonl' else load_quiz_from_json
+                quiz = load_cached(
+                    source_cache, 'quiz', quiz_file, (_file_key(quiz_file),),
+                    functools.partial(load_quiz, quiz_file, identifier=quiz_id)
+                )
                 quizzes_map[quiz_id] = quiz
                 course.add_quiz(quiz)
-                num_questions = len(quiz.questions)
-                total_points = sum(q.points_possible for q in quiz.questions)
+                stats.record('quizzes', items=1, size=quiz_file.stat().st_size)
+                num_questions = quiz.question_count
+                total_points = quiz.points_possible
                 print(f"   ✓ {quiz.title} ({num_questions} questions, {total_points} points)")
             except Exception as e:
                 print(f"   ❌ Error loading {quiz_file.name}: {e}")
     
     # Process assignments
+    stats.begin('assignments')
     assignments_dir = template_path / "assignments"
     assignments_map = {}  # Map assignment filename (without .json) to assignment object
     
@@ -908,6 +1478,8 @@ def build_imscc(template_dir, output_file=None):
         assignment_files = sorted(assignments_dir.glob("*.json"))
         if not assignment_files:
             print(f"   ℹ️  No JSON files found in {assignments_dir}")
+        if source_cache is not None:
+            source_cache.retain('assignment', assignment_files)
         
         for assignment_file in assignment_files:
             assignment_id = assignment_file.stem
@@ -915,9 +1487,15 @@ def build_imscc(template_dir, output_file=None):
                 with open(assignment_file, 'r') as f:
                     assignment_data = json.load(f)
                 
-                assignment = load_assignment_from_json(assignment_file, identifier=assignment_id)
+                assignment = load_cached(
+                    source_cache, 'assignment', assignment_file,
+                    assignment_dependencies(assignment_file, assignment_data),
+                    functools.partial(load_assignment_from_json, assignment_file, identifier=assignment_id)
+                )
                 
-                # Attach rubric if specified
+                # Attach rubric if specified; done on every build, so a
+                # reused assignment gets the rubric as it is now
+                assignment.rubric = None
                 rubric_ref = assignment_data.get('rubric')
                 if rubric_ref and rubric_ref in rubrics_map:
                     assignment.attach_rubric(rubrics_map[rubric_ref])
@@ -932,11 +1510,14 @@ def build_imscc(template_dir, output_file=None):
                 
                 assignments_map[assignment_id] = assignment
                 course.add_assignment(assignment)
+                stats.record('assignments', items=1, size=assignment_file.stat().st_size)
                 print(f"   ✓ {assignment.title} ({assignment.points_possible} points)")
             except Exception as e:
                 print(f"   ❌ Error loading {assignment_file.name}: {e}")
     
     # Process modules
+    stats.begin('modules')
+    stats.record('modules', items=len(modules_config))
     if modules_config:
         print(f"\n📚 Creating modules...")
         
@@ -992,12 +1573,18 @@ def build_imscc(template_dir, output_file=None):
         output_file = f"{config['course_code']}.imscc"
     
     # Export
+    stats.begin('export')
     print(f"\n💾 Exporting to {output_file}...")
-    course.export(output_file)
+    course.export(output_file, workers=jobs, dedup=dedup, base=base, cache=cache)
+    if cache is not None:
+        cache.evict()
+    stats.end()
     
     # Get file size
     file_size = os.path.getsize(output_file)
     file_size_kb = file_size / 1024
+    stats.record('export', items=len(course.pages) + len(course.file_manager.files)
+                 + len(course.quizzes) + len(course.assignments), size=file_size)
     
     # Success
     print("\n" + "=" * 70)
@@ -1028,7 +1615,285 @@ def build_imscc(template_dir, output_file=None):
     print(f"   • File links: $IMS-CC-FILEBASE$/web_resources/...")
     print(f"   • Page links: $CANVAS_OBJECT_REFERENCE$/pages/...\n")
     
-    return True
+    result = stats.to_dict()
+    result.update(course_code=config['course_code'], output_file=str(output_file), output_bytes=file_size)
+    return result
+
+
+# Template files and folders that trigger a rebuild in --watch mode
+WATCHED_PATHS = (
+    'wiki_content', 'web_resources', 'css', 'quizzes', 'assignments', 'rubrics',
+    'course.json', 'modules.json'
+)
+
+
+def snapshot_template(template_path):
+    """
+    Get the modification time and size of every watched file in a template.
+    
+    Returns:
+        dict: Path -> (mtime_ns, size), skipping hidden files such as editor swap files
+    """
+    snapshot = {}
+    for name in WATCHED_PATHS:
+        path = template_path / name
+        if path.is_dir():
+            candidates = [Path(root) / file for root, dirs, files in os.walk(path) for file in files]
+        else:
+            candidates = [path]
+        
+        for candidate in candidates:
+            if candidate.name.startswith('.'):
+                continue
+            try:
+                stat = candidate.stat()
+            except OSError:
+                continue
+            snapshot[str(candidate)] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def watch_template(template_dir, output_file=None, interval=0.5, **build_options):
+    """
+    Build a template, then rebuild it whenever a watched file changes.
+    
+    Only the pages, rubrics, quizzes and assignments whose source files
+    changed are built again (see SourceCache), serialized quizzes and
+    assignments are kept in a MemoryCache unless a BuildCache is given, and
+    the previous package is the export base, so its unchanged members are
+    copied without recompressing and unchanged web_resources files are not
+    even read. Runs until interrupted with Ctrl+C.
+    
+    Args:
+        interval: Seconds between checks for changes
+        build_options: Other build_imscc() options
+    """
+    template_path = Path(template_dir).resolve()
+    source_cache = SourceCache()
+    # A cache also gives stable identifiers, so unchanged documents match
+    build_options['cache'] = build_options.get('cache') or MemoryCache(version=code_version(__file__))
+    snapshot = None
+    
+    try:
+        while True:
+            current = snapshot_template(template_path)
+            if current == snapshot:
+                time.sleep(interval)
+                continue
+            
+            if snapshot is not None:
+                print(f"\n🔄 Changed:")
+                for path in sorted(snapshot.keys() | current.keys()):
+                    if snapshot.get(path) != current.get(path):
+                        print(f"   • {Path(path).relative_to(template_path)}")
+                        if path.endswith('.css'):
+                            STYLESHEET_CACHE.invalidate(path)
+            snapshot = current
+            
+            start = time.perf_counter()
+            hits, misses = source_cache.hits.copy(), source_cache.misses.copy()
+            try:
+                output = output_file or f"{load_course_config(template_path)['course_code']}.imscc"
+                built = build_imscc(
+                    template_dir, output,
+                    base=output if os.path.exists(output) else None,
+                    source_cache=source_cache, **build_options
+                )
+            except Exception as e:
+                # Keep watching so the next save can fix the template
+                built = False
+                print(f"❌ Build failed: {e}")
+            if built:
+                rebuilt = sum((source_cache.misses - misses).values())
+                reused = sum((source_cache.hits - hits).values())
+                print(f"⏱️  Built in {time.perf_counter() - start:.2f}s "
+                      f"({rebuilt} sources rebuilt, {reused} reused)")
+            
+            print(f"\n👀 Watching {template_path.name} for changes (Ctrl+C to stop)...")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+
+def read_batch_manifest(manifest_path):
+    """
+    Read the template directories listed in a batch manifest.
+    
+    The manifest lists one template directory per line, relative to the
+    manifest's folder. Blank lines and lines starting with # are ignored.
+    
+    Returns:
+        list: Template directory paths
+    """
+    manifest_path = Path(manifest_path)
+    template_dirs = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                template_dirs.append(manifest_path.parent / line)
+    return template_dirs
+
+
+# BuildCache used by every course a batch worker builds
+_BATCH_CACHE = None
+
+
+def _init_batch_worker(cache):
+    """
+    Set up a batch worker process with its handle on the shared build cache.
+    
+    The cache arrives as a copy: its counters are this worker's own, but
+    its entries on disk, including file digests and parsed stylesheets,
+    are shared with the other workers.
+    """
+    global _BATCH_CACHE
+    _BATCH_CACHE = cache
+
+
+def _build_batch_course(template_dir, output_file, options):
+    """
+    Build one course of a batch, capturing its console output (runs in worker processes).
+    
+    Returns:
+        dict: template_dir, output_file, success, stats (from build_imscc()),
+        seconds, size, error and log, plus the cache hits, misses and writes
+        of this build
+    """
+    cache = _BATCH_CACHE
+    hits = Counter(cache.hits) if cache else Counter()
+    misses = Counter(cache.misses) if cache else Counter()
+    writes = cache.writes if cache else 0
+    
+    log = io.StringIO()
+    error = None
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log):
+            success = build_imscc(template_dir, output_file, cache=cache, **options)
+    except Exception as e:
+        success = False
+        error = f"{type(e).__name__}: {e}"
+    seconds = time.perf_counter() - start
+    
+    return {
+        'template_dir': str(template_dir),
+        'output_file': str(output_file),
+        'success': bool(success),
+        'stats': success or None,
+        'seconds': seconds,
+        'size': os.path.getsize(output_file) if success else 0,
+        'error': error,
+        'log': log.getvalue(),
+        'cache_hits': cache.hits - hits if cache else Counter(),
+        'cache_misses': cache.misses - misses if cache else Counter(),
+        'cache_writes': cache.writes - writes if cache else 0,
+    }
+
+
+def _print_batch_result(result):
+    """Print one line as a batch course finishes."""
+    mark = '✓' if result['success'] else '❌'
+    print(f"   {mark} {result['template_dir']} ({result['seconds']:.2f}s)", flush=True)
+
+
+def build_batch(template_dirs, output_dir=None, batch_jobs=None, cache=None, **build_options):
+    """
+    Build many templates in one process tree.
+    
+    With batch_jobs > 1, courses are built in a pool of worker processes
+    that is shared by the whole batch, so interpreter startup and imports
+    are paid once per worker rather than once per course. That pool is the
+    only one: each course is built within its worker, whatever jobs says,
+    so no more than batch_jobs processes run. With a cache, file digests
+    and parsed stylesheets are shared between workers through its entries.
+    Each course's console output is captured and only shown if its build
+    fails.
+    
+    Args:
+        template_dirs: Template directories to build
+        output_dir: Folder for the packages (default: current directory),
+            named COURSECODE.imscc, or after the template folder when two
+            templates share a course code
+        batch_jobs: Number of courses built at once (default: 1)
+        cache: BuildCache shared by all courses
+        build_options: Other build_imscc() options, including jobs, the
+            worker processes each course uses for its pages and export
+            when courses are built one at a time
+    
+    Returns:
+        list: Result dict of each course, in input order
+    """
+    output_dir = Path(output_dir or '.')
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Pick output names up front so parallel builds never write the same file
+    output_files = []
+    used = set()
+    for template_dir in template_dirs:
+        template_path = Path(template_dir).resolve()
+        try:
+            name = load_course_config(template_path)['course_code']
+        except (OSError, ValueError, KeyError):
+            name = template_path.name  # The build reports the broken config
+        output_file = output_dir / f"{name}.imscc"
+        if output_file in used:
+            output_file = output_dir / f"{template_path.name}.imscc"
+        suffix = 2
+        while output_file in used:
+            output_file = output_dir / f"{template_path.name}-{suffix}.imscc"
+            suffix += 1
+        used.add(output_file)
+        output_files.append(output_file)
+    
+    print("\n" + "=" * 70)
+    print(f"Building {len(template_dirs)} Courses")
+    print("=" * 70 + "\n")
+    
+    start = time.perf_counter()
+    tasks = (template_dirs, output_files, itertools.repeat(build_options))
+    results = []
+    if batch_jobs and batch_jobs > 1 and len(template_dirs) > 1:
+        # Courses must not start pools of their own inside the batch pool
+        tasks = (template_dirs, output_files, itertools.repeat(dict(build_options, jobs=None)))
+        with ProcessPoolExecutor(
+            max_workers=batch_jobs, initializer=_init_batch_worker, initargs=(cache,)
+        ) as executor:
+            for result in executor.map(_build_batch_course, *tasks):
+                results.append(result)
+                # Workers count cache use in their own copy; total it here
+                if cache is not None:
+                    cache.hits.update(result['cache_hits'])
+                    cache.misses.update(result['cache_misses'])
+                    cache.writes += result['cache_writes']
+                _print_batch_result(result)
+    else:
+        _init_batch_worker(cache)
+        for result in map(_build_batch_course, *tasks):
+            results.append(result)
+            _print_batch_result(result)
+    elapsed = time.perf_counter() - start
+    
+    failed = [result for result in results if not result['success']]
+    for result in failed:
+        print(f"\n❌ Log of {result['template_dir']}:")
+        print(result['log'].rstrip())
+        if result['error']:
+            print(f"   {result['error']}")
+    
+    print("\n" + "=" * 70)
+    print(f"Batch Summary: {len(results) - len(failed)} of {len(results)} courses "
+          f"built in {elapsed:.1f}s")
+    print("=" * 70)
+    for result in results:
+        name = Path(result['template_dir']).name
+        if result['success']:
+            print(f"   ✓ {name:<32} {result['seconds']:7.2f}s {result['size'] / 1024:10.1f} KB  "
+                  f"{result['output_file']}")
+        else:
+            print(f"   ❌ {name:<32} {result['seconds']:7.2f}s  failed")
+    print()
+    
+    return results
 
 
 def main():
@@ -1040,6 +1905,8 @@ Examples:
   python3 build_from_template.py my-course
   python3 build_from_template.py biology-101 -o bio101.imscc
   python3 build_from_template.py . 
+  python3 build_from_template.py biology-101 chemistry-101 -j 8 --output-dir dist
+  python3 build_from_template.py --batch courses.txt --batch-jobs 8 --output-dir dist
 
 Template Structure:
   my-course/
@@ -1067,8 +1934,32 @@ Link Conversion:
     )
     
     parser.add_argument(
-        'template_dir',
-        help='Path to the template directory (or . for current directory)'
+        'template_dirs',
+        nargs='*',
+        metavar='template_dir',
+        help='Path to the template directory (or . for current directory); '
+             'several directories are built as a batch'
+    )
+    
+    parser.add_argument(
+        '--batch',
+        metavar='MANIFEST',
+        help='Also build the template directories listed in this file, one per line'
+    )
+    
+    parser.add_argument(
+        '--output-dir',
+        help='Folder for the packages of a batch build (default: current directory)',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--batch-jobs',
+        type=int,
+        default=None,
+        metavar='N',
+        help='Build this many courses of a batch at once, each in one worker process '
+             '(default: 1, courses one at a time using -j workers)'
     )
     
     parser.add_argument(
@@ -1077,9 +1968,123 @@ Link Conversion:
         default=None
     )
     
+    parser.add_argument(
+        '--dedup',
+        action='store_true',
+        help='Store files with identical content once and point links at the kept copy'
+    )
+    
+    parser.add_argument(
+        '--reproducible',
+        action='store_true',
+        help='Derive identifiers and timestamps from the input so identical '
+             'templates build byte-identical packages (dates from $SOURCE_DATE_EPOCH)'
+    )
+    
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Convert pages and serialize quizzes and assignments in this many worker '
+             'processes (default: 1); in a batch, for each course in turn'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and rebuild when the template changes, '
+             're-converting only the pages affected by each change'
+    )
+    
+    parser.add_argument(
+        '--stats',
+        choices=('json', 'table'),
+        help='Report wall time, CPU time, items and bytes of each build phase. '
+             'json writes the report to stdout and progress to stderr'
+    )
+    
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='Keep converted pages, quizzes and assignments in TEMPLATE_DIR/.imscc-cache '
+             'and reuse them in later builds; identifiers are derived from the course '
+             'code so cached entries match'
+    )
+    
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=256,
+        metavar='MB',
+        help='Trim the cache to this size, dropping least recently used entries (default: 256)'
+    )
+    
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help='Print cache hits, misses and size after building (implies --cache)'
+    )
+    
     args = parser.parse_args()
     
-    build_imscc(args.template_dir, args.output)
+    template_dirs = list(args.template_dirs)
+    if args.batch:
+        template_dirs.extend(read_batch_manifest(args.batch))
+    if not template_dirs:
+        parser.error('no template directory given')
+    batch = args.batch or len(template_dirs) > 1
+    if batch and (args.output or args.watch):
+        parser.error('-o and --watch build a single template; use --output-dir for a batch')
+    if args.batch_jobs and not batch:
+        parser.error('--batch-jobs needs several templates or --batch; use -j for a single build')
+    if (args.batch_jobs or 1) > 1 and (args.jobs or 1) > 1:
+        parser.error('-j and --batch-jobs cannot be combined: with --batch-jobs each course '
+                     'is built in one worker process')
+    if args.stats and args.watch:
+        parser.error('--stats reports a single build and cannot be used with --watch')
+    
+    cache = None
+    if args.cache or args.cache_stats:
+        # A batch shares one cache next to its packages
+        cache_parent = Path(args.output_dir or '.') if batch else Path(template_dirs[0])
+        cache = BuildCache(
+            cache_parent / '.imscc-cache',
+            max_size=args.cache_size * 1024 * 1024,
+            version=code_version(__file__)
+        )
+    
+    # Keep stdout for the JSON report
+    with contextlib.redirect_stdout(sys.stderr) if args.stats == 'json' else contextlib.nullcontext():
+        if batch:
+            results = build_batch(
+                template_dirs, args.output_dir, batch_jobs=args.batch_jobs, cache=cache,
+                dedup=args.dedup, reproducible=args.reproducible, jobs=args.jobs
+            )
+            success = all(result['success'] for result in results)
+            stats = [
+                {key: result[key] for key in ('template_dir', 'output_file', 'success', 'seconds', 'stats')}
+                for result in results
+            ]
+        else:
+            build = watch_template if args.watch else build_imscc
+            success = stats = build(
+                template_dirs[0], args.output,
+                dedup=args.dedup, reproducible=args.reproducible, jobs=args.jobs, cache=cache
+            )
+        
+        if args.stats == 'table' and stats:
+            print_build_stats(
+                combine_build_stats(r['stats'] for r in stats if r['stats']) if batch else stats
+            )
+        
+        if args.cache_stats:
+            print_cache_stats(cache)
+    
+    if args.stats == 'json':
+        print(json.dumps(stats, indent=2))
+    
+    if batch and not success:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -8,9 +8,11 @@ from .course import Course
 from .wiki_page import WikiPage
 from .module import Module
 from .resource import FileResource
+from .compression import CompressionPolicy
+from .cache import BuildCache, MemoryCache, code_version
 from .assignment import Assignment, AssignmentGroup, Rubric
 from .quiz import (
-    Quiz, QuizQuestion,
+    Quiz, QuizQuestion, QuestionSource,
     MultipleChoiceQuestion, TrueFalseQuestion,
     FillInBlankQuestion, FillInMultipleBlanksQuestion,
     MultipleAnswersQuestion, MultipleDropdownsQuestion,
@@ -18,7 +20,13 @@ from .quiz import (
     FormulaQuestion, EssayQuestion,
     FileUploadQuestion, TextOnlyQuestion
 )
-from .utils import generate_identifier, extract_imscc
+from .links import LinkRewriter, LinkRule
+from .reader import (
+    ImsccArchive, ManifestIndex, ArchiveResource, ArchivePage,
+    ArchiveAssignment, ArchiveQuiz, ArchiveFile
+)
+from .diff import ArchiveDiff, MemberChange
+from .utils import generate_identifier, extract_imscc, reproducible_build, stable_identifiers
 
 __version__ = "0.1.0"
 __all__ = [
@@ -26,11 +34,27 @@ __all__ = [
     "WikiPage",
     "Module",
     "FileResource",
+    "CompressionPolicy",
+    "BuildCache",
+    "MemoryCache",
+    "code_version",
+    "LinkRewriter",
+    "LinkRule",
+    "ImsccArchive",
+    "ManifestIndex",
+    "ArchiveResource",
+    "ArchivePage",
+    "ArchiveAssignment",
+    "ArchiveQuiz",
+    "ArchiveFile",
+    "ArchiveDiff",
+    "MemberChange",
     "Assignment",
     "AssignmentGroup",
     "Rubric",
     "Quiz",
     "QuizQuestion",
+    "QuestionSource",
     "MultipleChoiceQuestion",
     "TrueFalseQuestion",
     "FillInBlankQuestion",
@@ -45,4 +69,6 @@ __all__ = [
     "TextOnlyQuestion",
     "generate_identifier",
     "extract_imscc",
+    "reproducible_build",
+    "stable_identifiers",
 ]
@@ -0,0 +1,9 @@
+"""Run the imscc command line interface: python -m imscc."""
+
+import sys
+
+from .cli import main
+
+
+if __name__ == '__main__':
+    sys.exit(main())
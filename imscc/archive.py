@@ -0,0 +1,403 @@
+"""Archive writer that streams IMSCC members straight into a ZIP file."""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+import zlib
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+from .compression import CompressionPolicy
+from .utils import zip_date_time
+from .xml_writer import XMLWriter
+from .zipwriter import ZIP64_LIMIT, ZipWriter
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Suffix of the file next to an exported package that records its member digests
+DIGESTS_SUFFIX = '.digests.json'
+
+# progress(arcname, member_done, member_total, archive_done, archive_total)
+ProgressCallback = Callable[[str, int, int, int, int], None]
+
+
+def read_digests(package_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the member digests recorded next to a package by Course.export().
+    
+    Args:
+        package_path: Path to the .imscc file
+    
+    Returns:
+        Member name → {'crc', 'size', and 'sha256' and 'source' if recorded};
+        empty if no digests were recorded
+    """
+    try:
+        with open(os.fspath(package_path) + DIGESTS_SUFFIX, 'r', encoding='utf-8') as f:
+            return json.load(f)['members']
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def write_digests(package_path: str, digests: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Record the member digests of a package in a file next to it.
+    
+    Args:
+        package_path: Path to the .imscc file
+        digests: Member name → digests, as in ArchiveWriter.digests
+    """
+    path = os.fspath(package_path) + DIGESTS_SUFFIX
+    temp_path = f"{path}.partial"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'members': digests}, f, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+class _HashingWriter(io.RawIOBase):
+    """Passes bytes on to another stream, keeping their CRC-32, size and optionally SHA-256."""
+    
+    def __init__(self, target: BinaryIO, sha256: bool = False):
+        super().__init__()
+        self.target = target
+        self.crc = 0
+        self.sha256 = hashlib.sha256() if sha256 else None
+        self.size = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    @property
+    def digest(self) -> Optional[str]:
+        """Get the SHA-256 hex digest of the bytes written, if it is kept."""
+        return self.sha256.hexdigest() if self.sha256 is not None else None
+    
+    def write(self, data) -> int:
+        self.crc = zlib.crc32(data, self.crc)
+        if self.sha256 is not None:
+            self.sha256.update(data)
+        self.size += len(data)
+        self.target.write(data)
+        return len(data)
+
+
+class ArchiveWriter:
+    """Writes generated documents and file resources into a ZipWriter."""
+    
+    def __init__(
+        self,
+        zipf: ZipWriter,
+        policy: Optional[CompressionPolicy] = None,
+        base: Optional[BinaryIO] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress: Optional[ProgressCallback] = None,
+        base_digests: Optional[Dict[str, Dict[str, Any]]] = None,
+        record_digests: bool = False,
+        verify_digests: bool = False
+    ):
+        """
+        Create an archive writer.
+        
+        Args:
+            zipf: ZipWriter for the package
+            policy: Compression policy for each member (default: CompressionPolicy())
+            base: Previously exported archive, opened for binary reading
+                and seekable. Members whose CRC-32 and size match its central
+                directory are copied from it as compressed bytes instead of
+                being deflated again.
+            chunk_size: Bytes read from a source file at a time; memory use
+                per file stays within this bound however large the file is
+            progress: Called as files are written with the member path,
+                bytes done and total for the member, and bytes done and
+                total for all files in the archive
+            base_digests: Digests of the base archive's members, from
+                read_digests(). Files whose path, mtime and size are the
+                recorded ones are reused without being read.
+            record_digests: Keep the CRC-32, size and source file of every
+                member in digests, for write_digests()
+            verify_digests: Also compute the SHA-256 of every member, record
+                it, and only reuse base members whose recorded SHA-256 is
+                the new content's
+        """
+        self.zipf = zipf
+        self.policy = policy or CompressionPolicy()
+        self.base = base
+        # Central directory of the base archive; its members are read through base
+        self.base_zip = zipfile.ZipFile(base) if base is not None else None
+        self.base_digests = base_digests or {}
+        self.verify_digests = verify_digests
+        # Member name -> {'crc', 'size', 'sha256', 'source'}, if record_digests is set
+        self.digests: Optional[Dict[str, Dict[str, Any]]] = {} if record_digests else None
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.members_written = 0
+        self.members_reused = 0
+        # Size of all files expected in the archive, set before they are written
+        self.bytes_total = 0
+        self.bytes_done = 0
+    
+    def write_text(self, arcname: str, content: str) -> None:
+        """
+        Write a generated document as a UTF-8 member.
+        
+        Args:
+            arcname: Path of the member within the IMSCC
+            content: Document content
+        """
+        data = content.encode('utf-8')
+        compress_type, level = self.policy.choose(arcname, data[:self.policy.sample_size])
+        if self.base is not None or self.digests is not None:
+            crc = zlib.crc32(data)
+            digest = hashlib.sha256(data).hexdigest() if self.verify_digests else None
+            if self._reuse(arcname, crc, len(data), digest, compress_type):
+                return
+            self._record(arcname, crc, len(data), digest)
+        zinfo = self._new_info(arcname)
+        zinfo.compress_type = compress_type
+        self.zipf.writestr(zinfo, data, level)
+        self.members_written += 1
+    
+    def write_xml(self, arcname: str, write: Callable[[XMLWriter], None]) -> None:
+        """
+        Stream an XML document into a member as it is generated.
+        
+        Args:
+            arcname: Path of the member within the IMSCC
+            write: Function that writes the document to an XMLWriter
+        """
+        compress_type, level = self.policy.choose(arcname)
+        zinfo = self._new_info(arcname)
+        zinfo.compress_type = compress_type
+        
+        if self.base is not None:
+            # The content has to be known before it can be compared with the
+            # base; spool it, so large documents are not held in memory
+            with tempfile.SpooledTemporaryFile(self.chunk_size) as spool:
+                hashing = _HashingWriter(spool, sha256=self.verify_digests)
+                with io.TextIOWrapper(hashing, encoding='utf-8', newline='\n') as out:
+                    write(XMLWriter(out))
+                if self._reuse(arcname, hashing.crc, hashing.size, hashing.digest, compress_type):
+                    return
+                self._record(arcname, hashing.crc, hashing.size, hashing.digest)
+                
+                spool.seek(0)
+                with self.zipf.open(zinfo, level, force_zip64=hashing.size > ZIP64_LIMIT) as member:
+                    for chunk in iter(lambda: spool.read(self.chunk_size), b''):
+                        member.write(chunk)
+            self.members_written += 1
+            return
+        
+        with self.zipf.open(zinfo, level) as member:
+            # ZipWriter keeps the CRC-32 and size; only SHA-256 needs a pass here
+            hashing = _HashingWriter(member, sha256=True) if self.verify_digests else member
+            with io.TextIOWrapper(hashing, encoding='utf-8', newline='\n') as out:
+                write(XMLWriter(out))
+        self._record(arcname, zinfo.CRC, zinfo.file_size, hashing.digest if self.verify_digests else None)
+        self.members_written += 1
+    
+    def write_file(self, arcname: str, source_path: str) -> None:
+        """
+        Stream a file from disk into the archive without staging a copy.
+        
+        The file is read in chunk_size blocks, so memory use does not grow
+        with the file size. ZIP64 extensions are used for files too large
+        for a standard ZIP entry.
+        
+        With a base archive, a file whose path, mtime and size are those
+        recorded when the base was written is reused without being read
+        again.
+        
+        Args:
+            arcname: Path of the member within the IMSCC
+            source_path: Path to the source file on disk
+        """
+        zinfo = self._new_info(arcname, source_path)
+        size = zinfo.file_size
+        stat = os.stat(source_path)
+        source = [os.path.abspath(source_path), stat.st_mtime_ns, stat.st_size]
+        with open(source_path, 'rb') as f:
+            sample = f.read(self.policy.sample_size)
+            compress_type, level = self.policy.choose(arcname, sample)
+            digest = None
+            recorded = self.base_digests.get(arcname) if self.base is not None else None
+            if recorded is not None and recorded.get('source') == source:
+                if self._reuse(arcname, None, size, recorded.get('sha256'), compress_type, source):
+                    self.bytes_done += size
+                    self._report(arcname, size, size)
+                    return
+            if self.base is not None:
+                crc = zlib.crc32(sample)
+                sha256 = hashlib.sha256(sample) if self.verify_digests else None
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    crc = zlib.crc32(chunk, crc)
+                    if sha256 is not None:
+                        sha256.update(chunk)
+                digest = sha256.hexdigest() if sha256 is not None else None
+                if self._reuse(arcname, crc, size, digest, compress_type, source):
+                    self.bytes_done += size
+                    self._report(arcname, size, size)
+                    return
+            f.seek(0)
+            
+            zinfo.compress_type = compress_type
+            # Hash while writing unless the content was already hashed above
+            sha256 = (
+                hashlib.sha256()
+                if digest is None and self.verify_digests and self.digests is not None else None
+            )
+            # Decide on ZIP64 from the real size: an unseekable output cannot
+            # have its local header rewritten once the data is written
+            with self.zipf.open(zinfo, level, force_zip64=size > ZIP64_LIMIT) as member:
+                done = 0
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    member.write(chunk)
+                    if sha256 is not None:
+                        sha256.update(chunk)
+                    done += len(chunk)
+                    self.bytes_done += len(chunk)
+                    self._report(arcname, done, size)
+        if size == 0:
+            self._report(arcname, 0, 0)
+        self._record(
+            arcname, zinfo.CRC, size, sha256.hexdigest() if sha256 is not None else digest, source
+        )
+        self.members_written += 1
+    
+    def _new_info(self, arcname: str, source_path: Optional[str] = None) -> zipfile.ZipInfo:
+        """
+        Create the ZipInfo for a new member.
+        
+        In a reproducible build every member gets the build epoch as its
+        timestamp and the same permissions and creator system, whatever
+        the source file's mtime and mode or the platform.
+        
+        Args:
+            arcname: Path of the member within the IMSCC
+            source_path: File the member is copied from, if any
+        
+        Returns:
+            ZipInfo for the member
+        """
+        if source_path is None:
+            zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(time.time())[:6])
+            zinfo.external_attr = 0o600 << 16  # Same as ZipWriter.open()
+        else:
+            zinfo = zipfile.ZipInfo.from_file(source_path, arcname)
+        
+        date_time = zip_date_time()
+        if date_time is not None:
+            zinfo.date_time = date_time
+            zinfo.external_attr = 0o644 << 16
+            zinfo.create_system = 3  # Unix
+        return zinfo
+    
+    def _report(self, arcname: str, done: int, total: int) -> None:
+        """
+        Pass progress on a file member to the progress callback.
+        
+        Args:
+            arcname: Path of the member within the IMSCC
+            done: Bytes of the member written so far
+            total: Size of the member in bytes
+        """
+        if self.progress is not None:
+            self.progress(arcname, done, total, self.bytes_done, self.bytes_total)
+    
+    def _record(
+        self,
+        arcname: str,
+        crc: int,
+        size: int,
+        digest: Optional[str] = None,
+        source: Optional[list] = None
+    ) -> None:
+        """
+        Keep the digests of a member written to the archive, if digests are recorded.
+        
+        Args:
+            arcname: Path of the member within the IMSCC
+            crc: CRC-32 of the member's content
+            size: Size of the member's content in bytes
+            digest: SHA-256 hex digest of the member's content, if computed
+            source: [path, mtime_ns, size] of the file the member was copied from
+        """
+        if self.digests is None:
+            return
+        entry = {'crc': crc, 'size': size}
+        if digest is not None:
+            entry['sha256'] = digest
+        if source is not None:
+            entry['source'] = source
+        self.digests[arcname] = entry
+    
+    def _reuse(
+        self,
+        arcname: str,
+        crc: Optional[int],
+        size: int,
+        digest: Optional[str],
+        compress_type: int,
+        source: Optional[list] = None
+    ) -> bool:
+        """
+        Copy a member from the base archive if its content is unchanged.
+        
+        The content is unchanged if its CRC-32 and size equal those in the
+        base archive's central directory, so the base member is never
+        inflated. With verify_digests, the SHA-256 recorded for the base
+        member must equal the new content's too. Members compressed with a
+        different method than the policy now chooses are not reused, so
+        policy changes take effect.
+        
+        Args:
+            arcname: Path of the member within the IMSCC
+            crc: CRC-32 of the new content, or None when the content was not
+                read because its source file is unchanged; the CRC-32
+                recorded with the base is used instead
+            size: Size of the new content in bytes
+            digest: SHA-256 hex digest of the new content, with verify_digests
+            compress_type: Compression method chosen for the new content
+            source: [path, mtime_ns, size] of the source file, if any
+        
+        Returns:
+            True if the member was copied from the base archive
+        """
+        if self.base is None:
+            return False
+        try:
+            old = self.base_zip.getinfo(arcname)
+        except KeyError:
+            return False
+        if old.file_size != size or old.compress_type != compress_type or old.flag_bits & 0x1:
+            return False
+        recorded = self.base_digests.get(arcname, {})
+        if crc is None:
+            crc = recorded.get('crc')
+        if old.CRC != crc:
+            return False
+        if self.verify_digests and (digest is None or recorded.get('sha256') != digest):
+            return False
+        
+        self._copy_raw(old)
+        self._record(arcname, old.CRC, size, digest, source)
+        self.members_reused += 1
+        return True
+    
+    def _copy_raw(self, old: zipfile.ZipInfo) -> None:
+        """
+        Copy a member's compressed bytes from the base archive unchanged.
+        
+        Args:
+            old: Entry in the base archive
+        """
+        if zip_date_time() is None:
+            zinfo = zipfile.ZipInfo(old.filename, date_time=old.date_time)
+            zinfo.external_attr = old.external_attr
+            zinfo.create_system = old.create_system
+        else:
+            zinfo = self._new_info(old.filename)
+        self.zipf.copy_from(self.base, old, zinfo, self.chunk_size)
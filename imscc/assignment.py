@@ -2,9 +2,9 @@
 
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+from xml.etree.ElementTree import Element, SubElement
 from .utils import generate_identifier, slugify
+from .xml_writer import XMLWriter, xml_to_string
 
 
 class Assignment:
@@ -53,7 +53,7 @@ class Assignment:
         self.description = description
         self.points_possible = points_possible
         self.submission_types = submission_types
-        self.identifier = identifier or generate_identifier()
+        self.identifier = identifier or generate_identifier(key=f"assignment:{title}")
         self.assignment_group_identifierref = assignment_group_identifierref
         self.workflow_state = workflow_state
         self.grading_type = grading_type
@@ -122,89 +122,88 @@ class Assignment:
         Returns:
             Formatted XML string
         """
-        assignment = Element(
-            'assignment',
-            identifier=self.identifier,
-            xmlns="http://canvas.instructure.com/xsd/cccv1p0",
-            attrib={
-                'xmlns:xsi': "http://www.w3.org/2001/XMLSchema-instance",
-                'xsi:schemaLocation': "http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd"
-            }
-        )
+        return xml_to_string(self.write_xml)
+    
+    def write_xml(self, xml: XMLWriter) -> None:
+        """Write assignment_settings.xml content."""
+        xml.declaration()
+        xml.start('assignment', {
+            'identifier': self.identifier,
+            'xmlns': "http://canvas.instructure.com/xsd/cccv1p0",
+            'xmlns:xsi': "http://www.w3.org/2001/XMLSchema-instance",
+            'xsi:schemaLocation': "http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd"
+        })
         
         # Add elements in the order they appear in Canvas exports
-        SubElement(assignment, 'title').text = self.title
+        xml.element('title', self.title)
         
         # Add dates
-        SubElement(assignment, 'due_at').text = self.due_at
-        SubElement(assignment, 'lock_at').text = self.lock_at
-        SubElement(assignment, 'unlock_at').text = self.unlock_at
+        xml.element('due_at', self.due_at)
+        xml.element('lock_at', self.lock_at)
+        xml.element('unlock_at', self.unlock_at)
         
-        SubElement(assignment, 'module_locked').text = str(self.module_locked).lower()
+        xml.element('module_locked', str(self.module_locked).lower())
         
         # Assignment group reference
         if self.assignment_group_identifierref:
-            SubElement(assignment, 'assignment_group_identifierref').text = self.assignment_group_identifierref
+            xml.element('assignment_group_identifierref', self.assignment_group_identifierref)
         
-        SubElement(assignment, 'workflow_state').text = self.workflow_state
+        xml.element('workflow_state', self.workflow_state)
         
         # Rubric references if rubric is attached
         if self.rubric:
-            SubElement(assignment, 'rubric_identifierref').text = self.rubric.identifier
-            SubElement(assignment, 'rubric_use_for_grading').text = str(self.rubric.use_for_grading).lower()
-            SubElement(assignment, 'rubric_hide_points').text = str(self.rubric.hide_points).lower()
-            SubElement(assignment, 'rubric_hide_outcome_results').text = str(self.rubric.hide_outcome_results).lower()
-            SubElement(assignment, 'rubric_hide_score_total').text = str(self.rubric.hide_score_total).lower()
+            xml.element('rubric_identifierref', self.rubric.identifier)
+            xml.element('rubric_use_for_grading', str(self.rubric.use_for_grading).lower())
+            xml.element('rubric_hide_points', str(self.rubric.hide_points).lower())
+            xml.element('rubric_hide_outcome_results', str(self.rubric.hide_outcome_results).lower())
+            xml.element('rubric_hide_score_total', str(self.rubric.hide_score_total).lower())
         
         # Assignment overrides (empty for now)
-        SubElement(assignment, 'assignment_overrides')
+        xml.element('assignment_overrides')
         
         # Allowed extensions for file uploads
-        SubElement(assignment, 'allowed_extensions').text = self.allowed_extensions
+        xml.element('allowed_extensions', self.allowed_extensions)
         
-        SubElement(assignment, 'has_group_category').text = str(self.has_group_category).lower()
-        SubElement(assignment, 'points_possible').text = str(self.points_possible)
-        SubElement(assignment, 'grading_type').text = self.grading_type
-        SubElement(assignment, 'all_day').text = str(self.all_day).lower()
-        SubElement(assignment, 'submission_types').text = self.submission_types
-        SubElement(assignment, 'position').text = str(self.position)
+        xml.element('has_group_category', str(self.has_group_category).lower())
+        xml.element('points_possible', str(self.points_possible))
+        xml.element('grading_type', self.grading_type)
+        xml.element('all_day', str(self.all_day).lower())
+        xml.element('submission_types', self.submission_types)
+        xml.element('position', str(self.position))
         
         # Plagiarism detection
-        SubElement(assignment, 'turnitin_enabled').text = str(self.turnitin_enabled).lower()
-        SubElement(assignment, 'vericite_enabled').text = str(self.vericite_enabled).lower()
+        xml.element('turnitin_enabled', str(self.turnitin_enabled).lower())
+        xml.element('vericite_enabled', str(self.vericite_enabled).lower())
         
         # Peer reviews
-        SubElement(assignment, 'peer_review_count').text = str(self.peer_review_count)
-        SubElement(assignment, 'peer_reviews').text = str(self.peer_reviews).lower()
-        SubElement(assignment, 'automatic_peer_reviews').text = str(self.automatic_peer_reviews).lower()
-        SubElement(assignment, 'anonymous_peer_reviews').text = str(self.anonymous_peer_reviews).lower()
+        xml.element('peer_review_count', str(self.peer_review_count))
+        xml.element('peer_reviews', str(self.peer_reviews).lower())
+        xml.element('automatic_peer_reviews', str(self.automatic_peer_reviews).lower())
+        xml.element('anonymous_peer_reviews', str(self.anonymous_peer_reviews).lower())
         
         # Other settings
-        SubElement(assignment, 'grade_group_students_individually').text = str(self.grade_group_students_individually).lower()
-        SubElement(assignment, 'freeze_on_copy').text = str(self.freeze_on_copy).lower()
-        SubElement(assignment, 'omit_from_final_grade').text = str(self.omit_from_final_grade).lower()
-        SubElement(assignment, 'hide_in_gradebook').text = str(self.hide_in_gradebook).lower()
-        SubElement(assignment, 'intra_group_peer_reviews').text = str(self.intra_group_peer_reviews).lower()
-        SubElement(assignment, 'only_visible_to_overrides').text = str(self.only_visible_to_overrides).lower()
-        SubElement(assignment, 'post_to_sis').text = str(self.post_to_sis).lower()
+        xml.element('grade_group_students_individually', str(self.grade_group_students_individually).lower())
+        xml.element('freeze_on_copy', str(self.freeze_on_copy).lower())
+        xml.element('omit_from_final_grade', str(self.omit_from_final_grade).lower())
+        xml.element('hide_in_gradebook', str(self.hide_in_gradebook).lower())
+        xml.element('intra_group_peer_reviews', str(self.intra_group_peer_reviews).lower())
+        xml.element('only_visible_to_overrides', str(self.only_visible_to_overrides).lower())
+        xml.element('post_to_sis', str(self.post_to_sis).lower())
         
         # Moderated grading
-        SubElement(assignment, 'moderated_grading').text = str(self.moderated_grading).lower()
-        SubElement(assignment, 'grader_count').text = str(self.grader_count)
-        SubElement(assignment, 'grader_comments_visible_to_graders').text = str(self.grader_comments_visible_to_graders).lower()
-        SubElement(assignment, 'anonymous_grading').text = str(self.anonymous_grading).lower()
-        SubElement(assignment, 'graders_anonymous_to_graders').text = str(self.graders_anonymous_to_graders).lower()
-        SubElement(assignment, 'grader_names_visible_to_final_grader').text = str(self.grader_names_visible_to_final_grader).lower()
-        SubElement(assignment, 'anonymous_instructor_annotations').text = str(self.anonymous_instructor_annotations).lower()
+        xml.element('moderated_grading', str(self.moderated_grading).lower())
+        xml.element('grader_count', str(self.grader_count))
+        xml.element('grader_comments_visible_to_graders', str(self.grader_comments_visible_to_graders).lower())
+        xml.element('anonymous_grading', str(self.anonymous_grading).lower())
+        xml.element('graders_anonymous_to_graders', str(self.graders_anonymous_to_graders).lower())
+        xml.element('grader_names_visible_to_final_grader', str(self.grader_names_visible_to_final_grader).lower())
+        xml.element('anonymous_instructor_annotations', str(self.anonymous_instructor_annotations).lower())
         
         # Post policy
-        post_policy = SubElement(assignment, 'post_policy')
-        SubElement(post_policy, 'post_manually').text = str(self.post_manually).lower()
-        
-        # Convert to formatted string
-        rough_string = tostring(assignment, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+        xml.start('post_policy')
+        xml.element('post_manually', str(self.post_manually).lower())
+        xml.end()
+        xml.end()  # assignment
     
     def get_html_content(self) -> str:
         """
@@ -246,7 +245,7 @@ class AssignmentGroup:
         self.title = title
         self.position = position
         self.group_weight = group_weight
-        self.identifier = identifier or generate_identifier()
+        self.identifier = identifier or generate_identifier(key=f"assignment_group:{title}")
     
     def to_xml(self) -> Element:
         """Generate XML element for assignment group."""
@@ -294,7 +293,7 @@ class Rubric:
         """
         self.title = title
         self.criteria = criteria or []
-        self.identifier = identifier or generate_identifier()
+        self.identifier = identifier or generate_identifier(key=f"rubric:{title}")
         self.read_only = read_only
         self.reusable = reusable
         self.public = public
@@ -0,0 +1,335 @@
+"""Persistent build cache for serialized course content."""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import Counter, OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .resource import hash_file
+
+
+# Default size limit of a build cache directory
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+
+def code_version(*paths: str) -> str:
+    """
+    Get a version string that changes whenever the tool's code changes.
+    
+    Combines the package version with a digest of the imscc package sources
+    and any extra source files, so cache entries written by other code are
+    never reused, even between releases.
+    
+    Args:
+        paths: Extra source files the cached output depends on, e.g. a build script
+    
+    Returns:
+        Version string such as '0.1.0+3f2a9c1d04b7e6a5'
+    """
+    from . import __version__
+    
+    package_dir = Path(__file__).parent
+    digest = hashlib.sha256()
+    for path in sorted(package_dir.glob('*.py')) + [Path(p) for p in paths]:
+        digest.update(path.name.encode('utf-8'))
+        digest.update(path.read_bytes())
+    return f"{__version__}+{digest.hexdigest()[:16]}"
+
+
+def _canonical(value: Any) -> Any:
+    """Convert a value to plain JSON data that does not depend on object identity."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, bytes):
+        return value.hex()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(item) for item in value), key=json.dumps)
+    if isinstance(value, dict):
+        # Kept in order: documents list blanks, variables and such in dict order
+        return [[_canonical(k), _canonical(v)] for k, v in value.items()]
+    if hasattr(value, '__dict__') and not callable(value):
+        cls = type(value)
+        state = {name: v for name, v in vars(value).items() if not name.startswith('_')}
+        # Properties such as Quiz.points_possible stand in for the private
+        # attributes they are computed from
+        for klass in cls.__mro__:
+            for name, attr in vars(klass).items():
+                if isinstance(attr, property) and not name.startswith('_') and name not in state:
+                    state[name] = getattr(value, name)
+        return [f"{cls.__module__}.{cls.__qualname__}",
+                {name: _canonical(v) for name, v in sorted(state.items())}]
+    raise TypeError(f"Cannot key a build cache entry on {type(value).__name__} values")
+
+
+def canonical_state(obj: Any) -> str:
+    """
+    Serialize an object's state for BuildCache.key(), the same way in every process.
+    
+    Objects become their class name and their public attributes and
+    properties, sorted by name, and sets are sorted; lists and dicts keep
+    their order, which documents are generated in. Unlike a pickle, the
+    result depends only on values, never on object identity, shared
+    references or private bookkeeping.
+    
+    Args:
+        obj: Object, e.g. a Quiz or Assignment, or plain data
+    
+    Returns:
+        JSON text
+    
+    Raises:
+        TypeError: If the state holds values with no canonical form, such as functions
+    """
+    return json.dumps(_canonical(obj), separators=(',', ':'), ensure_ascii=False)
+
+
+class BuildCache:
+    """
+    Content-addressed store of build outputs, kept on disk between runs.
+    
+    Each entry is a file named by the hash of everything its content depends
+    on, so entries never need invalidating: changed input simply produces a
+    new key. Reading an entry refreshes its modification time, and evict()
+    removes the least recently used entries once the directory grows past
+    its size limit. Entries are written atomically, so several processes
+    can share a cache directory.
+    """
+    
+    def __init__(
+        self,
+        directory: str = '.imscc-cache',
+        max_size: int = DEFAULT_CACHE_SIZE,
+        version: Optional[str] = None
+    ):
+        """
+        Open a build cache.
+        
+        Args:
+            directory: Cache directory (created on first write)
+            max_size: Size in bytes the directory is trimmed to by evict()
+            version: Tool version mixed into every key (default: code_version())
+        """
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.version = version or code_version()
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self.writes = 0
+        self.evictions = 0
+        self._file_digests: Dict[Tuple[str, int, int], str] = {}
+    
+    def key(self, kind: str, *parts: Any) -> str:
+        """
+        Get the key of an entry from everything its content depends on.
+        
+        Args:
+            kind: Kind of entry, e.g. 'page' or 'quiz'
+            parts: Inputs as str, bytes or other values compared by repr()
+        
+        Returns:
+            Hex digest naming the entry
+        """
+        digest = hashlib.sha256()
+        for part in (self.version, kind) + parts:
+            if isinstance(part, str):
+                data = part.encode('utf-8')
+            elif isinstance(part, bytes):
+                data = part
+            else:
+                data = repr(part).encode('utf-8')
+            # Length-prefix each part so different splits never collide
+            digest.update(len(data).to_bytes(8, 'big'))
+            digest.update(data)
+        return digest.hexdigest()
+    
+    def get(self, kind: str, key: str) -> Optional[str]:
+        """
+        Get an entry.
+        
+        Args:
+            kind: Kind of entry, as for key()
+            key: Key from key()
+        
+        Returns:
+            The stored text, or None if it is not cached
+        """
+        path = self._path(kind, key)
+        try:
+            text = path.read_text(encoding='utf-8')
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            self.misses[kind] += 1
+            return None
+        self.hits[kind] += 1
+        return text
+    
+    def put(self, kind: str, key: str, text: str) -> None:
+        """
+        Store an entry.
+        
+        Args:
+            kind: Kind of entry, as for key()
+            key: Key from key()
+            text: Content to store
+        """
+        path = self._path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self.writes += 1
+    
+    def file_digest(self, path: str) -> Optional[str]:
+        """
+        Get the SHA-256 digest of a file, hashing each version of it only once.
+        
+        Digests are stored as 'file' entries keyed by the file's path, mtime
+        and size, so processes sharing the cache directory hash a file once
+        between them.
+        
+        Args:
+            path: Path to the file
+        
+        Returns:
+            Hex digest of the file content, or None if it does not exist
+        """
+        try:
+            resolved = Path(path).resolve()
+            stat = resolved.stat()
+        except OSError:
+            return None
+        stat_key = (str(resolved), stat.st_mtime_ns, stat.st_size)
+        digest = self._file_digests.get(stat_key)
+        if digest is None:
+            key = self.key('file', *stat_key)
+            digest = self.get('file', key)
+            if digest is None:
+                digest = hash_file(str(resolved))
+                self.put('file', key, digest)
+            self._file_digests[stat_key] = digest
+        return digest
+    
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits its size limit.
+        
+        Returns:
+            Number of entries removed
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self.evictions += removed
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit, miss and size statistics.
+        
+        Returns:
+            Dict with 'hits' and 'misses' per kind of entry, 'writes',
+            'evictions', 'entries', 'size' and 'max_size'
+        """
+        entries = self._entries()
+        return {
+            'hits': dict(self.hits),
+            'misses': dict(self.misses),
+            'writes': self.writes,
+            'evictions': self.evictions,
+            'entries': len(entries),
+            'size': sum(size for _, size, _ in entries),
+            'max_size': self.max_size,
+        }
+    
+    def _path(self, kind: str, key: str) -> Path:
+        """Get the file an entry is stored in."""
+        return self.directory / kind / key[:2] / key
+    
+    def _entries(self):
+        """List (mtime_ns, size, path) of every entry."""
+        entries = []
+        for root, dirs, files in os.walk(self.directory):
+            for file in files:
+                if file.startswith('.tmp-'):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+
+class MemoryCache(BuildCache):
+    """
+    BuildCache kept in memory, for long-running processes such as --watch.
+    
+    Entries live only as long as the process, so nothing is written to the
+    template folder; evict() drops least recently used entries past the
+    size limit, counting the UTF-8 size of their text.
+    """
+    
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, version: Optional[str] = None):
+        """
+        Create an empty in-memory cache.
+        
+        Args:
+            max_size: Size in bytes the entries are trimmed to by evict()
+            version: Tool version mixed into every key (default: code_version())
+        """
+        super().__init__('<memory>', max_size, version)
+        self._store: 'OrderedDict[Tuple[str, str], Tuple[str, int]]' = OrderedDict()
+    
+    def get(self, kind: str, key: str) -> Optional[str]:
+        entry = self._store.get((kind, key))
+        if entry is None:
+            self.misses[kind] += 1
+            return None
+        self._store.move_to_end((kind, key))  # Mark as recently used
+        self.hits[kind] += 1
+        return entry[0]
+    
+    def put(self, kind: str, key: str, text: str) -> None:
+        self._store[(kind, key)] = (text, len(text.encode('utf-8')))
+        self._store.move_to_end((kind, key))
+        self.writes += 1
+    
+    def evict(self) -> int:
+        total = sum(size for _, size in self._store.values())
+        removed = 0
+        while self._store and total > self.max_size:
+            _, (_, size) = self._store.popitem(last=False)
+            total -= size
+            removed += 1
+        self.evictions += removed
+        return removed
+    
+    def _entries(self):
+        """List (position, size, key) of every entry, least recently used first."""
+        return [
+            (position, size, key)
+            for position, (key, (_, size)) in enumerate(self._store.items())
+        ]
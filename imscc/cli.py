@@ -0,0 +1,77 @@
+"""Command line interface: imscc diff."""
+
+import argparse
+import sys
+from typing import List, Optional
+
+from .diff import ArchiveDiff
+from .reader import ImsccArchive
+
+
+# Status letters printed before each changed member
+STATUS_LETTERS = {'changed': 'M', 'added': 'A', 'removed': 'D'}
+
+
+def _format_size(change) -> str:
+    """Describe the size of a changed member."""
+    if change.old is None:
+        return f"{change.new.file_size:,} bytes"
+    if change.new is None:
+        return f"{change.old.file_size:,} bytes"
+    return f"{change.old.file_size:,} → {change.new.file_size:,} bytes"
+
+
+def diff_command(args: argparse.Namespace) -> int:
+    """Compare two packages and print what changed."""
+    with ImsccArchive(args.old) as old, ImsccArchive(args.new) as new:
+        diff = ArchiveDiff(old, new)
+        
+        for (kind, identifier), changes in diff.by_object().items():
+            resource = changes[0].resource
+            label = kind if identifier is None else f"{kind} {identifier}"
+            if resource is not None and resource.href and kind in ('page', 'assignment', 'file'):
+                label += f" ({resource.href})"
+            print(label)
+            for change in changes:
+                print(f"  {STATUS_LETTERS[change.status]} {change.name} ({_format_size(change)})")
+                if args.content and change.status == 'changed':
+                    for line in diff.content_diff(change, args.context):
+                        sys.stdout.write(f"    {line}" if line.endswith('\n') else f"    {line}\n")
+        
+        counts = diff.counts()
+        if diff:
+            print()
+        print(f"{counts['changed']} changed, {counts['added']} added, "
+              f"{counts['removed']} removed, {counts['unchanged']} unchanged members")
+    return 1 if diff else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the imscc command."""
+    parser = argparse.ArgumentParser(
+        prog='imscc',
+        description='Tools for IMS Common Cartridge packages'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    diff_parser = subparsers.add_parser(
+        'diff',
+        help='Show what changed between two course exports',
+        description='Compare two .imscc packages by the CRC-32 and size in their ZIP '
+                    'central directories, grouping changed members by the page, quiz, '
+                    'assignment or file they belong to. Exits with 1 if they differ.'
+    )
+    diff_parser.add_argument('old', help='Package compared from')
+    diff_parser.add_argument('new', help='Package compared to')
+    diff_parser.add_argument(
+        '--content', action='store_true',
+        help='Also show unified diffs of changed text members (inflates only those members)'
+    )
+    diff_parser.add_argument(
+        '-U', '--context', type=int, default=3, metavar='N',
+        help='Lines of context in content diffs (default: 3)'
+    )
+    diff_parser.set_defaults(func=diff_command)
+    
+    args = parser.parse_args(argv)
+    return args.func(args)
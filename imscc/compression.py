@@ -0,0 +1,124 @@
+"""Per-member compression policy for IMSCC archives."""
+
+import math
+import os
+import zipfile
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+
+# File types that are already compressed; deflating them wastes CPU for no gain
+INCOMPRESSIBLE_EXTENSIONS = frozenset({
+    # Documents and office formats (ZIP containers or compressed streams)
+    '.pdf', '.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp', '.epub',
+    # Images
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.heic',
+    # Audio and video
+    '.mp3', '.m4a', '.aac', '.ogg', '.oga', '.flac',
+    '.mp4', '.m4v', '.mov', '.webm', '.mkv', '.avi', '.ogv',
+    # Archives and fonts
+    '.zip', '.imscc', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.jar',
+    '.woff', '.woff2',
+})
+
+# Content classes used to pick a deflate level
+CONTENT_CLASSES = {
+    '.xml': 'xml',
+    '.qti': 'xml',
+    '.html': 'html',
+    '.htm': 'html',
+    '.css': 'text',
+    '.js': 'text',
+    '.json': 'text',
+    '.txt': 'text',
+    '.csv': 'text',
+    '.md': 'text',
+    '.svg': 'text',
+}
+
+
+def byte_entropy(data: bytes) -> float:
+    """
+    Calculate the Shannon entropy of a byte string.
+    
+    Args:
+        data: Bytes to measure
+    
+    Returns:
+        Entropy in bits per byte (0.0 for empty or uniform data, 8.0 maximum)
+    """
+    if not data:
+        return 0.0
+    total = len(data)
+    entropy = 0.0
+    for count in Counter(data).values():
+        p = count / total
+        entropy -= p * math.log2(p)
+    return entropy
+
+
+class CompressionPolicy:
+    """Chooses the ZIP compression method and level for each archive member."""
+    
+    def __init__(
+        self,
+        levels: Optional[Dict[str, int]] = None,
+        stored_extensions: Iterable[str] = INCOMPRESSIBLE_EXTENSIONS,
+        sample_size: int = 4096,
+        entropy_threshold: float = 7.5
+    ):
+        """
+        Create a compression policy.
+        
+        Args:
+            levels: Deflate level per content class ('xml', 'html', 'text',
+                'other'), e.g. {'xml': 9, 'html': 1}. Classes not listed use
+                zlib's default level.
+            stored_extensions: Extensions that are always written with ZIP_STORED
+            sample_size: Bytes sampled from the start of members of unknown
+                type to estimate their entropy
+            entropy_threshold: Sampled entropy (bits per byte) at or above
+                which a member of unknown type is stored uncompressed
+        """
+        self.levels = dict(levels or {})
+        self.stored_extensions = frozenset(ext.lower() for ext in stored_extensions)
+        self.sample_size = sample_size
+        self.entropy_threshold = entropy_threshold
+    
+    def content_class(self, arcname: str) -> str:
+        """
+        Get the content class of an archive member from its extension.
+        
+        Args:
+            arcname: Path of the member within the IMSCC
+        
+        Returns:
+            'media' for already-compressed types, otherwise 'xml', 'html',
+            'text' or 'other'
+        """
+        ext = os.path.splitext(arcname)[1].lower()
+        if ext in self.stored_extensions:
+            return 'media'
+        return CONTENT_CLASSES.get(ext, 'other')
+    
+    def choose(self, arcname: str, sample: bytes = b'') -> Tuple[int, Optional[int]]:
+        """
+        Choose how to compress an archive member.
+        
+        Args:
+            arcname: Path of the member within the IMSCC
+            sample: First block of the member's content; only consulted for
+                members whose extension does not identify the content class
+        
+        Returns:
+            Tuple of (compress_type, compresslevel) for zipfile
+        """
+        content_class = self.content_class(arcname)
+        if content_class == 'media':
+            return zipfile.ZIP_STORED, None
+        
+        if content_class == 'other' and len(sample) >= 512:
+            if byte_entropy(sample[:self.sample_size]) >= self.entropy_threshold:
+                return zipfile.ZIP_STORED, None
+        
+        return zipfile.ZIP_DEFLATED, self.levels.get(content_class)
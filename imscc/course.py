@@ -1,19 +1,50 @@
 """Course class for creating IMSCC packages."""
 
+import contextlib
+import json
 import os
-import zipfile
-import tempfile
-import shutil
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional, List
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
+from typing import BinaryIO, Callable, Optional, List, Sequence, Tuple
 
 from .wiki_page import WikiPage
 from .module import Module
-from .resource import FileResource, FileManager
-from .utils import generate_identifier, ensure_dir
+from .resource import FileResource, FileManager, hash_file
+from .archive import (
+    DEFAULT_CHUNK_SIZE, DIGESTS_SUFFIX, ArchiveWriter, ProgressCallback,
+    read_digests, write_digests
+)
+from .cache import BuildCache, canonical_state
+from .compression import CompressionPolicy
+from .xml_writer import XMLWriter
+from .zipwriter import ZipWriter
+from .utils import (
+    build_datetime, generate_identifier, reproducible_state, restore_reproducible_state
+)
+
+
+def _serialize_assignment(assignment: 'Assignment') -> Tuple[str, str]:
+    """Serialize an assignment to its HTML and settings XML (runs in worker processes)."""
+    return assignment.get_html_content(), assignment.to_xml()
+
+
+def _serialize_quiz(quiz: 'Quiz') -> Tuple[str, str, str]:
+    """Serialize a quiz to its meta, QTI shell and full QTI XML (runs in worker processes)."""
+    return quiz.to_assessment_meta_xml(), quiz.to_assessment_qti_xml(), quiz.to_qti_xml()
+
+
+def _chunksize(count: int, workers: int) -> int:
+    """Pick a map chunk size that keeps every worker busy without tiny tasks."""
+    return max(1, count // (workers * 4))
+
+
+def _worker_pool(workers: int) -> ProcessPoolExecutor:
+    """Start a process pool whose workers continue this process's reproducible build."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=restore_reproducible_state,
+        initargs=(reproducible_state(),)
+    )
 
 
 class Course:
@@ -39,7 +70,9 @@ class Course:
         """
         self.title = title
         self.course_code = course_code or title
-        self.identifier = identifier or generate_identifier()
+        self.identifier = identifier or generate_identifier(key=f"course:{title}")
+        self.settings_identifier = generate_identifier(key=f"{self.identifier}/settings")
+        self.root_account_uuid = generate_identifier('', key=f"{self.identifier}/root_account")
         self.license = license
         self.default_view = default_view
         
@@ -230,451 +263,700 @@ class Course:
         
         self.quizzes.append(quiz)
     
-    def _generate_manifest(self) -> str:
-        """Generate the imsmanifest.xml content."""
+    def _write_manifest(self, xml: XMLWriter) -> None:
+        """Write the imsmanifest.xml content."""
+        xml.declaration()
+        
         # Root manifest element - attribute order matters for Canvas!
-        manifest = Element('manifest')
-        # Set attributes in the same order as Canvas exports
-        manifest.set('identifier', self.identifier)
-        manifest.set('xmlns', 'http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1')
-        manifest.set('xmlns:lom', 'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/resource')
-        manifest.set('xmlns:lomimscc', 'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest')
-        manifest.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        manifest.set('xsi:schemaLocation', 
-                    'http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1 '
-                    'http://www.imsglobal.org/profile/cc/ccv1p1/ccv1p1_imscp_v1p2_v1p0.xsd '
-                    'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/resource '
-                    'http://www.imsglobal.org/profile/cc/ccv1p1/LOM/ccv1p1_lomresource_v1p0.xsd '
-                    'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest '
-                    'http://www.imsglobal.org/profile/cc/ccv1p1/LOM/ccv1p1_lommanifest_v1p0.xsd')
+        # Canvas puts identifier first, then xmlns attributes
+        xml.start('manifest', {
+            'identifier': self.identifier,
+            'xmlns': 'http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1',
+            'xmlns:lom': 'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/resource',
+            'xmlns:lomimscc': 'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+            'xsi:schemaLocation': 
+                'http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1 '
+                'http://www.imsglobal.org/profile/cc/ccv1p1/ccv1p1_imscp_v1p2_v1p0.xsd '
+                'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/resource '
+                'http://www.imsglobal.org/profile/cc/ccv1p1/LOM/ccv1p1_lomresource_v1p0.xsd '
+                'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest '
+                'http://www.imsglobal.org/profile/cc/ccv1p1/LOM/ccv1p1_lommanifest_v1p0.xsd'
+        })
         
         # Metadata
-        metadata = SubElement(manifest, 'metadata')
-        SubElement(metadata, 'schema').text = 'IMS Common Cartridge'
-        SubElement(metadata, 'schemaversion').text = '1.1.0'
-        
-        lom = SubElement(metadata, 'lomimscc:lom')
-        general = SubElement(lom, 'lomimscc:general')
-        title_elem = SubElement(general, 'lomimscc:title')
-        SubElement(title_elem, 'lomimscc:string').text = self.title
-        
-        lifecycle = SubElement(lom, 'lomimscc:lifeCycle')
-        contribute = SubElement(lifecycle, 'lomimscc:contribute')
-        date_elem = SubElement(contribute, 'lomimscc:date')
-        SubElement(date_elem, 'lomimscc:dateTime').text = datetime.now().strftime('%Y-%m-%d')
-        
-        rights = SubElement(lom, 'lomimscc:rights')
-        copyright_elem = SubElement(rights, 'lomimscc:copyrightAndOtherRestrictions')
-        SubElement(copyright_elem, 'lomimscc:value').text = 'yes'
-        desc_elem = SubElement(rights, 'lomimscc:description')
-        SubElement(desc_elem, 'lomimscc:string').text = 'Private (Copyrighted) - http://en.wikipedia.org/wiki/Copyright'
+        xml.start('metadata')
+        xml.element('schema', 'IMS Common Cartridge')
+        xml.element('schemaversion', '1.1.0')
+        
+        xml.start('lomimscc:lom')
+        xml.start('lomimscc:general')
+        xml.start('lomimscc:title')
+        xml.element('lomimscc:string', self.title)
+        xml.end()
+        xml.end()
+        
+        xml.start('lomimscc:lifeCycle')
+        xml.start('lomimscc:contribute')
+        xml.start('lomimscc:date')
+        xml.element('lomimscc:dateTime', build_datetime().strftime('%Y-%m-%d'))
+        xml.end()
+        xml.end()
+        xml.end()
+        
+        xml.start('lomimscc:rights')
+        xml.start('lomimscc:copyrightAndOtherRestrictions')
+        xml.element('lomimscc:value', 'yes')
+        xml.end()
+        xml.start('lomimscc:description')
+        xml.element('lomimscc:string', 'Private (Copyrighted) - http://en.wikipedia.org/wiki/Copyright')
+        xml.end()
+        xml.end()
+        xml.end()  # lomimscc:lom
+        xml.end()  # metadata
         
         # Organizations
-        organizations = SubElement(manifest, 'organizations')
-        organization = SubElement(organizations, 'organization')
-        organization.set('identifier', 'org_1')
-        organization.set('structure', 'rooted-hierarchy')
-        
-        learning_modules = SubElement(organization, 'item')
-        learning_modules.set('identifier', 'LearningModules')
+        xml.start('organizations')
+        xml.start('organization', {'identifier': 'org_1', 'structure': 'rooted-hierarchy'})
+        xml.start('item', {'identifier': 'LearningModules'})
         
         # Add modules to organization
         for module in self.modules:
-            module_item = SubElement(learning_modules, 'item')
-            module_item.set('identifier', module.identifier)
-            title_elem = SubElement(module_item, 'title')
-            title_elem.text = module.title
+            xml.start('item', {'identifier': module.identifier})
+            xml.element('title', module.title)
             
             # Add module items
             for item in module.items:
-                item_elem = SubElement(module_item, 'item')
-                item_elem.set('identifier', item.identifier)
-                item_elem.set('identifierref', item.identifierref)
-                item_title = SubElement(item_elem, 'title')
-                item_title.text = item.title
+                xml.start('item', {'identifier': item.identifier, 'identifierref': item.identifierref})
+                xml.element('title', item.title)
+                xml.end()
+            xml.end()
+        
+        # Canvas expects <item identifier="LearningModules"></item> not <item ... />
+        xml.end(short_empty=False)
+        xml.end()  # organization
+        xml.end()  # organizations
         
         # Resources
-        resources = SubElement(manifest, 'resources')
+        xml.start('resources')
         
         # Course settings resource
-        settings_id = generate_identifier()
-        settings_resource = SubElement(resources, 'resource')
-        settings_resource.set('identifier', settings_id)
-        settings_resource.set('type', 'associatedcontent/imscc_xmlv1p1/learning-application-resource')
-        settings_resource.set('href', 'course_settings/canvas_export.txt')
-        
-        SubElement(settings_resource, 'file').set('href', 'course_settings/course_settings.xml')
-        SubElement(settings_resource, 'file').set('href', 'course_settings/files_meta.xml')
-        SubElement(settings_resource, 'file').set('href', 'course_settings/context.xml')
-        SubElement(settings_resource, 'file').set('href', 'course_settings/media_tracks.xml')
-        SubElement(settings_resource, 'file').set('href', 'course_settings/canvas_export.txt')
+        settings_id = self.settings_identifier
+        xml.start('resource', {
+            'identifier': settings_id,
+            'type': 'associatedcontent/imscc_xmlv1p1/learning-application-resource',
+            'href': 'course_settings/canvas_export.txt'
+        })
+        xml.element('file', attrib={'href': 'course_settings/course_settings.xml'})
+        xml.element('file', attrib={'href': 'course_settings/files_meta.xml'})
+        xml.element('file', attrib={'href': 'course_settings/context.xml'})
+        xml.element('file', attrib={'href': 'course_settings/media_tracks.xml'})
+        xml.element('file', attrib={'href': 'course_settings/canvas_export.txt'})
         
         if self.modules:
-            SubElement(settings_resource, 'file').set('href', 'course_settings/module_meta.xml')
+            xml.element('file', attrib={'href': 'course_settings/module_meta.xml'})
         
         if self.assignment_groups:
-            SubElement(settings_resource, 'file').set('href', 'course_settings/assignment_groups.xml')
+            xml.element('file', attrib={'href': 'course_settings/assignment_groups.xml'})
         
         if self.rubrics:
-            SubElement(settings_resource, 'file').set('href', 'course_settings/rubrics.xml')
+            xml.element('file', attrib={'href': 'course_settings/rubrics.xml'})
+        xml.end()
         
         # Wiki page resources
         for page in self.pages:
-            resource = SubElement(resources, 'resource')
-            resource.set('identifier', page.identifier)
-            resource.set('type', 'webcontent')
-            resource.set('href', f'wiki_content/{page.filename}')
-            SubElement(resource, 'file').set('href', f'wiki_content/{page.filename}')
+            xml.start('resource', {
+                'identifier': page.identifier,
+                'type': 'webcontent',
+                'href': f'wiki_content/{page.filename}'
+            })
+            xml.element('file', attrib={'href': f'wiki_content/{page.filename}'})
+            xml.end()
         
         # Assignment resources
         for assignment in self.assignments:
-            resource = SubElement(resources, 'resource')
-            resource.set('identifier', assignment.identifier)
-            resource.set('type', 'associatedcontent/imscc_xmlv1p1/learning-application-resource')
-            resource.set('href', f'{assignment.identifier}/assignment.html')
-            SubElement(resource, 'file').set('href', f'{assignment.identifier}/assignment.html')
-            SubElement(resource, 'file').set('href', f'{assignment.identifier}/assignment_settings.xml')
+            xml.start('resource', {
+                'identifier': assignment.identifier,
+                'type': 'associatedcontent/imscc_xmlv1p1/learning-application-resource',
+                'href': f'{assignment.identifier}/assignment.html'
+            })
+            xml.element('file', attrib={'href': f'{assignment.identifier}/assignment.html'})
+            xml.element('file', attrib={'href': f'{assignment.identifier}/assignment_settings.xml'})
+            xml.end()
         
         # Quiz resources
         for quiz in self.quizzes:
             # Main quiz resource
-            quiz_resource = SubElement(resources, 'resource')
-            quiz_resource.set('identifier', quiz.identifier)
-            quiz_resource.set('type', 'imsqti_xmlv1p2/imscc_xmlv1p1/assessment')
-            SubElement(quiz_resource, 'file').set('href', f'{quiz.identifier}/assessment_qti.xml')
+            dep_id = quiz.meta_identifier
+            xml.start('resource', {
+                'identifier': quiz.identifier,
+                'type': 'imsqti_xmlv1p2/imscc_xmlv1p1/assessment'
+            })
+            xml.element('file', attrib={'href': f'{quiz.identifier}/assessment_qti.xml'})
             
             # Dependency resource
-            dep_id = generate_identifier('i')
-            SubElement(quiz_resource, 'dependency', identifierref=dep_id)
+            xml.element('dependency', attrib={'identifierref': dep_id})
+            xml.end()
             
             # Associated content resource
-            dep_resource = SubElement(resources, 'resource')
-            dep_resource.set('identifier', dep_id)
-            dep_resource.set('type', 'associatedcontent/imscc_xmlv1p1/learning-application-resource')
-            dep_resource.set('href', f'{quiz.identifier}/assessment_meta.xml')
-            SubElement(dep_resource, 'file').set('href', f'{quiz.identifier}/assessment_meta.xml')
-            SubElement(dep_resource, 'file').set('href', f'non_cc_assessments/{quiz.identifier}.xml.qti')
+            xml.start('resource', {
+                'identifier': dep_id,
+                'type': 'associatedcontent/imscc_xmlv1p1/learning-application-resource',
+                'href': f'{quiz.identifier}/assessment_meta.xml'
+            })
+            xml.element('file', attrib={'href': f'{quiz.identifier}/assessment_meta.xml'})
+            xml.element('file', attrib={'href': f'non_cc_assessments/{quiz.identifier}.xml.qti'})
+            xml.end()
         
         # File resources
         for file_res in self.file_manager.files:
-            resource = SubElement(resources, 'resource')
-            resource.set('identifier', file_res.identifier)
-            resource.set('type', 'webcontent')
             # Normalize path to use forward slashes for cross-platform compatibility
             normalized_path = file_res.destination_path.replace('\\', '/')
-            resource.set('href', normalized_path)
-            SubElement(resource, 'file').set('href', normalized_path)
-        
-        # Serialize to string without pretty printing first
-        rough_string = tostring(manifest, encoding='utf-8')
-        
-        # Parse and pretty print, ensuring proper formatting
-        dom = minidom.parseString(rough_string)
-        
-        # Custom serialization to match Canvas format
-        xml_str = dom.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
-        
-        # Fix empty LearningModules item to use open/close tags instead of self-closing
-        # Canvas expects <item identifier="LearningModules"></item> not <item ... />
-        xml_str = xml_str.replace(
-            '<item identifier="LearningModules"/>',
-            '<item identifier="LearningModules">\n      </item>'
-        )
-        
-        # Fix manifest tag attribute order to match Canvas exports exactly
-        # Canvas puts identifier first, then xmlns attributes
-        import re
-        manifest_pattern = r'<manifest ([^>]+)>'
-        manifest_match = re.search(manifest_pattern, xml_str)
-        if manifest_match:
-            # Rebuild manifest tag with correct attribute order
-            manifest_tag = f'<manifest identifier="{self.identifier}" xmlns="http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1" xmlns:lom="http://ltsc.ieee.org/xsd/imsccv1p1/LOM/resource" xmlns:lomimscc="http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1 http://www.imsglobal.org/profile/cc/ccv1p1/ccv1p1_imscp_v1p2_v1p0.xsd http://ltsc.ieee.org/xsd/imsccv1p1/LOM/resource http://www.imsglobal.org/profile/cc/ccv1p1/LOM/ccv1p1_lomresource_v1p0.xsd http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest http://www.imsglobal.org/profile/cc/ccv1p1/LOM/ccv1p1_lommanifest_v1p0.xsd">'
-            xml_str = xml_str.replace(manifest_match.group(0), manifest_tag)
-        
-        return xml_str
+            xml.start('resource', {
+                'identifier': file_res.identifier,
+                'type': 'webcontent',
+                'href': normalized_path
+            })
+            xml.element('file', attrib={'href': normalized_path})
+            xml.end()
+        
+        xml.end()  # resources
+        xml.end()  # manifest
     
-    def _generate_course_settings(self) -> str:
-        """Generate course_settings.xml content."""
-        course = Element('course')
-        course.set('identifier', self.identifier)
-        course.set('xmlns', 'http://canvas.instructure.com/xsd/cccv1p0')
-        course.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        course.set('xsi:schemaLocation', 
-                  'http://canvas.instructure.com/xsd/cccv1p0 '
-                  'https://canvas.instructure.com/xsd/cccv1p0.xsd')
-        
-        SubElement(course, 'title').text = self.title
-        SubElement(course, 'course_code').text = self.course_code
-        SubElement(course, 'start_at')
-        SubElement(course, 'conclude_at')
-        SubElement(course, 'is_public').text = 'false'
-        SubElement(course, 'is_public_to_auth_users').text = 'false'
-        SubElement(course, 'allow_student_wiki_edits').text = 'false'
-        SubElement(course, 'allow_student_forum_attachments').text = 'false'
-        SubElement(course, 'lock_all_announcements').text = 'false'
-        SubElement(course, 'default_wiki_editing_roles').text = 'teachers'
-        SubElement(course, 'allow_student_organized_groups').text = 'false'
-        SubElement(course, 'default_view').text = self.default_view
-        SubElement(course, 'open_enrollment').text = 'false'
-        SubElement(course, 'filter_speed_grader_by_student_group').text = 'true'
-        SubElement(course, 'self_enrollment').text = 'false'
-        SubElement(course, 'license').text = self.license
-        SubElement(course, 'indexed').text = 'false'
-        SubElement(course, 'hide_final_grade').text = 'false'
-        SubElement(course, 'hide_distribution_graphs').text = 'false'
-        SubElement(course, 'allow_student_discussion_topics').text = 'false'
-        SubElement(course, 'allow_student_discussion_editing').text = 'false'
-        SubElement(course, 'show_announcements_on_home_page').text = 'false'
-        SubElement(course, 'home_page_announcement_limit').text = '3'
-        SubElement(course, 'usage_rights_required').text = 'false'
-        SubElement(course, 'restrict_student_future_view').text = 'true'
-        SubElement(course, 'restrict_student_past_view').text = 'false'
-        SubElement(course, 'restrict_enrollments_to_course_dates').text = 'false'
-        SubElement(course, 'homeroom_course').text = 'false'
-        SubElement(course, 'horizon_course').text = 'false'
-        SubElement(course, 'conditional_release').text = 'false'
-        SubElement(course, 'content_library').text = 'false'
-        SubElement(course, 'grading_standard_enabled').text = 'false'
-        SubElement(course, 'storage_quota').text = '5000000000'
-        SubElement(course, 'overridden_course_visibility')
-        SubElement(course, 'root_account_uuid').text = generate_identifier('')  # Empty identifier for UUID
-        
-        default_post_policy = SubElement(course, 'default_post_policy')
-        SubElement(default_post_policy, 'post_manually').text = 'false'
-        
-        SubElement(course, 'enable_course_paces').text = 'false'
-        
-        rough_string = tostring(course, encoding='utf-8')
-        reparsed = minidom.parseString(rough_string)
-        xml_str = reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
-        
-        # Fix course tag attribute order to match Canvas (identifier first)
-        import re
-        course_pattern = r'<course ([^>]+)>'
-        course_match = re.search(course_pattern, xml_str)
-        if course_match:
-            course_tag = f'<course identifier="{self.identifier}" xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd">'
-            xml_str = xml_str.replace(course_match.group(0), course_tag)
-        
-        return xml_str
+    def _write_course_settings(self, xml: XMLWriter) -> None:
+        """Write course_settings.xml content."""
+        xml.declaration()
+        
+        # Canvas puts identifier first
+        xml.start('course', {
+            'identifier': self.identifier,
+            'xmlns': 'http://canvas.instructure.com/xsd/cccv1p0',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+            'xsi:schemaLocation': 
+                'http://canvas.instructure.com/xsd/cccv1p0 '
+                'https://canvas.instructure.com/xsd/cccv1p0.xsd'
+        })
+        
+        xml.element('title', self.title)
+        xml.element('course_code', self.course_code)
+        xml.element('start_at')
+        xml.element('conclude_at')
+        xml.element('is_public', 'false')
+        xml.element('is_public_to_auth_users', 'false')
+        xml.element('allow_student_wiki_edits', 'false')
+        xml.element('allow_student_forum_attachments', 'false')
+        xml.element('lock_all_announcements', 'false')
+        xml.element('default_wiki_editing_roles', 'teachers')
+        xml.element('allow_student_organized_groups', 'false')
+        xml.element('default_view', self.default_view)
+        xml.element('open_enrollment', 'false')
+        xml.element('filter_speed_grader_by_student_group', 'true')
+        xml.element('self_enrollment', 'false')
+        xml.element('license', self.license)
+        xml.element('indexed', 'false')
+        xml.element('hide_final_grade', 'false')
+        xml.element('hide_distribution_graphs', 'false')
+        xml.element('allow_student_discussion_topics', 'false')
+        xml.element('allow_student_discussion_editing', 'false')
+        xml.element('show_announcements_on_home_page', 'false')
+        xml.element('home_page_announcement_limit', '3')
+        xml.element('usage_rights_required', 'false')
+        xml.element('restrict_student_future_view', 'true')
+        xml.element('restrict_student_past_view', 'false')
+        xml.element('restrict_enrollments_to_course_dates', 'false')
+        xml.element('homeroom_course', 'false')
+        xml.element('horizon_course', 'false')
+        xml.element('conditional_release', 'false')
+        xml.element('content_library', 'false')
+        xml.element('grading_standard_enabled', 'false')
+        xml.element('storage_quota', '5000000000')
+        xml.element('overridden_course_visibility')
+        xml.element('root_account_uuid', self.root_account_uuid)
+        
+        xml.start('default_post_policy')
+        xml.element('post_manually', 'false')
+        xml.end()
+        
+        xml.element('enable_course_paces', 'false')
+        xml.end()
     
-    def _generate_module_meta(self) -> str:
-        """Generate module_meta.xml content."""
-        modules_elem = Element('modules')
-        modules_elem.set('xmlns', 'http://canvas.instructure.com/xsd/cccv1p0')
-        modules_elem.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        modules_elem.set('xsi:schemaLocation',
-                        'http://canvas.instructure.com/xsd/cccv1p0 '
-                        'https://canvas.instructure.com/xsd/cccv1p0.xsd')
+    def _write_module_meta(self, xml: XMLWriter) -> None:
+        """Write module_meta.xml content."""
+        xml.declaration()
+        xml.start('modules', {
+            'xmlns': 'http://canvas.instructure.com/xsd/cccv1p0',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+            'xsi:schemaLocation':
+                'http://canvas.instructure.com/xsd/cccv1p0 '
+                'https://canvas.instructure.com/xsd/cccv1p0.xsd'
+        })
         
         for module in self.modules:
-            module_elem = SubElement(modules_elem, 'module')
-            module_elem.set('identifier', module.identifier)
+            xml.start('module', {'identifier': module.identifier})
             
-            SubElement(module_elem, 'title').text = module.title
-            SubElement(module_elem, 'workflow_state').text = module.workflow_state
-            SubElement(module_elem, 'position').text = str(module.position)
-            SubElement(module_elem, 'require_sequential_progress').text = str(module.require_sequential_progress).lower()
-            SubElement(module_elem, 'locked').text = str(module.locked).lower()
+            xml.element('title', module.title)
+            xml.element('workflow_state', module.workflow_state)
+            xml.element('position', str(module.position))
+            xml.element('require_sequential_progress', str(module.require_sequential_progress).lower())
+            xml.element('locked', str(module.locked).lower())
             
-            items_elem = SubElement(module_elem, 'items')
+            xml.start('items')
             
             for item in module.items:
-                item_elem = SubElement(items_elem, 'item')
-                item_elem.set('identifier', item.identifier)
+                xml.start('item', {'identifier': item.identifier})
                 
-                SubElement(item_elem, 'content_type').text = item.content_type
-                SubElement(item_elem, 'workflow_state').text = item.workflow_state
-                SubElement(item_elem, 'title').text = item.title
-                SubElement(item_elem, 'identifierref').text = item.identifierref
-                SubElement(item_elem, 'position').text = str(item.position)
-                SubElement(item_elem, 'new_tab')
-                SubElement(item_elem, 'indent').text = str(item.indent)
-                SubElement(item_elem, 'link_settings_json').text = 'null'
-        
-        rough_string = tostring(modules_elem, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+                xml.element('content_type', item.content_type)
+                xml.element('workflow_state', item.workflow_state)
+                xml.element('title', item.title)
+                xml.element('identifierref', item.identifierref)
+                xml.element('position', str(item.position))
+                xml.element('new_tab')
+                xml.element('indent', str(item.indent))
+                xml.element('link_settings_json', 'null')
+                xml.end()
+            
+            xml.end()  # items
+            xml.end()  # module
+        
+        xml.end()
     
-    def _generate_assignment_groups(self) -> str:
-        """Generate assignment_groups.xml content."""
-        groups_elem = Element('assignmentGroups')
-        groups_elem.set('xmlns', 'http://canvas.instructure.com/xsd/cccv1p0')
-        groups_elem.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        groups_elem.set('xsi:schemaLocation',
-                       'http://canvas.instructure.com/xsd/cccv1p0 '
-                       'https://canvas.instructure.com/xsd/cccv1p0.xsd')
+    def _write_assignment_groups(self, xml: XMLWriter) -> None:
+        """Write assignment_groups.xml content."""
+        xml.declaration()
+        xml.start('assignmentGroups', {
+            'xmlns': 'http://canvas.instructure.com/xsd/cccv1p0',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+            'xsi:schemaLocation':
+                'http://canvas.instructure.com/xsd/cccv1p0 '
+                'https://canvas.instructure.com/xsd/cccv1p0.xsd'
+        })
         
         for group in self.assignment_groups:
-            groups_elem.append(group.to_xml())
+            xml.write_element(group.to_xml())
         
-        rough_string = tostring(groups_elem, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+        xml.end()
     
-    def _generate_rubrics(self) -> str:
-        """Generate rubrics.xml content."""
-        rubrics_elem = Element('rubrics')
-        rubrics_elem.set('xmlns', 'http://canvas.instructure.com/xsd/cccv1p0')
-        rubrics_elem.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        rubrics_elem.set('xsi:schemaLocation',
-                        'http://canvas.instructure.com/xsd/cccv1p0 '
-                        'https://canvas.instructure.com/xsd/cccv1p0.xsd')
+    def _write_rubrics(self, xml: XMLWriter) -> None:
+        """Write rubrics.xml content."""
+        xml.declaration()
+        xml.start('rubrics', {
+            'xmlns': 'http://canvas.instructure.com/xsd/cccv1p0',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+            'xsi:schemaLocation':
+                'http://canvas.instructure.com/xsd/cccv1p0 '
+                'https://canvas.instructure.com/xsd/cccv1p0.xsd'
+        })
         
         for rubric in self.rubrics:
-            rubrics_elem.append(rubric.to_xml())
+            xml.write_element(rubric.to_xml())
         
-        rough_string = tostring(rubrics_elem, encoding='unicode')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+        xml.end()
+    
+    def _write_files_meta(self, xml: XMLWriter) -> None:
+        """Write files_meta.xml content with the folder structure."""
+        xml.declaration()
+        xml.start('fileMeta', {
+            'xmlns': 'http://canvas.instructure.com/xsd/cccv1p0',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+            'xsi:schemaLocation':
+                'http://canvas.instructure.com/xsd/cccv1p0 '
+                'https://canvas.instructure.com/xsd/cccv1p0.xsd'
+        })
+        
+        # Extract unique folder paths from file resources
+        folders = set()
+        for file_res in self.file_manager.files:
+            # Get directory path from destination_path
+            dest_path = Path(file_res.destination_path)
+            if len(dest_path.parts) > 1:  # Has subdirectories
+                # Add all parent folders (excluding the file itself)
+                for i in range(1, len(dest_path.parts) - 1):
+                    folder_path = '/'.join(dest_path.parts[1:i+1])
+                    folders.add(folder_path)
+        
+        # Write folder definitions if any exist
+        if folders:
+            xml.start('folders')
+            for folder in sorted(folders):
+                xml.start('folder', {'path': folder})
+                xml.element('hidden', 'false')
+                xml.end()
+            xml.end()
+        
+        xml.end(short_empty=False)
+    
+    def _write_context(self, xml: XMLWriter) -> None:
+        """Write context.xml content."""
+        xml.declaration()
+        xml.start('context_info', {
+            'xmlns': 'http://canvas.instructure.com/xsd/cccv1p0',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+            'xsi:schemaLocation':
+                'http://canvas.instructure.com/xsd/cccv1p0 '
+                'https://canvas.instructure.com/xsd/cccv1p0.xsd'
+        })
+        xml.element('course_name', self.title)
+        xml.end()
     
-    def export(self, output_path: str) -> None:
+    def _write_media_tracks(self, xml: XMLWriter) -> None:
+        """Write media_tracks.xml content."""
+        xml.declaration()
+        xml.element('media_tracks', attrib={
+            'xmlns': 'http://canvas.instructure.com/xsd/cccv1p0',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+            'xsi:schemaLocation':
+                'http://canvas.instructure.com/xsd/cccv1p0 '
+                'https://canvas.instructure.com/xsd/cccv1p0.xsd'
+        })
+    
+    def export(
+        self,
+        output_path: str,
+        workers: Optional[int] = None,
+        compression: Optional[CompressionPolicy] = None,
+        base: Optional[str] = None,
+        dedup: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress: Optional[ProgressCallback] = None,
+        cache: Optional[BuildCache] = None,
+        verify_digests: bool = False
+    ) -> None:
         """
         Export the course as an IMSCC file.
         
+        Every generated document is written straight into the ZIP archive as
+        it is produced, and file resources are streamed from their original
+        paths, so no staging directory is needed.
+        
         Args:
             output_path: Path for the output .imscc file
+            workers: Number of worker processes used to serialize quizzes and
+                assignments (None or 1 serializes in this process). Results
+                are always written in course order, so the output is the
+                same as a serial export.
+            compression: Per-member compression policy. The default policy
+                stores already-compressed media (PDF, images, video, ZIP)
+                with ZIP_STORED and deflates everything else.
+            base: Path to a previous export of this course. Members whose
+                CRC-32 and size match the base's central directory are
+                copied from it as compressed bytes; only changed members
+                are deflated. May be the same path as output_path. The
+                source file of each member is recorded in output_path +
+                DIGESTS_SUFFIX, so the next export with this package as its
+                base does not read files whose mtime and size are unchanged.
+            dedup: Store files with identical content once. References to
+                the removed copies in pages and assignment descriptions are
+                rewritten to the copy that is kept.
+            chunk_size: Bytes read from each file at a time, which bounds
+                memory use for large media. ZIP64 is used automatically for
+                files over 4 GiB.
+            progress: Called as files are written with
+                progress(arcname, member_done, member_total, archive_done,
+                archive_total); archive totals cover all files in the course
+            cache: BuildCache to reuse serialized quizzes and assignments
+                from. Entries are keyed by the object's full state,
+                identifiers included, so they are reused when identifiers
+                are stable, e.g. in a reproducible_build() or
+                stable_identifiers() block.
+            verify_digests: Record the SHA-256 of every member in output_path
+                + DIGESTS_SUFFIX, and only reuse base members whose
+                recorded SHA-256 matches, so nothing is reused from a base
+                exported without this option
         """
-        # Create temporary directory for building the package
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Create directory structure
-            ensure_dir(os.path.join(temp_dir, 'course_settings'))
-            ensure_dir(os.path.join(temp_dir, 'wiki_content'))
-            ensure_dir(os.path.join(temp_dir, 'non_cc_assessments'))
-            
-            # Write manifest
-            manifest_path = os.path.join(temp_dir, 'imsmanifest.xml')
-            with open(manifest_path, 'w', encoding='utf-8') as f:
-                f.write(self._generate_manifest())
-            
-            # Write course settings
-            settings_path = os.path.join(temp_dir, 'course_settings', 'course_settings.xml')
-            with open(settings_path, 'w', encoding='utf-8') as f:
-                f.write(self._generate_course_settings())
-            
-            # Write files_meta.xml with folder structure
-            files_meta_path = os.path.join(temp_dir, 'course_settings', 'files_meta.xml')
-            with open(files_meta_path, 'w', encoding='utf-8') as f:
-                f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-                f.write('<fileMeta xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd">\n')
-                
-                # Extract unique folder paths from file resources
-                folders = set()
-                for file_res in self.file_manager.files:
-                    # Get directory path from destination_path
-                    dest_path = Path(file_res.destination_path)
-                    if len(dest_path.parts) > 1:  # Has subdirectories
-                        # Add all parent folders (excluding the file itself)
-                        for i in range(1, len(dest_path.parts) - 1):
-                            folder_path = '/'.join(dest_path.parts[1:i+1])
-                            folders.add(folder_path)
-                
-                # Write folder definitions if any exist
-                if folders:
-                    f.write('  <folders>\n')
-                    for folder in sorted(folders):
-                        f.write(f'    <folder path="{folder}">\n')
-                        f.write('      <hidden>false</hidden>\n')
-                        f.write('    </folder>\n')
-                    f.write('  </folders>\n')
-                
-                f.write('</fileMeta>\n')
-            
-            context_path = os.path.join(temp_dir, 'course_settings', 'context.xml')
-            with open(context_path, 'w', encoding='utf-8') as f:
-                f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-                f.write('<context_info xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd">\n')
-                f.write(f'  <course_name>{self.title}</course_name>\n')
-                f.write('</context_info>\n')
-            
-            media_tracks_path = os.path.join(temp_dir, 'course_settings', 'media_tracks.xml')
-            with open(media_tracks_path, 'w', encoding='utf-8') as f:
-                f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-                f.write('<media_tracks xmlns="http://canvas.instructure.com/xsd/cccv1p0" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd"/>\n')
-            
-            canvas_export_path = os.path.join(temp_dir, 'course_settings', 'canvas_export.txt')
-            with open(canvas_export_path, 'w', encoding='utf-8') as f:
-                # Canvas includes a joke in this file
-                f.write('Q: What did the canvas say to the students?\n')
-                f.write('A: I\'ve got you covered!')
-            
-            # Create non_cc_assessments directory (even if empty)
-            non_cc_dir = os.path.join(temp_dir, 'non_cc_assessments')
-            ensure_dir(non_cc_dir)
-            # Add .keep file so directory is included in ZIP
-            with open(os.path.join(non_cc_dir, '.keep'), 'w') as f:
-                f.write('')
-            
-            # Write module metadata if modules exist
-            if self.modules:
-                module_meta_path = os.path.join(temp_dir, 'course_settings', 'module_meta.xml')
-                with open(module_meta_path, 'w', encoding='utf-8') as f:
-                    f.write(self._generate_module_meta())
-            
-            # Write assignment groups if they exist
-            if self.assignment_groups:
-                assignment_groups_path = os.path.join(temp_dir, 'course_settings', 'assignment_groups.xml')
-                with open(assignment_groups_path, 'w', encoding='utf-8') as f:
-                    f.write(self._generate_assignment_groups())
-            
-            # Write rubrics if they exist
-            if self.rubrics:
-                rubrics_path = os.path.join(temp_dir, 'course_settings', 'rubrics.xml')
-                with open(rubrics_path, 'w', encoding='utf-8') as f:
-                    f.write(self._generate_rubrics())
-            
-            # Write assignments
+        if base is None:
+            self._discard_digests(output_path)
+            with open(output_path, 'wb') as f:
+                archive = self._export_stream(
+                    f, workers, compression, None, dedup, chunk_size, progress, cache,
+                    record_digests=verify_digests, verify_digests=verify_digests
+                )
+            if verify_digests:
+                write_digests(output_path, archive.digests)
+            print(f"✓ IMSCC package created: {output_path}")
+            return
+        
+        # Write next to the output and move into place, so base can be output_path
+        temp_path = f"{output_path}.partial"
+        try:
+            with open(temp_path, 'wb') as f:
+                archive = self._export_stream(
+                    f, workers, compression, base, dedup, chunk_size, progress, cache,
+                    record_digests=True, verify_digests=verify_digests
+                )
+            self._discard_digests(output_path)
+            os.replace(temp_path, output_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        write_digests(output_path, archive.digests)
+        
+        total = archive.members_written + archive.members_reused
+        print(f"✓ IMSCC package created: {output_path} "
+              f"({archive.members_reused} of {total} members reused from {base})")
+    
+    @staticmethod
+    def _discard_digests(output_path: str) -> None:
+        """Remove the digests of an earlier package at a path, which no longer describe it."""
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.fspath(output_path) + DIGESTS_SUFFIX)
+    
+    def export_to(
+        self,
+        fileobj: BinaryIO,
+        workers: Optional[int] = None,
+        compression: Optional[CompressionPolicy] = None,
+        base: Optional[str] = None,
+        dedup: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress: Optional[ProgressCallback] = None,
+        cache: Optional[BuildCache] = None,
+        verify_digests: bool = False
+    ) -> None:
+        """
+        Export the course as an IMSCC archive into a writable binary stream.
+        
+        The stream does not have to be seekable. When it is not (a pipe or
+        socket), each member's CRC and sizes are written in a data
+        descriptor after its data instead of being patched into its header,
+        so the package can be sent while it is generated. The stream is
+        left open.
+        
+        Args:
+            fileobj: Writable binary stream, e.g. an io.BytesIO, a socket
+                file or sys.stdout.buffer
+            workers: Number of worker processes, as for export()
+            compression: Per-member compression policy, as for export()
+            base: Path to a previous export to reuse members from, as for export()
+            dedup: Store files with identical content once, as for export()
+            chunk_size: Bytes read from each file at a time, as for export()
+            progress: File progress callback, as for export()
+            cache: BuildCache for quizzes and assignments, as for export()
+            verify_digests: Only reuse base members whose SHA-256 matches
+                the digests recorded next to the base, as for export()
+        """
+        self._export_stream(
+            fileobj, workers, compression, base, dedup, chunk_size, progress, cache,
+            verify_digests=verify_digests
+        )
+    
+    def _export_stream(
+        self,
+        fileobj: BinaryIO,
+        workers: Optional[int],
+        compression: Optional[CompressionPolicy],
+        base: Optional[str],
+        dedup: bool,
+        chunk_size: int,
+        progress: Optional[ProgressCallback],
+        cache: Optional[BuildCache] = None,
+        record_digests: bool = False,
+        verify_digests: bool = False
+    ) -> ArchiveWriter:
+        """
+        Write the package into a binary stream.
+        
+        Returns:
+            The ArchiveWriter used, for its member counts and digests
+        """
+        if dedup:
+            self.file_manager.deduplicate(cache.file_digest if cache is not None else hash_file)
+            print(f"✓ Deduplicated files: {len(self.file_manager.aliases)} duplicates, "
+                  f"{self.file_manager.bytes_saved:,} bytes saved")
+        
+        with contextlib.ExitStack() as stack:
+            base_file = stack.enter_context(open(base, 'rb')) if base is not None else None
+            zipf = stack.enter_context(ZipWriter(fileobj))
+            archive = ArchiveWriter(
+                zipf, compression, base=base_file, chunk_size=chunk_size, progress=progress,
+                base_digests=read_digests(base) if base is not None else None,
+                record_digests=record_digests, verify_digests=verify_digests
+            )
+            self._write_package(archive, workers=workers, cache=cache)
+        return archive
+    
+    def _write_package(
+        self,
+        archive: ArchiveWriter,
+        workers: Optional[int] = None,
+        cache: Optional[BuildCache] = None
+    ) -> None:
+        """
+        Write every member of the package into an archive.
+        
+        Args:
+            archive: ArchiveWriter for the package being exported
+            workers: Number of worker processes for quiz/assignment serialization
+            cache: BuildCache for serialized quizzes and assignments
+        """
+        # Write manifest and course settings
+        archive.write_xml('imsmanifest.xml', self._write_manifest)
+        archive.write_xml('course_settings/course_settings.xml', self._write_course_settings)
+        archive.write_xml('course_settings/files_meta.xml', self._write_files_meta)
+        archive.write_xml('course_settings/context.xml', self._write_context)
+        archive.write_xml('course_settings/media_tracks.xml', self._write_media_tracks)
+        # Canvas includes a joke in this file
+        archive.write_text(
+            'course_settings/canvas_export.txt',
+            'Q: What did the canvas say to the students?\n'
+            'A: I\'ve got you covered!'
+        )
+        
+        # Add .keep file so non_cc_assessments is present even if empty
+        archive.write_text('non_cc_assessments/.keep', '')
+        
+        # Write module metadata if modules exist
+        if self.modules:
+            archive.write_xml('course_settings/module_meta.xml', self._write_module_meta)
+        
+        # Write assignment groups if they exist
+        if self.assignment_groups:
+            archive.write_xml('course_settings/assignment_groups.xml', self._write_assignment_groups)
+        
+        # Write rubrics if they exist
+        if self.rubrics:
+            archive.write_xml('course_settings/rubrics.xml', self._write_rubrics)
+        
+        # Point references to deduplicated files at the copy that is kept
+        rewrite = self.file_manager.rewrite_references
+        
+        # Write assignments and quizzes. Quizzes with question sources are
+        # never serialized to one string: they are always streamed from here
+        buffered_quizzes = [quiz for quiz in self.quizzes if not quiz.question_sources]
+        if cache is not None:
+            self._write_serialized(
+                archive,
+                self._cached_documents(cache, 'assignment', self.assignments, _serialize_assignment, workers),
+                self._cached_documents(cache, 'quiz', buffered_quizzes, _serialize_quiz, workers)
+            )
+        elif workers and workers > 1 and len(self.assignments) + len(buffered_quizzes) > 1:
+            self._write_serialized_in_parallel(archive, workers, buffered_quizzes)
+        else:
             for assignment in self.assignments:
-                # Create assignment directory
-                assignment_dir = os.path.join(temp_dir, assignment.identifier)
-                ensure_dir(assignment_dir)
-                
-                # Write assignment HTML
-                html_path = os.path.join(assignment_dir, 'assignment.html')
-                with open(html_path, 'w', encoding='utf-8') as f:
-                    f.write(assignment.get_html_content())
-                
-                # Write assignment settings XML
-                settings_path = os.path.join(assignment_dir, 'assignment_settings.xml')
-                with open(settings_path, 'w', encoding='utf-8') as f:
-                    f.write(assignment.to_xml())
+                archive.write_text(
+                    f'{assignment.identifier}/assignment.html',
+                    rewrite(assignment.get_html_content())
+                )
+                archive.write_xml(f'{assignment.identifier}/assignment_settings.xml', assignment.write_xml)
             
-            # Write quizzes
             for quiz in self.quizzes:
-                # Create quiz directory
-                quiz_dir = os.path.join(temp_dir, quiz.identifier)
-                ensure_dir(quiz_dir)
-                
-                # Write assessment_meta.xml
-                meta_path = os.path.join(quiz_dir, 'assessment_meta.xml')
-                with open(meta_path, 'w', encoding='utf-8') as f:
-                    f.write(quiz.to_assessment_meta_xml())
-                
-                # Write assessment_qti.xml (shell)
-                qti_path = os.path.join(quiz_dir, 'assessment_qti.xml')
-                with open(qti_path, 'w', encoding='utf-8') as f:
-                    f.write(quiz.to_assessment_qti_xml())
-                
-                # Write full QTI XML to non_cc_assessments
-                qti_full_path = os.path.join(temp_dir, 'non_cc_assessments', f'{quiz.identifier}.xml.qti')
-                with open(qti_full_path, 'w', encoding='utf-8') as f:
-                    f.write(quiz.to_qti_xml())
-            
-            # Write wiki pages
-            for page in self.pages:
-                page_path = os.path.join(temp_dir, 'wiki_content', page.filename)
-                with open(page_path, 'w', encoding='utf-8') as f:
-                    f.write(page.to_html())
-            
-            # Copy files
-            self.file_manager.copy_all(temp_dir)
-            
-            # Create ZIP file
-            with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, temp_dir)
-                        zipf.write(file_path, arcname)
-        
-        print(f"✓ IMSCC package created: {output_path}")
+                self._write_quiz(archive, quiz)
+        
+        # Write wiki pages
+        for page in self.pages:
+            archive.write_text(f'wiki_content/{page.filename}', rewrite(page.to_html()))
+        
+        # Stream files from their original locations
+        self.file_manager.write_all(archive)
+    
+    def _write_quiz(self, archive: ArchiveWriter, quiz: 'Quiz') -> None:
+        """Stream a quiz's documents into the archive as they are generated."""
+        archive.write_xml(f'{quiz.identifier}/assessment_meta.xml', quiz.write_assessment_meta_xml)
+        # assessment_qti.xml is the QTI shell; the full QTI goes to non_cc_assessments
+        archive.write_xml(f'{quiz.identifier}/assessment_qti.xml', quiz.write_assessment_qti_xml)
+        archive.write_xml(f'non_cc_assessments/{quiz.identifier}.xml.qti', quiz.write_qti_xml)
+    
+    def _write_serialized_in_parallel(
+        self,
+        archive: ArchiveWriter,
+        workers: int,
+        quizzes: Sequence['Quiz']
+    ) -> None:
+        """
+        Serialize assignments and quizzes in a process pool and write the results.
+        
+        Executor.map yields results in submission order, so members are
+        always written in course order.
+        
+        Args:
+            archive: ArchiveWriter for the package being exported
+            workers: Number of worker processes
+            quizzes: Quizzes to serialize, those without question sources
+        """
+        with _worker_pool(workers) as executor:
+            assignment_docs = executor.map(
+                _serialize_assignment, self.assignments,
+                chunksize=_chunksize(len(self.assignments), workers)
+            )
+            quiz_docs = executor.map(
+                _serialize_quiz, quizzes,
+                chunksize=_chunksize(len(quizzes), workers)
+            )
+            self._write_serialized(archive, assignment_docs, quiz_docs)
+    
+    def _cached_documents(
+        self,
+        cache: BuildCache,
+        kind: str,
+        objects: Sequence,
+        serialize: Callable,
+        workers: Optional[int]
+    ) -> List[Tuple[str, ...]]:
+        """
+        Serialize quizzes or assignments, reusing documents from a build cache.
+        
+        Each object is keyed by canonical_state(), its public attributes and
+        properties in a fixed order, which covers everything its documents
+        are generated from. Objects that miss are serialized, in a process
+        pool if workers > 1, and stored.
+        
+        Args:
+            cache: BuildCache to read and fill
+            kind: Cache entry kind ('assignment' or 'quiz')
+            objects: Objects to serialize
+            serialize: _serialize_assignment or _serialize_quiz
+            workers: Number of worker processes
+        
+        Returns:
+            The documents of each object, in order
+        """
+        keys = [cache.key(kind, canonical_state(obj)) for obj in objects]
+        documents = []
+        for key in keys:
+            cached = cache.get(kind, key)
+            documents.append(tuple(json.loads(cached)) if cached is not None else None)
+        
+        pending = [i for i, docs in enumerate(documents) if docs is None]
+        if workers and workers > 1 and len(pending) > 1:
+            with _worker_pool(workers) as executor:
+                serialized = list(executor.map(
+                    serialize, [objects[i] for i in pending],
+                    chunksize=_chunksize(len(pending), workers)
+                ))
+        else:
+            serialized = [serialize(objects[i]) for i in pending]
+        
+        for i, docs in zip(pending, serialized):
+            documents[i] = docs
+            cache.put(kind, keys[i], json.dumps(docs))
+        return documents
+    
+    def _write_serialized(self, archive: ArchiveWriter, assignment_docs, quiz_docs) -> None:
+        """
+        Write serialized assignments and quizzes in course order.
+        
+        Quizzes with question sources have no documents; they are streamed
+        in their place.
+        
+        Args:
+            archive: ArchiveWriter for the package being exported
+            assignment_docs: (html, settings_xml) for each assignment
+            quiz_docs: (meta_xml, shell_xml, qti_xml) for each quiz
+                without question sources
+        """
+        for assignment, (html, settings_xml) in zip(self.assignments, assignment_docs):
+            archive.write_text(
+                f'{assignment.identifier}/assignment.html',
+                self.file_manager.rewrite_references(html)
+            )
+            archive.write_text(f'{assignment.identifier}/assignment_settings.xml', settings_xml)
+        
+        quiz_docs = iter(quiz_docs)
+        for quiz in self.quizzes:
+            if quiz.question_sources:
+                self._write_quiz(archive, quiz)
+                continue
+            meta_xml, shell_xml, qti_xml = next(quiz_docs)
+            archive.write_text(f'{quiz.identifier}/assessment_meta.xml', meta_xml)
+            archive.write_text(f'{quiz.identifier}/assessment_qti.xml', shell_xml)
+            archive.write_text(f'non_cc_assessments/{quiz.identifier}.xml.qti', qti_xml)
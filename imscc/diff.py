@@ -0,0 +1,203 @@
+"""Comparison of IMSCC packages from their ZIP central directories."""
+
+import difflib
+import zipfile
+from typing import Dict, List, Optional, Tuple
+
+from .reader import (
+    ArchiveAssignment, ArchiveFile, ArchivePage, ArchiveQuiz,
+    ArchiveResource, ImsccArchive
+)
+
+
+# Largest member, in bytes, content_diff() inflates to compare as text
+CONTENT_DIFF_LIMIT = 16 * 1024 * 1024
+
+# Bytes sniffed for a NUL byte to tell binary members from text
+BINARY_SNIFF_SIZE = 8000
+
+# Kind of object reported for each resource class
+OBJECT_KINDS = {
+    ArchivePage: 'page',
+    ArchiveQuiz: 'quiz',
+    ArchiveAssignment: 'assignment',
+    ArchiveFile: 'file',
+}
+
+
+class MemberChange:
+    """A member that was added, removed or changed between two archives."""
+    
+    def __init__(
+        self,
+        name: str,
+        status: str,
+        old: Optional[zipfile.ZipInfo],
+        new: Optional[zipfile.ZipInfo],
+        resource: Optional[ArchiveResource] = None
+    ):
+        """
+        Create a member change. ArchiveDiff creates these.
+        
+        Args:
+            name: Member name
+            status: 'added', 'removed' or 'changed'
+            old: Central directory entry in the old archive, if any
+            new: Central directory entry in the new archive, if any
+            resource: Object the member belongs to, if the manifest declares it
+        """
+        self.name = name
+        self.status = status
+        self.old = old
+        self.new = new
+        self.resource = resource
+    
+    def __repr__(self) -> str:
+        return f"MemberChange({self.name!r}, {self.status!r})"
+    
+    @property
+    def kind(self) -> str:
+        """Get the kind of object changed: page, quiz, assignment, file or other."""
+        return OBJECT_KINDS.get(type(self.resource), 'other')
+    
+    @property
+    def identifier(self) -> Optional[str]:
+        """Get the manifest identifier of the object changed."""
+        return self.resource.identifier if self.resource is not None else None
+
+
+class ArchiveDiff:
+    """
+    Differences between two IMSCC packages.
+    
+    Members are compared by the CRC-32 and size recorded in the ZIP central
+    directory, so nothing is decompressed to find what changed; only
+    content_diff() inflates members, and only those that changed. Changed
+    members are mapped to the page, quiz, assignment or file they belong
+    to through each archive's manifest index.
+    
+    Example:
+        with ImsccArchive('old.imscc') as old, ImsccArchive('new.imscc') as new:
+            for (kind, identifier), changes in ArchiveDiff(old, new).by_object().items():
+                print(kind, identifier, [c.name for c in changes])
+    """
+    
+    def __init__(self, old: ImsccArchive, new: ImsccArchive):
+        """
+        Compare two archives.
+        
+        Args:
+            old: Archive compared from
+            new: Archive compared to
+        """
+        self.old = old
+        self.new = new
+        self.changes: List[MemberChange] = []
+        self.unchanged = 0
+        
+        old_members = _file_members(old)
+        new_members = _file_members(new)
+        for name, old_info in old_members.items():
+            new_info = new_members.get(name)
+            if new_info is None:
+                self.changes.append(MemberChange(
+                    name, 'removed', old_info, None, _owner(old, name)
+                ))
+            elif old_info.CRC != new_info.CRC or old_info.file_size != new_info.file_size:
+                self.changes.append(MemberChange(
+                    name, 'changed', old_info, new_info,
+                    _owner(new, name) or _owner(old, name)
+                ))
+            else:
+                self.unchanged += 1
+        for name, new_info in new_members.items():
+            if name not in old_members:
+                self.changes.append(MemberChange(
+                    name, 'added', None, new_info, _owner(new, name)
+                ))
+    
+    def __bool__(self) -> bool:
+        return bool(self.changes)
+    
+    def counts(self) -> Dict[str, int]:
+        """Count changed members by status, plus 'unchanged'."""
+        counts = {'changed': 0, 'added': 0, 'removed': 0}
+        for change in self.changes:
+            counts[change.status] += 1
+        counts['unchanged'] = self.unchanged
+        return counts
+    
+    def by_object(self) -> Dict[Tuple[str, Optional[str]], List[MemberChange]]:
+        """
+        Group the changes by the object they belong to.
+        
+        Returns:
+            (kind, identifier) → changes, in member order; members the
+            manifest does not declare are grouped under ('other', None)
+        """
+        groups: Dict[Tuple[str, Optional[str]], List[MemberChange]] = {}
+        for change in sorted(self.changes, key=lambda c: c.name):
+            groups.setdefault((change.kind, change.identifier), []).append(change)
+        return groups
+    
+    def content_diff(
+        self,
+        change: MemberChange,
+        context_lines: int = 3,
+        max_size: int = CONTENT_DIFF_LIMIT
+    ) -> List[str]:
+        """
+        Get a unified diff of a changed member, inflating it from both archives.
+        
+        Members larger than max_size are not inflated, and binary members
+        are recognised from their first bytes, so only changed text members
+        are ever read in full.
+        
+        Args:
+            change: A change with status 'changed'
+            context_lines: Lines of context around each difference
+            max_size: Largest uncompressed size to diff as text
+        
+        Returns:
+            Lines of the unified diff, or a single line saying why the
+            member is not diffed as text
+        """
+        if max(change.old.file_size, change.new.file_size) > max_size:
+            return [f"Member {change.name} differs (too large to diff)\n"]
+        if _is_binary(self.old, change.name) or _is_binary(self.new, change.name):
+            return [f"Binary member {change.name} differs\n"]
+        
+        try:
+            old_text = self.old.read(change.name).decode('utf-8')
+            new_text = self.new.read(change.name).decode('utf-8')
+        except UnicodeDecodeError:
+            return [f"Binary member {change.name} differs\n"]
+        return list(difflib.unified_diff(
+            old_text.splitlines(keepends=True),
+            new_text.splitlines(keepends=True),
+            f"a/{change.name}", f"b/{change.name}",
+            n=context_lines
+        ))
+
+
+def _file_members(archive: ImsccArchive) -> Dict[str, zipfile.ZipInfo]:
+    """Map file member names to their central directory entries."""
+    return {
+        info.filename: info for info in archive.infolist()
+        if not info.is_dir()
+    }
+
+
+def _is_binary(archive: ImsccArchive, name: str) -> bool:
+    """Check for a NUL byte at the start of a member, inflating only that much."""
+    with archive.open(name) as member:
+        return b'\0' in member.read(BINARY_SNIFF_SIZE)
+
+
+def _owner(archive: ImsccArchive, name: str) -> Optional[ArchiveResource]:
+    """Get the object a member belongs to, if the archive has a manifest."""
+    try:
+        return archive.index.owner(name)
+    except KeyError:
+        # No imsmanifest.xml; members cannot be mapped to objects
+        return None
@@ -0,0 +1,122 @@
+"""Single-pass link rewriting for converting links in page HTML."""
+
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+
+Replacement = Union[str, Callable[[re.Match, Dict[str, Any]], Optional[str]]]
+
+
+class LinkRule:
+    """A link pattern and how matches of it are rewritten."""
+    
+    def __init__(self, name: str, pattern: str, replacement: Replacement):
+        """
+        Create a link rule.
+        
+        Args:
+            name: Name the rule's hits are counted under
+            pattern: Regular expression for the link. Numbered groups are
+                available to the replacement; named groups must be unique
+                across the rules of a rewriter, and backreferences must
+                use them, e.g. (?P=quote), since numbers shift once the
+                rules are combined.
+            replacement: Template string expanded with the match (e.g.
+                r'href="$IMS-CC-FILEBASE$/\\1"'), or a function called with
+                the match and the rewrite context that returns the new text,
+                or None to leave the match unchanged
+        """
+        self.name = name
+        self.pattern = pattern
+        self.regex = re.compile(pattern)
+        self.replacement = replacement
+    
+    def apply(self, match: re.Match, context: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the replacement text for a match of this rule.
+        
+        Args:
+            match: Match of this rule's pattern
+            context: Context passed to LinkRewriter.rewrite()
+        
+        Returns:
+            Replacement text, or None to leave the match unchanged
+        """
+        if callable(self.replacement):
+            return self.replacement(match, context)
+        return match.expand(self.replacement)
+
+
+class LinkRewriter:
+    """
+    Rewrites links with a set of rules in a single pass over the document.
+    
+    All rule patterns are compiled into one alternation, so each document
+    is scanned once and each match is dispatched to the rule whose pattern
+    matched. Where several rules match at the same position, the rule
+    added first wins. Hits are counted per rule name.
+    """
+    
+    def __init__(self, rules: Iterable[LinkRule] = ()):
+        """
+        Create a link rewriter.
+        
+        Args:
+            rules: Rules in priority order
+        """
+        self.rules = list(rules)
+        self.hits: Counter = Counter()
+        self._compile()
+    
+    def add_rule(self, rule: LinkRule) -> "LinkRewriter":
+        """Add a rule with lower priority than the existing ones."""
+        self.rules.append(rule)
+        self._compile()
+        return self
+    
+    def rewrite(self, text: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Rewrite every link in a document that matches a rule.
+        
+        Args:
+            text: Document content
+            context: Values passed to replacement functions, e.g. a map of
+                page filenames to slugs
+        
+        Returns:
+            The rewritten document
+        """
+        if not self.rules:
+            return text
+        context = context or {}
+        
+        def dispatch(match):
+            rule = self._rules_by_group[match.lastgroup]
+            # Re-match the rule alone so its groups are numbered from 1. No
+            # endpos: it would hide the text a lookahead needs to see.
+            rule_match = rule.regex.match(text, match.start())
+            if rule_match is None or rule_match.end() != match.end():
+                raise ValueError(
+                    f"Link rule {rule.name!r} matched differently on its own than in "
+                    f"the combined pattern at offset {match.start()}; rule patterns "
+                    f"cannot use numbered backreferences"
+                )
+            replacement = rule.apply(rule_match, context)
+            if replacement is None:
+                return match.group(0)
+            self.hits[rule.name] += 1
+            return replacement
+        
+        return self._scanner.sub(dispatch, text)
+    
+    def reset_hits(self) -> None:
+        """Reset the hit counters."""
+        self.hits.clear()
+    
+    def _compile(self) -> None:
+        """Compile the rules into a single alternation."""
+        self._rules_by_group = {f'_rule{i}': rule for i, rule in enumerate(self.rules)}
+        self._scanner = re.compile('|'.join(
+            f'(?P<{group}>{rule.pattern})' for group, rule in self._rules_by_group.items()
+        ))
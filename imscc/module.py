@@ -27,7 +27,7 @@ class ModuleItem:
             indent: Indentation level (0 = no indent)
             workflow_state: State (active, unpublished, etc.)
         """
-        self.identifier = identifier or generate_identifier()
+        self.identifier = identifier or generate_identifier(key=f"module_item:{identifierref}")
         self.title = title
         self.content_type = content_type
         self.identifierref = identifierref
@@ -58,7 +58,7 @@ class Module:
             locked: Whether module is locked
         """
         self.title = title
-        self.identifier = identifier or generate_identifier()
+        self.identifier = identifier or generate_identifier(key=f"module:{title}")
         self.workflow_state = workflow_state
         self.require_sequential_progress = require_sequential_progress
         self.locked = locked
@@ -1,11 +1,10 @@
 """Quiz classes for Canvas quizzes with QTI question support."""
 
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterable, Iterator
 from datetime import datetime
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom import minidom
-from .utils import generate_identifier
-import uuid
+from xml.etree.ElementTree import Element, SubElement
+from .utils import generate_identifier, generate_uuid
+from .xml_writer import XMLWriter, xml_to_string
 
 
 
@@ -28,12 +27,15 @@ class QuizQuestion:
         """
         self.question_text = question_text
         self.points_possible = points_possible
-        self.identifier = identifier or self._generate_question_id()
+        self.identifier = identifier or self._generate_question_id(f"question:{question_text}")
+        self.assessment_question_identifier = self._generate_question_id(
+            f"{self.identifier}/assessment_question"
+        )
         self.question_type = "question"  # Override in subclasses
         
-    def _generate_question_id(self) -> str:
+    def _generate_question_id(self, key: Optional[str] = None) -> str:
         """Generate a unique question identifier."""
-        return uuid.uuid4().hex
+        return generate_uuid(key).hex
     
     def to_qti_item(self) -> Element:
         """Generate QTI item element. Must be implemented by subclasses."""
@@ -70,7 +72,7 @@ class MultipleChoiceQuestion(QuizQuestion):
         # Generate UUIDs for each answer
         for answer in self.answers:
             if 'id' not in answer:
-                answer['id'] = str(uuid.uuid4())
+                answer['id'] = str(generate_uuid(f"{self.identifier}/answer"))
     
     def to_qti_item(self) -> Element:
         """Generate QTI item XML for multiple choice question."""
@@ -161,8 +163,8 @@ class TrueFalseQuestion(QuizQuestion):
         super().__init__(question_text, points_possible, identifier)
         self.correct_answer = correct_answer
         self.question_type = "true_false_question"
-        self.true_id = str(uuid.uuid4())
-        self.false_id = str(uuid.uuid4())
+        self.true_id = str(generate_uuid(f"{self.identifier}/true"))
+        self.false_id = str(generate_uuid(f"{self.identifier}/false"))
     
     def to_qti_item(self) -> Element:
         """Generate QTI item XML for true/false question."""
@@ -244,7 +246,7 @@ class FillInBlankQuestion(QuizQuestion):
             ('question_type', self.question_type),
             ('points_possible', str(self.points_possible)),
             ('original_answer_ids', ','.join(str(i) for i in range(len(self.answers)))),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.assessment_question_identifier)
         ]
         
         for label, entry in metadata_fields:
@@ -299,7 +301,7 @@ class FillInMultipleBlanksQuestion(QuizQuestion):
         metadata_fields = [
             ('question_type', self.question_type),
             ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.assessment_question_identifier)
         ]
         
         for label, entry in metadata_fields:
@@ -360,7 +362,7 @@ class MultipleAnswersQuestion(QuizQuestion):
             ('question_type', self.question_type),
             ('points_possible', str(self.points_possible)),
             ('original_answer_ids', ','.join(answer_ids)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.assessment_question_identifier)
         ]
         
         for label, entry in metadata_fields:
@@ -427,7 +429,7 @@ class MultipleDropdownsQuestion(QuizQuestion):
         metadata_fields = [
             ('question_type', self.question_type),
             ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.assessment_question_identifier)
         ]
         
         for label, entry in metadata_fields:
@@ -495,7 +497,7 @@ class MatchingQuestion(QuizQuestion):
         metadata_fields = [
             ('question_type', self.question_type),
             ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.assessment_question_identifier)
         ]
         
         for label, entry in metadata_fields:
@@ -571,7 +573,7 @@ class NumericalAnswerQuestion(QuizQuestion):
         metadata_fields = [
             ('question_type', self.question_type),
             ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.assessment_question_identifier)
         ]
         
         for label, entry in metadata_fields:
@@ -645,7 +647,7 @@ class FormulaQuestion(QuizQuestion):
         metadata_fields = [
             ('question_type', self.question_type),
             ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.assessment_question_identifier)
         ]
         
         for label, entry in metadata_fields:
@@ -658,6 +660,10 @@ class FormulaQuestion(QuizQuestion):
         SubElement(qtimetadatafield, 'fieldlabel').text = 'formula_question_formula'
         SubElement(qtimetadatafield, 'fieldentry').text = self.formula
         
+        qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
+        SubElement(qtimetadatafield, 'fieldlabel').text = 'formula_question_tolerance'
+        SubElement(qtimetadatafield, 'fieldentry').text = str(self.tolerance)
+        
         for var_name, (min_val, max_val) in self.variables.items():
             qtimetadatafield = SubElement(qtimetadata, 'qtimetadatafield')
             SubElement(qtimetadatafield, 'fieldlabel').text = f'formula_variable_{var_name}_min'
@@ -703,7 +709,7 @@ class EssayQuestion(QuizQuestion):
         metadata_fields = [
             ('question_type', self.question_type),
             ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.assessment_question_identifier)
         ]
         
         for label, entry in metadata_fields:
@@ -747,7 +753,7 @@ class FileUploadQuestion(QuizQuestion):
         metadata_fields = [
             ('question_type', self.question_type),
             ('points_possible', str(self.points_possible)),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.assessment_question_identifier)
         ]
         
         for label, entry in metadata_fields:
@@ -791,7 +797,7 @@ class TextOnlyQuestion(QuizQuestion):
         metadata_fields = [
             ('question_type', self.question_type),
             ('points_possible', '0.0'),
-            ('assessment_question_identifierref', self._generate_question_id())
+            ('assessment_question_identifierref', self.assessment_question_identifier)
         ]
         
         for label, entry in metadata_fields:
@@ -808,6 +814,46 @@ class TextOnlyQuestion(QuizQuestion):
         return item
 
 
+class QuestionSource:
+    """
+    Questions created on demand from a re-readable source, such as a JSON Lines bank.
+    
+    Each iteration calls the factory for a fresh iterator, and a question
+    is only alive while it is written, so the memory a quiz needs does not
+    depend on the size of its bank.
+    """
+    
+    def __init__(
+        self,
+        factory: Callable[[], Iterable[QuizQuestion]],
+        count: int,
+        points_possible: float,
+        content_hash: str = ""
+    ):
+        """
+        Create a question source.
+        
+        Args:
+            factory: Called with no arguments for a new iterable of the
+                questions. Must be picklable (e.g. a functools.partial of a
+                module-level function) for parallel or cached exports.
+            count: Number of questions the factory yields
+            points_possible: Total points of the questions
+            content_hash: Digest of the source content, so that caches keyed
+                by a quiz's state see when the source changes
+        """
+        self.factory = factory
+        self.count = count
+        self.points_possible = points_possible
+        self.content_hash = content_hash
+    
+    def __iter__(self) -> Iterator[QuizQuestion]:
+        return iter(self.factory())
+    
+    def __len__(self) -> int:
+        return self.count
+
+
 class Quiz:
     """Represents a Canvas quiz."""
     
@@ -856,7 +902,9 @@ class Quiz:
         self.title = title
         self.description = description
         self.quiz_type = quiz_type
-        self.identifier = identifier or generate_identifier()
+        self.identifier = identifier or generate_identifier(key=f"quiz:{title}")
+        self.assignment_identifier = generate_identifier(key=f"{self.identifier}/assignment")
+        self.meta_identifier = generate_identifier('i', key=f"{self.identifier}/meta")
         self._points_possible = points_possible
         self.allowed_attempts = allowed_attempts
         self.scoring_policy = scoring_policy
@@ -871,6 +919,7 @@ class Quiz:
         self.cant_go_back = cant_go_back
         
         self.questions: List[QuizQuestion] = []
+        self.question_sources: List[QuestionSource] = []
         self.assignment_group_identifierref: Optional[str] = None
         
         # Additional properties
@@ -894,7 +943,13 @@ class Quiz:
         """Calculate total points from questions if not explicitly set."""
         if self._points_possible is not None:
             return self._points_possible
-        return sum(q.points_possible for q in self.questions)
+        return (sum(q.points_possible for q in self.questions)
+                + sum(source.points_possible for source in self.question_sources))
+    
+    @property
+    def question_count(self) -> int:
+        """Number of questions, including those of question sources."""
+        return len(self.questions) + sum(len(source) for source in self.question_sources)
     
     def add_question(self, question: QuizQuestion) -> 'Quiz':
         """Add a question to the quiz.
@@ -908,151 +963,184 @@ class Quiz:
         self.questions.append(question)
         return self
     
+    def add_question_source(self, source: QuestionSource) -> 'Quiz':
+        """Add questions that are created one at a time while the quiz is written.
+        
+        They follow the questions added with add_question().
+        
+        Args:
+            source: QuestionSource instance
+        
+        Returns:
+            Self for method chaining
+        """
+        self.question_sources.append(source)
+        return self
+    
+    def iter_questions(self) -> Iterator[QuizQuestion]:
+        """Iterate over all questions, creating those of question sources on demand."""
+        yield from self.questions
+        for source in self.question_sources:
+            yield from source
+    
     def to_assessment_meta_xml(self) -> str:
         """Generate assessment_meta.xml content."""
-        quiz_elem = Element('quiz')
-        quiz_elem.set('xmlns', 'http://canvas.instructure.com/xsd/cccv1p0')
-        quiz_elem.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        quiz_elem.set('xsi:schemaLocation', 'http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd')
-        quiz_elem.set('identifier', self.identifier)
-        
-        SubElement(quiz_elem, 'title').text = self.title
-        SubElement(quiz_elem, 'description').text = self.description
-        SubElement(quiz_elem, 'due_at').text = self.due_at
-        SubElement(quiz_elem, 'lock_at').text = self.lock_at
-        SubElement(quiz_elem, 'unlock_at').text = self.unlock_at
-        SubElement(quiz_elem, 'shuffle_questions').text = str(self.shuffle_questions).lower()
-        SubElement(quiz_elem, 'shuffle_answers').text = str(self.shuffle_answers).lower()
-        SubElement(quiz_elem, 'calculator_type').text = self.calculator_type
-        SubElement(quiz_elem, 'scoring_policy').text = self.scoring_policy
-        SubElement(quiz_elem, 'hide_results').text = self.hide_results
-        SubElement(quiz_elem, 'quiz_type').text = self.quiz_type
-        SubElement(quiz_elem, 'points_possible').text = str(self.points_possible)
-        SubElement(quiz_elem, 'require_lockdown_browser').text = str(self.require_lockdown_browser).lower()
-        SubElement(quiz_elem, 'require_lockdown_browser_for_results').text = 'false'
-        SubElement(quiz_elem, 'require_lockdown_browser_monitor').text = 'false'
-        SubElement(quiz_elem, 'lockdown_browser_monitor_data')
-        SubElement(quiz_elem, 'show_correct_answers').text = str(self.show_correct_answers).lower()
-        SubElement(quiz_elem, 'anonymous_submissions').text = str(self.anonymous_submissions).lower()
-        SubElement(quiz_elem, 'could_be_locked').text = str(self.could_be_locked).lower()
-        SubElement(quiz_elem, 'disable_timer_autosubmission').text = 'false'
-        SubElement(quiz_elem, 'allowed_attempts').text = str(self.allowed_attempts)
-        SubElement(quiz_elem, 'build_on_last_attempt').text = 'false'
-        SubElement(quiz_elem, 'one_question_at_a_time').text = str(self.one_question_at_a_time).lower()
-        SubElement(quiz_elem, 'cant_go_back').text = str(self.cant_go_back).lower()
-        SubElement(quiz_elem, 'available').text = 'false'
-        SubElement(quiz_elem, 'one_time_results').text = 'false'
-        SubElement(quiz_elem, 'show_correct_answers_last_attempt').text = 'false'
-        SubElement(quiz_elem, 'only_visible_to_overrides').text = 'false'
-        SubElement(quiz_elem, 'module_locked').text = 'false'
-        SubElement(quiz_elem, 'allow_clear_mc_selection')
-        SubElement(quiz_elem, 'disable_document_access').text = 'false'
-        SubElement(quiz_elem, 'result_view_restricted').text = 'false'
+        return xml_to_string(self.write_assessment_meta_xml)
+    
+    def write_assessment_meta_xml(self, xml: XMLWriter) -> None:
+        """Write assessment_meta.xml content."""
+        xml.declaration()
+        xml.start('quiz', {
+            'xmlns': 'http://canvas.instructure.com/xsd/cccv1p0',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+            'xsi:schemaLocation': 'http://canvas.instructure.com/xsd/cccv1p0 https://canvas.instructure.com/xsd/cccv1p0.xsd',
+            'identifier': self.identifier
+        })
+        
+        xml.element('title', self.title)
+        xml.element('description', self.description)
+        xml.element('due_at', self.due_at)
+        xml.element('lock_at', self.lock_at)
+        xml.element('unlock_at', self.unlock_at)
+        xml.element('shuffle_questions', str(self.shuffle_questions).lower())
+        xml.element('shuffle_answers', str(self.shuffle_answers).lower())
+        xml.element('calculator_type', self.calculator_type)
+        xml.element('scoring_policy', self.scoring_policy)
+        xml.element('hide_results', self.hide_results)
+        xml.element('quiz_type', self.quiz_type)
+        xml.element('points_possible', str(self.points_possible))
+        xml.element('require_lockdown_browser', str(self.require_lockdown_browser).lower())
+        xml.element('require_lockdown_browser_for_results', 'false')
+        xml.element('require_lockdown_browser_monitor', 'false')
+        xml.element('lockdown_browser_monitor_data')
+        xml.element('show_correct_answers', str(self.show_correct_answers).lower())
+        xml.element('anonymous_submissions', str(self.anonymous_submissions).lower())
+        xml.element('could_be_locked', str(self.could_be_locked).lower())
+        xml.element('disable_timer_autosubmission', 'false')
+        xml.element('allowed_attempts', str(self.allowed_attempts))
+        xml.element('build_on_last_attempt', 'false')
+        xml.element('one_question_at_a_time', str(self.one_question_at_a_time).lower())
+        xml.element('cant_go_back', str(self.cant_go_back).lower())
+        xml.element('available', 'false')
+        xml.element('one_time_results', 'false')
+        xml.element('show_correct_answers_last_attempt', 'false')
+        xml.element('only_visible_to_overrides', 'false')
+        xml.element('module_locked', 'false')
+        xml.element('allow_clear_mc_selection')
+        xml.element('disable_document_access', 'false')
+        xml.element('result_view_restricted', 'false')
         
         # Embedded assignment
-        assignment = SubElement(quiz_elem, 'assignment', identifier=generate_identifier())
-        SubElement(assignment, 'title').text = self.title
-        SubElement(assignment, 'due_at').text = self.due_at
-        SubElement(assignment, 'lock_at').text = self.lock_at
-        SubElement(assignment, 'unlock_at').text = self.unlock_at
-        SubElement(assignment, 'module_locked').text = 'false'
-        SubElement(assignment, 'workflow_state').text = self.workflow_state
-        SubElement(assignment, 'assignment_overrides')
-        SubElement(assignment, 'assignment_overrides')
-        SubElement(assignment, 'quiz_identifierref').text = self.identifier
-        SubElement(assignment, 'allowed_extensions')
-        SubElement(assignment, 'has_group_category').text = 'false'
-        SubElement(assignment, 'points_possible').text = str(self.points_possible)
-        SubElement(assignment, 'grading_type').text = 'points'
-        SubElement(assignment, 'all_day').text = 'false'
-        SubElement(assignment, 'submission_types').text = 'online_quiz'
-        SubElement(assignment, 'position').text = '1'
-        SubElement(assignment, 'turnitin_enabled').text = 'false'
-        SubElement(assignment, 'vericite_enabled').text = 'false'
-        SubElement(assignment, 'peer_review_count').text = '0'
-        SubElement(assignment, 'peer_reviews').text = 'false'
-        SubElement(assignment, 'automatic_peer_reviews').text = 'false'
-        SubElement(assignment, 'anonymous_peer_reviews').text = 'false'
-        SubElement(assignment, 'grade_group_students_individually').text = 'false'
-        SubElement(assignment, 'freeze_on_copy').text = 'false'
-        SubElement(assignment, 'omit_from_final_grade').text = 'false'
-        SubElement(assignment, 'intra_group_peer_reviews').text = 'false'
-        SubElement(assignment, 'only_visible_to_overrides').text = 'false'
-        SubElement(assignment, 'post_to_sis').text = 'false'
-        SubElement(assignment, 'moderated_grading').text = 'false'
-        SubElement(assignment, 'grader_count').text = '0'
-        SubElement(assignment, 'grader_comments_visible_to_graders').text = 'true'
-        SubElement(assignment, 'anonymous_grading').text = 'false'
-        SubElement(assignment, 'graders_anonymous_to_graders').text = 'false'
-        SubElement(assignment, 'grader_names_visible_to_final_grader').text = 'true'
-        SubElement(assignment, 'anonymous_instructor_annotations').text = 'false'
-        
-        post_policy = SubElement(assignment, 'post_policy')
-        SubElement(post_policy, 'post_manually').text = 'false'
+        xml.start('assignment', {'identifier': self.assignment_identifier})
+        xml.element('title', self.title)
+        xml.element('due_at', self.due_at)
+        xml.element('lock_at', self.lock_at)
+        xml.element('unlock_at', self.unlock_at)
+        xml.element('module_locked', 'false')
+        xml.element('workflow_state', self.workflow_state)
+        xml.element('assignment_overrides')
+        xml.element('assignment_overrides')
+        xml.element('quiz_identifierref', self.identifier)
+        xml.element('allowed_extensions')
+        xml.element('has_group_category', 'false')
+        xml.element('points_possible', str(self.points_possible))
+        xml.element('grading_type', 'points')
+        xml.element('all_day', 'false')
+        xml.element('submission_types', 'online_quiz')
+        xml.element('position', '1')
+        xml.element('turnitin_enabled', 'false')
+        xml.element('vericite_enabled', 'false')
+        xml.element('peer_review_count', '0')
+        xml.element('peer_reviews', 'false')
+        xml.element('automatic_peer_reviews', 'false')
+        xml.element('anonymous_peer_reviews', 'false')
+        xml.element('grade_group_students_individually', 'false')
+        xml.element('freeze_on_copy', 'false')
+        xml.element('omit_from_final_grade', 'false')
+        xml.element('intra_group_peer_reviews', 'false')
+        xml.element('only_visible_to_overrides', 'false')
+        xml.element('post_to_sis', 'false')
+        xml.element('moderated_grading', 'false')
+        xml.element('grader_count', '0')
+        xml.element('grader_comments_visible_to_graders', 'true')
+        xml.element('anonymous_grading', 'false')
+        xml.element('graders_anonymous_to_graders', 'false')
+        xml.element('grader_names_visible_to_final_grader', 'true')
+        xml.element('anonymous_instructor_annotations', 'false')
+        
+        xml.start('post_policy')
+        xml.element('post_manually', 'false')
+        xml.end()
         
         if self.assignment_group_identifierref:
-            SubElement(assignment, 'assignment_group_identifierref').text = self.assignment_group_identifierref
+            xml.element('assignment_group_identifierref', self.assignment_group_identifierref)
         
-        SubElement(assignment, 'assignment_overrides')
-        
-        rough_string = tostring(quiz_elem, encoding='UTF-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+        xml.element('assignment_overrides')
+        xml.end()  # assignment
+        xml.end()  # quiz
     
     def to_assessment_qti_xml(self) -> str:
         """Generate assessment_qti.xml (QTI shell/reference file)."""
-        root = Element('questestinterop')
-        root.set('xmlns', 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2')
-        root.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        root.set('xsi:schemaLocation', 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2 http://www.imsglobal.org/profile/cc/ccv1p1/ccv1p1_qtiasiv1p2p1_v1p0.xsd')
-        
-        assessment = SubElement(root, 'assessment', ident=self.identifier, title="Question")
-        
-        qtimetadata = SubElement(assessment, 'qtimetadata')
-        
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'cc_profile'
-        SubElement(field, 'fieldentry').text = 'cc.exam.v0p1'
-        
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'qmd_assessmenttype'
-        SubElement(field, 'fieldentry').text = 'Examination'
-        
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'qmd_scoretype'
-        SubElement(field, 'fieldentry').text = 'Percentage'
-        
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'cc_maxattempts'
-        SubElement(field, 'fieldentry').text = str(self.allowed_attempts)
-        
-        SubElement(assessment, 'section', ident='root_section')
-        
-        rough_string = tostring(root, encoding='UTF-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+        return xml_to_string(self.write_assessment_qti_xml)
+    
+    def write_assessment_qti_xml(self, xml: XMLWriter) -> None:
+        """Write assessment_qti.xml (QTI shell/reference file)."""
+        xml.declaration()
+        xml.start('questestinterop', {
+            'xmlns': 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+            'xsi:schemaLocation': 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2 http://www.imsglobal.org/profile/cc/ccv1p1/ccv1p1_qtiasiv1p2p1_v1p0.xsd'
+        })
+        xml.start('assessment', {'ident': self.identifier, 'title': "Question"})
+        
+        xml.start('qtimetadata')
+        self._write_metadata_field(xml, 'cc_profile', 'cc.exam.v0p1')
+        self._write_metadata_field(xml, 'qmd_assessmenttype', 'Examination')
+        self._write_metadata_field(xml, 'qmd_scoretype', 'Percentage')
+        self._write_metadata_field(xml, 'cc_maxattempts', str(self.allowed_attempts))
+        xml.end()
+        
+        xml.element('section', attrib={'ident': 'root_section'})
+        xml.end()  # assessment
+        xml.end()  # questestinterop
     
     def to_qti_xml(self) -> str:
         """Generate full QTI XML with all questions."""
-        root = Element('questestinterop')
-        root.set('xmlns', 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2')
-        root.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
-        root.set('xsi:schemaLocation', 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2 http://www.imsglobal.org/xsd/ims_qtiasiv1p2p1.xsd')
+        return xml_to_string(self.write_qti_xml)
+    
+    def write_qti_xml(self, xml: XMLWriter) -> None:
+        """
+        Write full QTI XML with all questions.
         
-        assessment = SubElement(root, 'assessment', ident=self.identifier, title="Question")
+        Each question's item is built and written on its own, so the whole
+        question bank is never held as one element tree, and questions of
+        question sources are only created as they are written.
+        """
+        xml.declaration()
+        xml.start('questestinterop', {
+            'xmlns': 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance',
+            'xsi:schemaLocation': 'http://www.imsglobal.org/xsd/ims_qtiasiv1p2 http://www.imsglobal.org/xsd/ims_qtiasiv1p2p1.xsd'
+        })
+        xml.start('assessment', {'ident': self.identifier, 'title': "Question"})
         
         # Add metadata
-        qtimetadata = SubElement(assessment, 'qtimetadata')
-        field = SubElement(qtimetadata, 'qtimetadatafield')
-        SubElement(field, 'fieldlabel').text = 'cc_maxattempts'
-        SubElement(field, 'fieldentry').text = str(self.allowed_attempts)
+        xml.start('qtimetadata')
+        self._write_metadata_field(xml, 'cc_maxattempts', str(self.allowed_attempts))
+        xml.end()
         
         # Add section with questions
-        section = SubElement(assessment, 'section', ident='root_section')
-        
-        for question in self.questions:
-            section.append(question.to_qti_item())
-        
-        rough_string = tostring(root, encoding='UTF-8')
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent="  ", encoding='UTF-8').decode('utf-8')
+        xml.start('section', {'ident': 'root_section'})
+        for question in self.iter_questions():
+            xml.write_element(question.to_qti_item())
+        xml.end()  # section
+        xml.end()  # assessment
+        xml.end()  # questestinterop
+    
+    @staticmethod
+    def _write_metadata_field(xml: XMLWriter, label: str, entry: str) -> None:
+        """Write a qtimetadatafield with its label and entry."""
+        xml.start('qtimetadatafield')
+        xml.element('fieldlabel', label)
+        xml.element('fieldentry', entry)
+        xml.end()
@@ -0,0 +1,617 @@
+"""Lazy random-access reading of IMSCC packages."""
+
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from pathlib import PurePosixPath
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from .utils import slugify
+
+
+# XML namespaces used in imsmanifest.xml
+MANIFEST_NAMESPACE = 'http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1'
+LOM_MANIFEST_NAMESPACE = 'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest'
+
+# Resource types written by Course and by Canvas exports
+WEBCONTENT = 'webcontent'
+ASSESSMENT = 'imsqti_xmlv1p2/imscc_xmlv1p1/assessment'
+LEARNING_APPLICATION_RESOURCE = 'associatedcontent/imscc_xmlv1p1/learning-application-resource'
+
+_RESOURCE = f'{{{MANIFEST_NAMESPACE}}}resource'
+_FILE = f'{{{MANIFEST_NAMESPACE}}}file'
+_DEPENDENCY = f'{{{MANIFEST_NAMESPACE}}}dependency'
+
+# Path of the course title within the manifest
+_TITLE_PATH = (
+    f'.//{{{LOM_MANIFEST_NAMESPACE}}}general'
+    f'/{{{LOM_MANIFEST_NAMESPACE}}}title'
+    f'/{{{LOM_MANIFEST_NAMESPACE}}}string'
+)
+
+# Matches the <title> and identifier <meta> tags of a wiki page
+PAGE_TITLE = re.compile(r'<title>([^<]+)</title>', re.IGNORECASE)
+PAGE_IDENTIFIER = re.compile(r'<meta\s+name="identifier"\s+content="([^"]+)"', re.IGNORECASE)
+
+
+def _local_name(tag: str) -> str:
+    """Strip the namespace from an element tag."""
+    return tag.rpartition('}')[2]
+
+
+class ArchiveResource:
+    """A resource declared in imsmanifest.xml, read from the archive on demand."""
+    
+    def __init__(
+        self,
+        archive: "ImsccArchive",
+        identifier: str,
+        type: str,
+        href: Optional[str] = None,
+        files: Optional[List[str]] = None,
+        dependencies: Optional[List[str]] = None
+    ):
+        """
+        Create a resource. ImsccArchive creates these from the manifest.
+        
+        Args:
+            archive: Archive the resource's members are read from
+            identifier: Resource identifier
+            type: Resource type, e.g. 'webcontent'
+            href: Main member of the resource, if any
+            files: Members belonging to the resource
+            dependencies: Identifiers of resources this one depends on
+        """
+        self.archive = archive
+        self.identifier = identifier
+        self.type = type
+        self.href = href
+        self.files = files or []
+        self.dependencies = dependencies or []
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.identifier!r}, href={self.href!r})"
+    
+    def member(self, suffix: str) -> Optional[str]:
+        """Get the first member of the resource whose name ends with suffix."""
+        for name in self.files:
+            if name.endswith(suffix):
+                return name
+        return None
+    
+    def open(self, name: Optional[str] = None) -> IO[bytes]:
+        """
+        Open a member of the resource for streaming.
+        
+        Args:
+            name: Member name (default: the resource's href)
+        """
+        return self.archive.open(name or self.href)
+    
+    def read(self, name: Optional[str] = None) -> bytes:
+        """Read a member of the resource (default: the resource's href)."""
+        return self.archive.read(name or self.href)
+    
+    def read_text(self, name: Optional[str] = None) -> str:
+        """Read a member of the resource as UTF-8 text."""
+        return self.read(name).decode('utf-8')
+
+
+class ArchivePage(ArchiveResource):
+    """A wiki page; its HTML is read the first time it is needed."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._html: Optional[str] = None
+    
+    @property
+    def filename(self) -> str:
+        """Get the page's filename without the .html extension."""
+        return PurePosixPath(self.href).stem
+    
+    @property
+    def html(self) -> str:
+        """Get the page's HTML, reading it on first access."""
+        if self._html is None:
+            self._html = self.read_text()
+        return self._html
+    
+    @property
+    def title(self) -> str:
+        """Get the page title from its <title> tag, or else from its filename."""
+        match = PAGE_TITLE.search(self.html)
+        if match:
+            return match.group(1)
+        return self.filename.replace('-', ' ').title()
+    
+    @property
+    def slug(self) -> str:
+        """Get the Canvas slug of the page title."""
+        return slugify(self.title)
+    
+    @property
+    def canvas_identifier(self) -> Optional[str]:
+        """Get the Canvas identifier from the page's identifier <meta> tag."""
+        match = PAGE_IDENTIFIER.search(self.html)
+        return match.group(1) if match else None
+
+
+class ArchiveAssignment(ArchiveResource):
+    """An assignment: a description page and an assignment_settings.xml."""
+    
+    @property
+    def settings_path(self) -> Optional[str]:
+        """Get the member holding the assignment settings."""
+        return self.member('assignment_settings.xml')
+    
+    def open_settings(self) -> IO[bytes]:
+        """Open assignment_settings.xml for streaming."""
+        return self.open(self.settings_path)
+
+
+class ArchiveQuiz(ArchiveResource):
+    """A quiz, with its metadata and Canvas QTI in a dependent resource."""
+    
+    @property
+    def meta(self) -> Optional[ArchiveResource]:
+        """Get the resource holding assessment_meta.xml and the Canvas QTI."""
+        for identifier in self.dependencies:
+            resource = self.archive.index.get(identifier)
+            if resource is not None and resource.member('assessment_meta.xml'):
+                return resource
+        return None
+    
+    @property
+    def meta_path(self) -> Optional[str]:
+        """Get the member holding assessment_meta.xml."""
+        meta = self.meta
+        return meta.member('assessment_meta.xml') if meta else None
+    
+    @property
+    def qti_path(self) -> Optional[str]:
+        """Get the member holding the Canvas QTI (non_cc_assessments/*.xml.qti)."""
+        meta = self.meta
+        name = meta.member('.xml.qti') if meta else None
+        if name is None:
+            name = f'non_cc_assessments/{self.identifier}.xml.qti'
+        return name if self.archive.has_member(name) else None
+    
+    def open_meta(self) -> IO[bytes]:
+        """Open assessment_meta.xml for streaming."""
+        return self.open(self.meta_path)
+    
+    def open_qti(self) -> IO[bytes]:
+        """Open the Canvas QTI for streaming."""
+        return self.open(self.qti_path)
+    
+    def read_meta(self) -> Dict[str, str]:
+        """
+        Read the quiz settings from assessment_meta.xml.
+        
+        Returns:
+            Text of each top-level setting element by name, e.g.
+            {'title': ..., 'shuffle_answers': 'true'}; empty if there is no
+            assessment_meta.xml
+        """
+        if self.meta_path is None:
+            return {}
+        with self.open_meta() as meta_file:
+            root = ET.parse(meta_file).getroot()
+        # Skip elements with children, such as the embedded <assignment>
+        return {_local_name(elem.tag): elem.text or '' for elem in root if len(elem) == 0}
+    
+    def iter_items(self) -> Iterator[ET.Element]:
+        """
+        Stream the question items of the Canvas QTI.
+        
+        The QTI is parsed incrementally. Each <item> is yielded as soon as it
+        is complete, with namespaces removed from its tags, and is detached
+        from the document afterwards, so memory use does not depend on the
+        number of questions.
+        
+        Yields:
+            <item> elements in document order
+        """
+        if self.qti_path is None:
+            return
+        open_elements: List[ET.Element] = []
+        with self.open_qti() as qti_file:
+            for event, elem in ET.iterparse(qti_file, events=('start', 'end')):
+                if event == 'start':
+                    open_elements.append(elem)
+                    continue
+                open_elements.pop()
+                if _local_name(elem.tag) != 'item':
+                    continue
+                for child in elem.iter():
+                    child.tag = _local_name(child.tag)
+                yield elem
+                if open_elements:
+                    open_elements[-1].remove(elem)
+
+
+class ArchiveFile(ArchiveResource):
+    """A file resource such as an image or PDF in web_resources/."""
+    
+    @property
+    def path(self) -> str:
+        """Get the file's member name."""
+        return self.href
+    
+    @property
+    def size(self) -> int:
+        """Get the uncompressed size, from the central directory."""
+        return self.archive.getinfo(self.href).file_size
+
+
+class ManifestIndex:
+    """
+    Hash lookups over the resources of a manifest.
+    
+    Resources are indexed by identifier, by every member they contain and
+    by type when the index is built. Pages are also found by title, slug,
+    filename and Canvas identifier; those come from the page HTML, so that
+    table is built the first time it is needed.
+    """
+    
+    def __init__(self, resources: Iterable[ArchiveResource]):
+        """
+        Build an index.
+        
+        Args:
+            resources: Resources in manifest order
+        """
+        self._by_identifier: Dict[str, ArchiveResource] = {}
+        self._by_member: Dict[str, ArchiveResource] = {}
+        self._by_type: Dict[Union[str, type], List[ArchiveResource]] = defaultdict(list)
+        self._dependents: Dict[str, ArchiveResource] = {}
+        self._pages: Optional[Dict[str, ArchivePage]] = None
+        self._pages_by_title: Optional[Dict[str, ArchivePage]] = None
+        
+        for resource in resources:
+            self._by_identifier.setdefault(resource.identifier, resource)
+            for name in ([resource.href] if resource.href else []) + resource.files:
+                self._by_member.setdefault(name, resource)
+            self._by_type[resource.type].append(resource)
+            self._by_type[type(resource)].append(resource)
+            for identifier in resource.dependencies:
+                self._dependents.setdefault(identifier, resource)
+    
+    def __len__(self) -> int:
+        return len(self._by_identifier)
+    
+    def get(self, identifier: str) -> Optional[ArchiveResource]:
+        """Get a resource by identifier."""
+        return self._by_identifier.get(identifier)
+    
+    def by_href(self, name: str) -> Optional[ArchiveResource]:
+        """
+        Get the resource a member belongs to.
+        
+        Args:
+            name: Member name, e.g. 'web_resources/logo.png'
+        """
+        return self._by_member.get(name)
+    
+    def owner(self, name: str) -> Optional[ArchiveResource]:
+        """
+        Get the object a member belongs to.
+        
+        Like by_href(), except that members of a resource another resource
+        depends on, such as a quiz's assessment_meta.xml and Canvas QTI,
+        belong to the dependent resource (the quiz).
+        
+        Args:
+            name: Member name
+        """
+        resource = self._by_member.get(name)
+        if resource is None or type(resource) is not ArchiveResource:
+            return resource
+        return self._dependents.get(resource.identifier, resource)
+    
+    def of_type(self, resource_type: Union[str, type]) -> List[ArchiveResource]:
+        """
+        List resources of a type, in manifest order.
+        
+        Args:
+            resource_type: Manifest type such as 'webcontent', or a class
+                such as ArchivePage
+        """
+        return self._by_type.get(resource_type, [])
+    
+    def by_title(self, title: str) -> Optional[ArchivePage]:
+        """Get the first page with a title."""
+        self._index_pages()
+        return self._pages_by_title.get(title)
+    
+    def by_slug(self, slug: str) -> Optional[ArchivePage]:
+        """Get the first page whose title has a slug."""
+        self._index_pages()
+        return self._pages.get(slug)
+    
+    def page(self, key: str) -> Optional[ArchivePage]:
+        """
+        Resolve a page reference as found in Canvas links.
+        
+        Args:
+            key: Resource identifier, Canvas identifier, slug or filename
+                (without .html) of a page
+        """
+        resource = self._by_identifier.get(key)
+        if isinstance(resource, ArchivePage):
+            return resource
+        self._index_pages()
+        return self._pages.get(key)
+    
+    def _index_pages(self) -> None:
+        """Index pages by title, slug, filename and Canvas identifier, once."""
+        if self._pages is not None:
+            return
+        pages: Dict[str, ArchivePage] = {}
+        by_title: Dict[str, ArchivePage] = {}
+        for page in self.of_type(ArchivePage):
+            by_title.setdefault(page.title, page)
+            for key in (page.canvas_identifier, page.slug, page.filename):
+                if key:
+                    pages.setdefault(key, page)
+        self._pages = pages
+        self._pages_by_title = by_title
+
+
+class ImsccArchive:
+    """
+    Random-access reader for an IMSCC package.
+    
+    Opening an archive reads only the ZIP central directory, so listing the
+    members of a large export is cheap. imsmanifest.xml is parsed the first
+    time the identifier, title or resources are needed; resources are
+    exposed as lightweight objects, and the members behind them are
+    decompressed only when they are read.
+    
+    Example:
+        with ImsccArchive('course.imscc') as archive:
+            for page in archive.pages:
+                print(page.title, len(page.html))
+    """
+    
+    def __init__(self, file: Union[str, "os.PathLike", IO[bytes]]):
+        """
+        Open an IMSCC package.
+        
+        Args:
+            file: Path of the .imscc, or a seekable binary file object
+        
+        Raises:
+            zipfile.BadZipFile: If the file is not a ZIP archive
+        """
+        self._zip = zipfile.ZipFile(file, 'r')
+        self._identifier: Optional[str] = None
+        self._title: Optional[str] = None
+        self._resources: Optional[Dict[str, ArchiveResource]] = None
+        self._index: Optional[ManifestIndex] = None
+        self._course_settings: Optional[Dict[str, str]] = None
+        self._modules: Optional[List[Dict[str, Any]]] = None
+    
+    def __enter__(self) -> "ImsccArchive":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Close the underlying ZIP file."""
+        self._zip.close()
+    
+    # Members
+    
+    def namelist(self) -> List[str]:
+        """List every member name, from the central directory."""
+        return self._zip.namelist()
+    
+    def infolist(self) -> List[zipfile.ZipInfo]:
+        """List every member's central directory entry."""
+        return self._zip.infolist()
+    
+    def has_member(self, name: str) -> bool:
+        """Check whether the archive contains a member."""
+        return name in self._zip.NameToInfo
+    
+    def getinfo(self, name: str) -> zipfile.ZipInfo:
+        """Get a member's central directory entry."""
+        return self._zip.getinfo(name)
+    
+    def open(self, name: str) -> IO[bytes]:
+        """Open a member for streaming."""
+        return self._zip.open(name)
+    
+    def read(self, name: str) -> bytes:
+        """Read a member."""
+        return self._zip.read(name)
+    
+    def members(self, folder: str) -> Iterator[str]:
+        """
+        Iterate over the files in a folder of the archive, without reading them.
+        
+        Args:
+            folder: Folder inside the archive, e.g. 'web_resources'
+        
+        Yields:
+            Member names, skipping directory entries
+        """
+        prefix = f"{folder.rstrip('/')}/"
+        for name in self._zip.namelist():
+            if name.startswith(prefix) and not name.endswith('/'):
+                yield name
+    
+    # Manifest
+    
+    @property
+    def identifier(self) -> Optional[str]:
+        """Get the manifest identifier."""
+        self._load_manifest()
+        return self._identifier
+    
+    @property
+    def title(self) -> Optional[str]:
+        """Get the course title from the manifest metadata."""
+        self._load_manifest()
+        return self._title
+    
+    @property
+    def resources(self) -> Dict[str, ArchiveResource]:
+        """
+        Get every resource in the manifest by identifier, in manifest order.
+        
+        Raises:
+            KeyError: If the archive has no imsmanifest.xml
+        """
+        self._load_manifest()
+        return self._resources
+    
+    # Resources
+    
+    @property
+    def index(self) -> ManifestIndex:
+        """Get the index of the manifest's resources, built on first access."""
+        if self._index is None:
+            self._index = ManifestIndex(self.resources.values())
+        return self._index
+    
+    @property
+    def pages(self) -> List[ArchivePage]:
+        """Get the wiki page resources."""
+        return self.index.of_type(ArchivePage)
+    
+    @property
+    def assignments(self) -> List[ArchiveAssignment]:
+        """Get the assignment resources."""
+        return self.index.of_type(ArchiveAssignment)
+    
+    @property
+    def quizzes(self) -> List[ArchiveQuiz]:
+        """Get the quiz resources."""
+        return self.index.of_type(ArchiveQuiz)
+    
+    @property
+    def files(self) -> List[ArchiveFile]:
+        """Get the file resources (web_resources and other web content)."""
+        return self.index.of_type(ArchiveFile)
+    
+    # Course settings
+    
+    @property
+    def course_settings(self) -> Dict[str, str]:
+        """
+        Get the title, course_code, default_view and license from
+        course_settings/course_settings.xml, read on first access.
+        """
+        if self._course_settings is None:
+            self._course_settings = self._parse_course_settings()
+        return self._course_settings
+    
+    @property
+    def modules(self) -> List[Dict[str, Any]]:
+        """
+        Get the modules from course_settings/module_meta.xml, read on first access.
+        
+        Each module is a dict with 'title' and 'items'; each item a dict
+        with 'type', 'identifier' and 'title'.
+        """
+        if self._modules is None:
+            self._modules = self._parse_module_meta()
+        return self._modules
+    
+    def _resource_class(self, res_type: str, href: Optional[str], files: List[str]) -> type:
+        """Pick the class representing a manifest resource."""
+        if res_type == ASSESSMENT:
+            return ArchiveQuiz
+        if res_type == WEBCONTENT and href:
+            if href.startswith('wiki_content/') and href.endswith('.html'):
+                return ArchivePage
+            return ArchiveFile
+        if res_type == LEARNING_APPLICATION_RESOURCE:
+            if any(name.endswith('assignment_settings.xml') for name in files):
+                return ArchiveAssignment
+        return ArchiveResource
+    
+    def _load_manifest(self) -> None:
+        """Read the manifest identifier, title and resources, once."""
+        if self._resources is not None:
+            return
+        
+        with self._zip.open('imsmanifest.xml') as manifest_file:
+            root = ET.parse(manifest_file).getroot()
+        
+        self._identifier = root.get('identifier')
+        self._title = root.findtext(_TITLE_PATH)
+        
+        resources = {}
+        for elem in root.iter(_RESOURCE):
+            res_type = elem.get('type', '')
+            identifier = elem.get('identifier', '')
+            href = elem.get('href')
+            files = [f.get('href') for f in elem.iter(_FILE) if f.get('href')]
+            dependencies = [
+                d.get('identifierref') for d in elem.iter(_DEPENDENCY)
+                if d.get('identifierref')
+            ]
+            resource_class = self._resource_class(res_type, href, files)
+            resources[identifier] = resource_class(
+                self, identifier, res_type, href, files, dependencies
+            )
+        self._resources = resources
+    
+    def _parse_course_settings(self) -> Dict[str, str]:
+        """Parse course_settings.xml if it exists."""
+        try:
+            settings_file = self._zip.open('course_settings/course_settings.xml')
+        except KeyError:
+            return {}
+        
+        with settings_file:
+            root = ET.parse(settings_file).getroot()
+        
+        settings = {}
+        for elem in root:
+            # Canvas writes these elements in the cccv1p0 namespace
+            tag = _local_name(elem.tag)
+            if tag in ('title', 'course_code', 'default_view', 'license'):
+                settings[tag] = elem.text
+        return settings
+    
+    def _parse_module_meta(self) -> List[Dict[str, Any]]:
+        """Parse module_meta.xml if it exists."""
+        try:
+            module_file = self._zip.open('course_settings/module_meta.xml')
+        except KeyError:
+            return []
+        
+        with module_file:
+            root = ET.parse(module_file).getroot()
+        
+        # Canvas writes module_meta.xml in the cccv1p0 namespace
+        ns = {'cc': root.tag[1:].partition('}')[0]} if root.tag.startswith('{') else {}
+        tag = (lambda name: f'cc:{name}') if ns else (lambda name: name)
+        
+        modules = []
+        for module_elem in root.findall(tag('module'), ns):
+            module = {
+                'title': module_elem.get('identifier', 'Untitled Module'),
+                'items': []
+            }
+            
+            title = module_elem.findtext(tag('title'), None, ns)
+            if title:
+                module['title'] = title
+            
+            for item_elem in module_elem.findall(f"{tag('items')}/{tag('item')}", ns):
+                module['items'].append({
+                    'type': item_elem.findtext(tag('content_type'), 'WikiPage', ns),
+                    'identifier': item_elem.findtext(tag('identifierref'), '', ns),
+                    'title': item_elem.findtext(tag('title'), '', ns),
+                })
+            
+            modules.append(module)
+        return modules
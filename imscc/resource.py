@@ -1,12 +1,48 @@
 """Resource classes for files and web resources in IMSCC packages."""
 
+import hashlib
+import mmap
 import os
+import re
 import shutil
+from collections import defaultdict
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, Optional
+from urllib.parse import quote, unquote
 from .utils import generate_identifier
 
 
+# Matches the path of a $IMS-CC-FILEBASE$ reference in HTML
+FILEBASE_REFERENCE = re.compile(r'\$IMS-CC-FILEBASE\$/([^"\'<>?#]+)')
+
+
+def hash_file(filepath: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calculate the SHA-256 digest of a file.
+    
+    The file is memory-mapped and hashed in chunks, so large files are
+    never read into memory as a whole.
+    
+    Args:
+        filepath: Path to the file
+        chunk_size: Number of bytes passed to the hash at a time
+    
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            # Empty files cannot be memory-mapped
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                for offset in range(0, size, chunk_size):
+                    digest.update(view[offset:offset + chunk_size])
+    return digest.hexdigest()
+
+
 class FileResource:
     """Represents a file/web resource to be included in the IMSCC package."""
     
@@ -26,13 +62,14 @@ class FileResource:
             identifier: Unique identifier (auto-generated if not provided)
         """
         self.filepath = filepath
-        self.identifier = identifier or generate_identifier()
         
         if destination_path:
             self.destination_path = destination_path
         else:
             # Use just the filename
             self.destination_path = f"web_resources/{os.path.basename(filepath)}"
+        
+        self.identifier = identifier or generate_identifier(key=f"file:{self.destination_path}")
     
     @property
     def filename(self) -> str:
@@ -53,6 +90,16 @@ class FileResource:
         
         # Copy the file
         shutil.copy2(self.filepath, target_path)
+    
+    def write_to(self, archive: "ArchiveWriter") -> None:
+        """
+        Stream this file from its original path into an archive.
+        
+        Args:
+            archive: ArchiveWriter for the package being exported
+        """
+        # Normalize path to use forward slashes for cross-platform compatibility
+        archive.write_file(self.destination_path.replace('\\', '/'), self.filepath)
 
 
 class FileManager:
@@ -60,6 +107,9 @@ class FileManager:
     
     def __init__(self):
         self.files: list[FileResource] = []
+        # Destination paths of removed duplicates -> destination of the kept copy
+        self.aliases: Dict[str, str] = {}
+        self.bytes_saved = 0
     
     def add_file(
         self,
@@ -98,7 +148,8 @@ class FileManager:
         added_files = []
         dir_path = Path(directory)
         
-        for file_path in dir_path.rglob('*'):
+        # Sorted so the package layout does not depend on directory listing order
+        for file_path in sorted(dir_path.rglob('*')):
             if file_path.is_file():
                 # Calculate relative path
                 rel_path = file_path.relative_to(dir_path)
@@ -110,6 +161,69 @@ class FileManager:
         
         return added_files
     
+    def deduplicate(self, digest: Callable[[str], str] = hash_file) -> int:
+        """
+        Keep one copy of each set of files with identical content.
+        
+        Files are grouped by size first, so only files whose size matches
+        another file are hashed. The first file added with a given content
+        is kept; the others are removed from the package and their
+        destination paths recorded in aliases, so references to them can be
+        pointed at the kept copy with rewrite_references().
+        
+        Args:
+            digest: Function returning the content digest of a file path,
+                e.g. BuildCache.file_digest to reuse digests across courses
+        
+        Returns:
+            Number of bytes no longer written to the package
+        """
+        by_size = defaultdict(list)
+        for file_resource in self.files:
+            by_size[os.path.getsize(file_resource.filepath)].append(file_resource)
+        
+        duplicates = set()
+        saved = 0
+        for size, candidates in by_size.items():
+            if len(candidates) < 2:
+                continue
+            canonical: Dict[str, FileResource] = {}
+            for file_resource in candidates:
+                kept = canonical.setdefault(digest(file_resource.filepath), file_resource)
+                if kept is not file_resource:
+                    duplicate_path = file_resource.destination_path.replace('\\', '/')
+                    self.aliases[duplicate_path] = kept.destination_path.replace('\\', '/')
+                    duplicates.add(id(file_resource))
+                    saved += size
+        
+        if duplicates:
+            self.files = [f for f in self.files if id(f) not in duplicates]
+        self.bytes_saved += saved
+        return saved
+    
+    def rewrite_references(self, html: str) -> str:
+        """
+        Point $IMS-CC-FILEBASE$ references to removed duplicates at the kept copy.
+        
+        Args:
+            html: HTML content of a page or assignment description
+        
+        Returns:
+            HTML with references to duplicates rewritten
+        """
+        if not self.aliases or '$IMS-CC-FILEBASE$' not in html:
+            return html
+        
+        def replace(match):
+            path = match.group(1)
+            if path in self.aliases:
+                return f'$IMS-CC-FILEBASE$/{self.aliases[path]}'
+            if unquote(path) in self.aliases:
+                return f'$IMS-CC-FILEBASE$/{quote(self.aliases[unquote(path)])}'
+            return match.group(0)
+        
+        return FILEBASE_REFERENCE.sub(replace, html)
+    
     def copy_all(self, target_dir: str) -> None:
         """
         Copy all managed files to the target directory.
@@ -119,3 +233,14 @@ class FileManager:
         """
         for file_resource in self.files:
             file_resource.copy_to(target_dir)
+    
+    def write_all(self, archive: "ArchiveWriter") -> None:
+        """
+        Stream all managed files into an archive.
+        
+        Args:
+            archive: ArchiveWriter for the package being exported
+        """
+        archive.bytes_total += sum(os.path.getsize(f.filepath) for f in self.files)
+        for file_resource in self.files:
+            file_resource.write_to(archive)
@@ -4,25 +4,234 @@ import uuid
 import zipfile
 import os
 import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 
 
-def generate_identifier(prefix: str = "g") -> str:
+# Earliest timestamp a ZIP entry can hold (1980-01-01 00:00:00 UTC)
+ZIP_EPOCH = 315532800
+
+
+class _ReproducibleBuild:
+    """State of an active reproducible_build() or stable_identifiers() block."""
+    
+    def __init__(self, namespace: str, epoch: Optional[int]):
+        self.namespace = uuid.uuid5(uuid.NAMESPACE_URL, namespace)
+        # None in stable_identifiers(), where dates are not fixed
+        self.epoch = epoch
+        self.key_counts = Counter()
+
+
+_reproducible: Optional[_ReproducibleBuild] = None
+
+
+@contextmanager
+def _build_state(state: _ReproducibleBuild) -> Iterator[None]:
+    """Make a build state active inside the block."""
+    global _reproducible
+    previous = _reproducible
+    _reproducible = state
+    try:
+        yield
+    finally:
+        _reproducible = previous
+
+
+@contextmanager
+def reproducible_build(namespace: str, epoch: Optional[int] = None) -> Iterator[None]:
+    """
+    Make courses created and exported inside the block reproducible.
+    
+    Identifiers are derived with uuid5 from the namespace and a stable key
+    (such as a page or quiz title) instead of being random, the manifest
+    date and ZIP entry timestamps come from epoch, and ZIP entry metadata
+    does not depend on the platform or on file modes. Building the same
+    input twice produces byte-identical packages.
+    
+    Args:
+        namespace: Name that scopes the identifiers, e.g. the course code
+        epoch: Unix timestamp for all dates (default: $SOURCE_DATE_EPOCH,
+            or 1980-01-01 if that is not set)
+    """
+    if epoch is None:
+        epoch = int(os.environ.get('SOURCE_DATE_EPOCH', ZIP_EPOCH))
+    with _build_state(_ReproducibleBuild(namespace, epoch)):
+        yield
+
+
+@contextmanager
+def stable_identifiers(namespace: str) -> Iterator[None]:
+    """
+    Derive identifiers as reproducible_build() does, but keep real dates.
+    
+    Building the same input again gives the same identifiers, so documents
+    that embed them come out the same and can be reused from a cache or a
+    previous package.
+    
+    Args:
+        namespace: Name that scopes the identifiers, e.g. the course code
+    """
+    with _build_state(_ReproducibleBuild(namespace, None)):
+        yield
+
+
+def reproducible_state() -> Optional[_ReproducibleBuild]:
+    """
+    Get the state of the active reproducible_build() block, for worker processes.
+    
+    Returns:
+        Picklable state to pass to restore_reproducible_state(), or None
+        outside reproducible_build() and stable_identifiers()
+    """
+    return _reproducible
+
+
+def restore_reproducible_state(state: Optional[_ReproducibleBuild]) -> None:
+    """
+    Continue a parent process's reproducible_build() block in a worker process.
+    
+    Worker processes started with spawn, the default on macOS and Windows,
+    do not inherit the block, so pass this as a process pool's initializer
+    with reproducible_state() as its argument. Workers get a copy of the
+    identifier counts, so identifiers should still be generated in the
+    parent before work is dispatched.
+    
+    Args:
+        state: State from reproducible_state()
+    """
+    global _reproducible
+    _reproducible = state
+
+
+class IdentifierRecord:
+    """
+    The identifiers generated while building an object, from record_identifiers().
+    
+    Derived identifiers depend on how many were generated for the same key
+    before, so an object kept from an earlier build only has the
+    identifiers a new build would give it if those counts are unchanged.
+    replay() checks that and advances the counts as building the object
+    again would.
+    """
+    
+    def __init__(self):
+        self.namespace = _reproducible.namespace if _reproducible is not None else None
+        self.keys: List[Tuple[str, int]] = []  # (key, count before it) per UUID generated
+    
+    def replay(self) -> bool:
+        """
+        Account for the recorded identifiers in the active build.
+        
+        Returns:
+            True if the object's identifiers are the ones it would get now;
+            the counts of their keys are then advanced. False if it must
+            be built again.
+        """
+        namespace = _reproducible.namespace if _reproducible is not None else None
+        if namespace != self.namespace:
+            return False
+        if namespace is None:
+            # Random identifiers: any are as good as new ones
+            return True
+        
+        counts = Counter()
+        for key, count in self.keys:
+            if _reproducible.key_counts[key] + counts[key] != count:
+                return False
+            counts[key] += 1
+        _reproducible.key_counts.update(counts)
+        return True
+
+
+_recording: List[IdentifierRecord] = []
+
+
+@contextmanager
+def record_identifiers() -> Iterator[IdentifierRecord]:
+    """
+    Record the identifiers generated inside the block.
+    
+    Example:
+        with record_identifiers() as identifiers:
+            quiz = load_quiz(path)
+        ...
+        if identifiers.replay():
+            course.add_quiz(quiz)  # Same identifiers as a new load
+    """
+    record = IdentifierRecord()
+    _recording.append(record)
+    try:
+        yield record
+    finally:
+        _recording.remove(record)
+
+
+def is_reproducible() -> bool:
+    """Check whether a reproducible_build() block is active."""
+    return _reproducible is not None and _reproducible.epoch is not None
+
+
+def generate_uuid(key: Optional[str] = None) -> uuid.UUID:
+    """
+    Generate a UUID, derived from key inside reproducible_build() or stable_identifiers().
+    
+    Args:
+        key: Stable name for what the UUID identifies. Repeated keys get
+            distinct UUIDs in the order they are requested.
+    
+    Returns:
+        A random UUID, or a uuid5 of the build namespace and key
+    """
+    if _reproducible is None:
+        return uuid.uuid4()
+    key = key or ''
+    count = _reproducible.key_counts[key]
+    _reproducible.key_counts[key] += 1
+    for record in _recording:
+        record.keys.append((key, count))
+    return uuid.uuid5(_reproducible.namespace, f"{key}#{count}")
+
+
+def generate_identifier(prefix: str = "g", key: Optional[str] = None) -> str:
     """
     Generate a unique identifier for IMSCC resources.
     
     Args:
         prefix: Prefix for the identifier (default: 'g')
+        key: Stable name for the resource, used to derive the identifier
+            inside reproducible_build() or stable_identifiers()
     
     Returns:
         A unique identifier string like 'gaad660d2e4344089643a13af565b974a'
     """
     # Generate UUID and remove hyphens to match Canvas format
-    unique_id = uuid.uuid4().hex
+    unique_id = generate_uuid(key).hex
     return f"{prefix}{unique_id}"
 
 
+def build_datetime() -> datetime:
+    """Get the build date: the reproducible epoch if one is active, else now."""
+    if not is_reproducible():
+        return datetime.now()
+    return datetime.fromtimestamp(_reproducible.epoch, timezone.utc)
+
+
+def zip_date_time() -> Optional[Tuple[int, int, int, int, int, int]]:
+    """
+    Get the fixed timestamp for ZIP entries in a reproducible build.
+    
+    Returns:
+        A ZipInfo date_time tuple, or None outside reproducible_build()
+    """
+    if not is_reproducible():
+        return None
+    return time.gmtime(max(_reproducible.epoch, ZIP_EPOCH))[:6]
+
+
 def extract_imscc(imscc_path: str, output_dir: str) -> None:
     """
     Extract an IMSCC file to a directory for inspection/templating.
@@ -29,7 +29,7 @@ class WikiPage:
         """
         self.title = title
         self.content = content
-        self.identifier = identifier or generate_identifier()
+        self.identifier = identifier or generate_identifier(key=f"page:{title}")
         self.workflow_state = workflow_state
         self.editing_roles = editing_roles
         self.is_front_page = is_front_page
@@ -0,0 +1,142 @@
+"""Streaming, indenting XML writer used by the IMSCC generators."""
+
+import io
+from typing import Callable, Dict, List, Optional, TextIO
+from xml.etree.ElementTree import Element
+
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+
+def escape(text: str) -> str:
+    """Escape text for use in XML character data or attribute values."""
+    return (text.replace('&', '&amp;').replace('<', '&lt;')
+            .replace('"', '&quot;').replace('>', '&gt;'))
+
+
+class XMLWriter:
+    """
+    Writes indented XML directly to a text stream in a single pass.
+    
+    Attributes are written in the order they are given, elements containing
+    only text are written on one line, and elements without content are
+    self-closing - the same layout Canvas uses in its own exports.
+    """
+    
+    def __init__(self, out: TextIO, indent: str = "  "):
+        """
+        Create an XML writer.
+        
+        Args:
+            out: Text stream to write to
+            indent: Indentation added for each nesting level
+        """
+        self._write = out.write
+        self._indent = indent
+        self._stack: List[str] = []
+        self._pending: Optional[str] = None  # Start tag not yet closed with '>' or '/>'
+    
+    def declaration(self) -> None:
+        """Write the XML declaration."""
+        self._write(XML_DECLARATION)
+    
+    def start(self, tag: str, attrib: Optional[Dict[str, str]] = None) -> None:
+        """
+        Open an element that will contain child elements.
+        
+        Args:
+            tag: Element tag
+            attrib: Attributes in the order they should be written
+        """
+        self._flush_pending()
+        self._pending = f'{self._indent * len(self._stack)}<{tag}{self._attributes(attrib)}'
+        self._stack.append(tag)
+    
+    def end(self, short_empty: bool = True) -> None:
+        """
+        Close the most recently opened element.
+        
+        Args:
+            short_empty: Write an element without children as <tag/>. When
+                False it is written as an open tag and a close tag on
+                separate lines.
+        """
+        tag = self._stack.pop()
+        indent = self._indent * len(self._stack)
+        if self._pending is None:
+            self._write(f'{indent}</{tag}>\n')
+        elif short_empty:
+            self._write(f'{self._pending}/>\n')
+        else:
+            self._write(f'{self._pending}>\n{indent}</{tag}>\n')
+        self._pending = None
+    
+    def element(self, tag: str, text: Optional[str] = None,
+                attrib: Optional[Dict[str, str]] = None) -> None:
+        """
+        Write a complete element with optional text content.
+        
+        Args:
+            tag: Element tag
+            text: Text content (None or empty writes a self-closing element)
+            attrib: Attributes in the order they should be written
+        """
+        self._flush_pending()
+        prefix = f'{self._indent * len(self._stack)}<{tag}{self._attributes(attrib)}'
+        if text:
+            self._write(f'{prefix}>{escape(text)}</{tag}>\n')
+        else:
+            self._write(f'{prefix}/>\n')
+    
+    def write_element(self, elem: Element) -> None:
+        """
+        Write an ElementTree element and its subtree.
+        
+        Args:
+            elem: Element to write
+        """
+        if len(elem) == 0:
+            self.element(elem.tag, elem.text, elem.attrib)
+            return
+        
+        self.start(elem.tag, elem.attrib)
+        if elem.text:
+            self._text(elem.text)
+        for child in elem:
+            self.write_element(child)
+            if child.tail:
+                self._text(child.tail)
+        self.end()
+    
+    def _text(self, text: str) -> None:
+        """Write text that is mixed with child elements on its own line."""
+        self._flush_pending()
+        self._write(f'{self._indent * len(self._stack)}{escape(text)}\n')
+    
+    def _flush_pending(self) -> None:
+        """Close a pending start tag now that it is known to have content."""
+        if self._pending is not None:
+            self._write(f'{self._pending}>\n')
+            self._pending = None
+    
+    @staticmethod
+    def _attributes(attrib: Optional[Dict[str, str]]) -> str:
+        """Format attributes, preserving their order."""
+        if not attrib:
+            return ''
+        return ''.join(f' {name}="{escape(value)}"' for name, value in attrib.items())
+
+
+def xml_to_string(write: Callable[[XMLWriter], None]) -> str:
+    """
+    Run a writer function against an in-memory buffer.
+    
+    Args:
+        write: Function that writes a complete document to an XMLWriter
+    
+    Returns:
+        The document as a string
+    """
+    buffer = io.StringIO()
+    write(XMLWriter(buffer))
+    return buffer.getvalue()
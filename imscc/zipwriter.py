@@ -0,0 +1,361 @@
+"""ZIP archive writer that keeps its own central directory."""
+
+import io
+import struct
+import zipfile
+import zlib
+from typing import BinaryIO, List, Optional
+
+
+# Record layouts and signatures from the ZIP specification (APPNOTE.TXT)
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+_CENTRAL_HEADER = struct.Struct('<4s4B4HL2L5H2L')
+_END_RECORD = struct.Struct('<4s4H2LH')
+_ZIP64_END_RECORD = struct.Struct('<4sQ2H2L4Q')
+_ZIP64_LOCATOR = struct.Struct('<4sLQL')
+_LOCAL_SIGNATURE = b'PK\x03\x04'
+_CENTRAL_SIGNATURE = b'PK\x01\x02'
+_END_SIGNATURE = b'PK\x05\x06'
+_ZIP64_END_SIGNATURE = b'PK\x06\x06'
+_ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+_DATA_DESCRIPTOR_SIGNATURE = 0x08074b50
+
+# Version needed to extract members with ZIP64 extensions
+_ZIP64_VERSION = 45
+
+# General purpose flags
+_FLAG_ENCRYPTED = 0x01
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8_NAME = 0x800
+
+# Largest size, offset and member count that fit without ZIP64 extensions,
+# the same limits zipfile applies
+ZIP64_LIMIT = (1 << 31) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+
+
+def _dos_date_time(date_time) -> tuple:
+    """Convert a ZipInfo date_time tuple to MS-DOS (date, time) fields."""
+    year, month, day, hour, minute, second = date_time
+    return (year - 1980) << 9 | month << 5 | day, hour << 11 | minute << 5 | second // 2
+
+
+def _encode_name(zinfo: zipfile.ZipInfo) -> tuple:
+    """Encode a member name as ASCII, or as UTF-8 with the flag that says so."""
+    try:
+        return zinfo.filename.encode('ascii'), zinfo.flag_bits
+    except UnicodeEncodeError:
+        return zinfo.filename.encode('utf-8'), zinfo.flag_bits | _FLAG_UTF8_NAME
+
+
+def _compressor(compress_type: int, level: Optional[int]):
+    """Get a raw compressor for a member, or None for ZIP_STORED."""
+    if compress_type == zipfile.ZIP_STORED:
+        return None
+    if compress_type == zipfile.ZIP_DEFLATED:
+        return zlib.compressobj(
+            zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, -15
+        )
+    raise ValueError(f"Unsupported compression method: {compress_type}")
+
+
+class _MemberWriter(io.BufferedIOBase):
+    """Compresses a member's data into the archive as it is written; from ZipWriter.open()."""
+
+    def __init__(self, archive: 'ZipWriter', zinfo: zipfile.ZipInfo, zip64: bool, level: Optional[int]):
+        super().__init__()
+        self._archive = archive
+        self._zinfo = zinfo
+        self._zip64 = zip64
+        self._compressor = _compressor(zinfo.compress_type, level)
+        self._crc = 0
+        self._file_size = 0
+        self._compress_size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError('I/O operation on closed member.')
+        if not isinstance(data, (bytes, bytearray)):
+            data = memoryview(data).cast('B')
+        size = len(data)
+        self._file_size += size
+        self._crc = zlib.crc32(data, self._crc)
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        self._compress_size += len(data)
+        self._archive._write(data)
+        return size
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            super().close()
+            if self._compressor is not None:
+                tail = self._compressor.flush()
+                self._compress_size += len(tail)
+                self._archive._write(tail)
+            zinfo = self._zinfo
+            zinfo.CRC = self._crc
+            zinfo.file_size = self._file_size
+            zinfo.compress_size = self._compress_size
+            if not self._zip64 and max(zinfo.file_size, zinfo.compress_size) > ZIP64_LIMIT:
+                raise RuntimeError(f"Member {zinfo.filename} needs ZIP64; open it with force_zip64")
+
+            if zinfo.flag_bits & _FLAG_DATA_DESCRIPTOR:
+                # Unseekable output: the CRC and sizes follow the data
+                self._archive._write(struct.pack(
+                    '<LLQQ' if self._zip64 else '<LLLL', _DATA_DESCRIPTOR_SIGNATURE,
+                    zinfo.CRC, zinfo.compress_size, zinfo.file_size
+                ))
+            else:
+                self._archive._rewrite_local_header(zinfo, self._zip64)
+            self._archive._add(zinfo)
+        finally:
+            self._archive._writing = False
+
+
+class ZipWriter:
+    """
+    Writes a ZIP archive into a binary stream, keeping its own central directory.
+
+    Members are written as with zipfile.ZipFile in 'w' mode, record for
+    record, but the writer also copies members that are already compressed,
+    from another archive, using only the documented fields of
+    zipfile.ZipInfo. The stream does not have to be seekable: when it is
+    not, each member's CRC and sizes go in a data descriptor after its data.
+
+    Example:
+        with ZipWriter(open('out.zip', 'wb')) as archive:
+            archive.writestr(zipfile.ZipInfo('a.txt'), b'text')
+    """
+
+    def __init__(self, fileobj: BinaryIO):
+        """
+        Start an archive.
+
+        Args:
+            fileobj: Writable binary stream; it is left open
+        """
+        self.fp = fileobj
+        self.members: List[zipfile.ZipInfo] = []
+        self._names = set()
+        self._writing = False
+        self.closed = False
+        try:
+            self._position = fileobj.tell()
+            fileobj.seek(self._position)
+            self.seekable = True
+        except (AttributeError, OSError):
+            # Pipes and sockets: offsets are counted from the first byte written
+            self._position = 0
+            self.seekable = False
+
+    def __enter__(self) -> 'ZipWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        # A failed export gets no central directory, so it never reads as complete
+        if exc_type is None:
+            self.close()
+
+    def open(
+        self,
+        zinfo: zipfile.ZipInfo,
+        compresslevel: Optional[int] = None,
+        force_zip64: bool = False
+    ) -> _MemberWriter:
+        """
+        Start a member whose data is written to the returned file object.
+
+        Args:
+            zinfo: Entry for the member; its compress_type is used, and its
+                CRC, sizes, flags and offset are filled in
+            compresslevel: Deflate level (default: zlib's default)
+            force_zip64: Use ZIP64 extensions even if the member's size
+                (zinfo.file_size, if known) does not call for them
+
+        Returns:
+            Writable file object; closing it finishes the member
+        """
+        self._check_member(zinfo.filename)
+        zinfo.CRC = 0
+        zinfo.compress_size = 0
+        zinfo.flag_bits = 0 if self.seekable else _FLAG_DATA_DESCRIPTOR
+        if not zinfo.external_attr:
+            zinfo.external_attr = 0o600 << 16  # rw-------
+
+        # Deflated data can come out slightly larger than the input
+        zip64 = force_zip64 or zinfo.file_size * 1.05 > ZIP64_LIMIT
+        zinfo.header_offset = self._position
+        self._write(self._local_header(zinfo, zip64))
+        self._writing = True
+        return _MemberWriter(self, zinfo, zip64, compresslevel)
+
+    def writestr(self, zinfo: zipfile.ZipInfo, data: bytes, compresslevel: Optional[int] = None) -> None:
+        """
+        Write a member from bytes in memory.
+
+        Args:
+            zinfo: Entry for the member, as for open()
+            data: Member content
+            compresslevel: Deflate level (default: zlib's default)
+        """
+        zinfo.file_size = len(data)
+        with self.open(zinfo, compresslevel) as member:
+            member.write(data)
+
+    def copy_from(
+        self,
+        source: BinaryIO,
+        old: zipfile.ZipInfo,
+        zinfo: zipfile.ZipInfo,
+        chunk_size: int = 1024 * 1024
+    ) -> None:
+        """
+        Copy a member's compressed bytes from another archive without inflating them.
+
+        Args:
+            source: Seekable binary stream of the other archive
+            old: Entry of the member in that archive, e.g. from
+                zipfile.ZipFile.getinfo()
+            zinfo: Entry for the copy; its name, date, attributes and
+                creator system are used, everything else comes from old
+            chunk_size: Bytes copied at a time
+        """
+        if old.flag_bits & _FLAG_ENCRYPTED:
+            raise ValueError(f"Cannot copy encrypted member {old.filename}")
+        self._check_member(zinfo.filename)
+        zinfo.compress_type = old.compress_type
+        zinfo.CRC = old.CRC
+        zinfo.compress_size = old.compress_size
+        zinfo.file_size = old.file_size
+        # Sizes are known up front, so no data descriptor follows the data
+        zinfo.flag_bits = old.flag_bits & ~_FLAG_DATA_DESCRIPTOR
+        zip64 = max(zinfo.file_size, zinfo.compress_size) > ZIP64_LIMIT
+
+        source.seek(old.header_offset)
+        header = source.read(_LOCAL_HEADER.size)
+        if len(header) != _LOCAL_HEADER.size or header[:4] != _LOCAL_SIGNATURE:
+            raise zipfile.BadZipFile(f"Bad local header for {old.filename} in base archive")
+        name_length, extra_length = struct.unpack('<HH', header[26:30])
+        source.seek(name_length + extra_length, io.SEEK_CUR)
+
+        zinfo.header_offset = self._position
+        self._write(self._local_header(zinfo, zip64))
+        remaining = old.compress_size
+        while remaining:
+            chunk = source.read(min(remaining, chunk_size))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated member in base archive: {old.filename}")
+            self._write(chunk)
+            remaining -= len(chunk)
+        self._add(zinfo)
+
+    def close(self) -> None:
+        """Write the central directory and end records; the stream is left open."""
+        if self.closed:
+            return
+        if self._writing:
+            raise ValueError("Cannot close the archive while a member is being written")
+        self.closed = True
+
+        start = self._position
+        for zinfo in self.members:
+            self._write(self._central_header(zinfo))
+        end = self._position
+
+        count = len(self.members)
+        size = end - start
+        if count > ZIP_FILECOUNT_LIMIT or start > ZIP64_LIMIT or size > ZIP64_LIMIT:
+            self._write(_ZIP64_END_RECORD.pack(
+                _ZIP64_END_SIGNATURE, 44, _ZIP64_VERSION, _ZIP64_VERSION, 0, 0,
+                count, count, size, start
+            ))
+            self._write(_ZIP64_LOCATOR.pack(_ZIP64_LOCATOR_SIGNATURE, 0, end, 1))
+            count = min(count, 0xFFFF)
+            size = min(size, 0xFFFFFFFF)
+            start = min(start, 0xFFFFFFFF)
+        self._write(_END_RECORD.pack(_END_SIGNATURE, 0, 0, count, count, size, start, 0))
+        if hasattr(self.fp, 'flush'):
+            self.fp.flush()
+
+    def _write(self, data) -> None:
+        """Write bytes at the end of the archive."""
+        self.fp.write(data)
+        self._position += len(data)
+
+    def _check_member(self, name: str) -> None:
+        """Refuse a new member while another is open or if its name is taken."""
+        if self.closed:
+            raise ValueError("Cannot add members to a closed archive")
+        if self._writing:
+            raise ValueError("Cannot start a member while another is being written")
+        if name in self._names:
+            raise ValueError(f"Duplicate member name in archive: {name}")
+
+    def _add(self, zinfo: zipfile.ZipInfo) -> None:
+        """Register a finished member for the central directory."""
+        self.members.append(zinfo)
+        self._names.add(zinfo.filename)
+
+    def _rewrite_local_header(self, zinfo: zipfile.ZipInfo, zip64: bool) -> None:
+        """Patch a finished member's CRC and sizes into its local header."""
+        self.fp.seek(zinfo.header_offset)
+        self.fp.write(self._local_header(zinfo, zip64))
+        self.fp.seek(self._position)
+
+    @staticmethod
+    def _local_header(zinfo: zipfile.ZipInfo, zip64: bool) -> bytes:
+        """Build a member's local header, raising its versions for ZIP64 as needed."""
+        dos_date, dos_time = _dos_date_time(zinfo.date_time)
+        if zinfo.flag_bits & _FLAG_DATA_DESCRIPTOR:
+            crc = compress_size = file_size = 0
+        else:
+            crc, compress_size, file_size = zinfo.CRC, zinfo.compress_size, zinfo.file_size
+
+        extra = zinfo.extra
+        if zip64:
+            extra = extra + struct.pack('<HHQQ', 1, 16, file_size, compress_size)
+            file_size = compress_size = 0xFFFFFFFF
+            zinfo.extract_version = max(zinfo.extract_version, _ZIP64_VERSION)
+            zinfo.create_version = max(zinfo.create_version, _ZIP64_VERSION)
+
+        name, flags = _encode_name(zinfo)
+        return _LOCAL_HEADER.pack(
+            _LOCAL_SIGNATURE, zinfo.extract_version, 0, flags, zinfo.compress_type,
+            dos_time, dos_date, crc, compress_size, file_size, len(name), len(extra)
+        ) + name + extra
+
+    @staticmethod
+    def _central_header(zinfo: zipfile.ZipInfo) -> bytes:
+        """Build a member's central directory record."""
+        dos_date, dos_time = _dos_date_time(zinfo.date_time)
+        zip64_fields = []
+        file_size, compress_size, offset = zinfo.file_size, zinfo.compress_size, zinfo.header_offset
+        if file_size > ZIP64_LIMIT or compress_size > ZIP64_LIMIT:
+            zip64_fields += [file_size, compress_size]
+            file_size = compress_size = 0xFFFFFFFF
+        if offset > ZIP64_LIMIT:
+            zip64_fields.append(offset)
+            offset = 0xFFFFFFFF
+
+        extra = zinfo.extra
+        extract_version, create_version = zinfo.extract_version, zinfo.create_version
+        if zip64_fields:
+            extra = struct.pack(
+                f'<HH{len(zip64_fields)}Q', 1, 8 * len(zip64_fields), *zip64_fields
+            ) + extra
+            extract_version = max(extract_version, _ZIP64_VERSION)
+            create_version = max(create_version, _ZIP64_VERSION)
+
+        name, flags = _encode_name(zinfo)
+        return _CENTRAL_HEADER.pack(
+            _CENTRAL_SIGNATURE, create_version, zinfo.create_system, extract_version, 0,
+            flags, zinfo.compress_type, dos_time, dos_date, zinfo.CRC, compress_size,
+            file_size, len(name), len(extra), len(zinfo.comment), 0, zinfo.internal_attr,
+            zinfo.external_attr, offset
+        ) + name + extra + zinfo.comment
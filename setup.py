@@ -30,6 +30,11 @@ setup(
     install_requires=[
         # No external dependencies - uses only Python standard library
     ],
+    entry_points={
+        "console_scripts": [
+            "imscc=imscc.cli:main",
+        ],
+    },
     extras_require={
         "dev": [
             "pytest>=7.0",
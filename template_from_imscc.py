@@ -3,13 +3,13 @@
 Extract an IMSCC file and convert it to a locally editable template.
 
 This script:
-1. Extracts the IMSCC (ZIP) file
+1. Reads the IMSCC (ZIP) file in place, without extracting it
 2. Parses imsmanifest.xml and course settings
 3. Converts Canvas links back to local format:
    - $IMS-CC-FILEBASE$/web_resources/file.txt → ../web_resources/file.txt
    - $CANVAS_OBJECT_REFERENCE$/pages/slug → page-name.html
 4. Creates template structure with course.json, modules.json, etc.
-5. Preserves quizzes, assignments, and rubrics if present
+5. Rebuilds quizzes/*.json from the Canvas QTI, streaming each question bank
 
 Usage:
     python template_from_imscc.py course.imscc
@@ -21,144 +21,82 @@ import sys
 import json
 import re
 import argparse
-import zipfile
-import xml.etree.ElementTree as ET
-from pathlib import Path
+import shutil
+from collections import Counter, defaultdict
+from pathlib import Path, PurePosixPath
 
+from imscc import ImsccArchive, ArchivePage, ArchiveQuiz, LinkRewriter, LinkRule
 
-def extract_imscc(imscc_path, temp_dir):
-    """Extract IMSCC file to temporary directory."""
-    temp_path = Path(temp_dir)
-    temp_path.mkdir(parents=True, exist_ok=True)
-    
-    with zipfile.ZipFile(imscc_path, 'r') as zip_ref:
-        zip_ref.extractall(temp_path)
-    
-    print(f"✓ Extracted {imscc_path}")
-    return temp_path
 
+# Bytes copied at a time when streaming a member out of the archive
+COPY_CHUNK_SIZE = 1024 * 1024
 
-def parse_manifest(manifest_path):
-    """Parse imsmanifest.xml to extract course metadata and structure."""
-    tree = ET.parse(manifest_path)
-    root = tree.getroot()
-    
-    # Define XML namespaces
-    ns = {
-        'imscc': 'http://www.imsglobal.org/xsd/imsccv1p1/imscp_v1p1',
-        'imsmd': 'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/manifest',
-        'lomimscc': 'http://ltsc.ieee.org/xsd/imsccv1p1/LOM/resource'
-    }
-    
-    # Extract basic metadata
-    metadata = {
-        'title': None,
-        'course_code': None,
-        'identifier': None
-    }
-    
-    # Get identifier
-    metadata['identifier'] = root.get('identifier')
-    
-    # Try to get title from metadata
-    title_elem = root.find('.//imsmd:general/imsmd:title/imsmd:string', ns)
-    if title_elem is not None and title_elem.text:
-        metadata['title'] = title_elem.text
+
+def member_names(archive, folder):
+    """
+    List the files in a folder of the archive, without reading them.
     
-    # Extract resources (pages, files, quizzes, assignments)
-    resources = []
-    for resource in root.findall('.//imscc:resource', ns):
-        res_type = resource.get('type', '')
-        identifier = resource.get('identifier', '')
-        href = resource.get('href', '')
-        
-        res_info = {
-            'type': res_type,
-            'identifier': identifier,
-            'href': href,
-            'files': []
-        }
-        
-        # Get associated files
-        for file_elem in resource.findall('imscc:file', ns):
-            file_href = file_elem.get('href', '')
-            if file_href:
-                res_info['files'].append(file_href)
-        
-        resources.append(res_info)
+    Args:
+        archive: Open ImsccArchive
+        folder: Folder inside the archive, e.g. 'web_resources'
     
-    return metadata, resources
+    Returns:
+        list: (member name, path relative to folder) pairs, skipping
+        directories and unsafe paths (absolute or containing '..')
+    """
+    prefix = f"{folder}/"
+    members = []
+    for name in archive.members(folder):
+        rel_path = PurePosixPath(name[len(prefix):])
+        if rel_path.is_absolute() or '..' in rel_path.parts:
+            print(f"⚠️  Skipped unsafe path: {name}")
+            continue
+        members.append((name, rel_path))
+    return members
 
 
-def parse_course_settings(extracted_path):
-    """Parse course_settings.xml if it exists."""
-    settings_path = extracted_path / 'course_settings' / 'course_settings.xml'
-    
-    if not settings_path.exists():
-        return {}
+def _wiki_link_to_local(match, context):
+    """Rewrite a $WIKI_REFERENCE$ page link to the local filename."""
+    page_id = match.group(1)
     
-    tree = ET.parse(settings_path)
-    root = tree.getroot()
+    # Look up the page by identifier, slug or filename
+    page = context['index'].page(page_id)
+    if page is None:
+        # Fallback: can't convert, leave as comment
+        return f'[PAGE:{page_id}]'
     
-    settings = {}
-    
-    # Extract common settings
-    for elem in root:
-        tag = elem.tag
-        text = elem.text
-        
-        if tag == 'title':
-            settings['title'] = text
-        elif tag == 'course_code':
-            settings['course_code'] = text
-        elif tag == 'default_view':
-            settings['default_view'] = text
-        elif tag == 'license':
-            settings['license'] = text
-    
-    return settings
+    return f'{page_filename(page)}.html'
 
 
-def parse_module_meta(extracted_path):
-    """Parse module_meta.xml to extract module structure."""
-    module_path = extracted_path / 'course_settings' / 'module_meta.xml'
-    
-    if not module_path.exists():
-        return []
+def _page_link_to_local(match, context):
+    """Rewrite a $CANVAS_OBJECT_REFERENCE$ page link to the local filename."""
+    page_slug = match.group(1)
     
-    tree = ET.parse(module_path)
-    root = tree.getroot()
+    # Look up the page by slug
+    # Fallback: use slug as filename
+    page = context['index'].page(page_slug)
+    filename = page_filename(page) if page is not None else page_slug
     
-    modules = []
-    
-    for module_elem in root.findall('module'):
-        module = {
-            'title': module_elem.get('identifier', 'Untitled Module'),
-            'items': []
-        }
-        
-        # Get module title
-        title_elem = module_elem.find('title')
-        if title_elem is not None and title_elem.text:
-            module['title'] = title_elem.text
-        
-        # Get module items
-        items_elem = module_elem.find('items')
-        if items_elem is not None:
-            for item_elem in items_elem.findall('item'):
-                item = {
-                    'type': item_elem.find('content_type').text if item_elem.find('content_type') is not None else 'WikiPage',
-                    'identifier': item_elem.find('identifierref').text if item_elem.find('identifierref') is not None else '',
-                    'title': item_elem.find('title').text if item_elem.find('title') is not None else ''
-                }
-                module['items'].append(item)
-        
-        modules.append(module)
-    
-    return modules
+    return f'{filename}.html'
+
 
+# Canvas → local link rules, applied in a single pass per page
+CANVAS_TO_LOCAL_LINKS = LinkRewriter([
+    # $IMS-CC-FILEBASE$/path/file.ext → ../web_resources/path/file.ext
+    # This handles all paths including web_resources/, Uploaded Media/, etc.
+    LinkRule('file', r'\$IMS-CC-FILEBASE\$/([^"\'>\s]+)', r'../web_resources/\1'),
+    # $WIKI_REFERENCE$/pages/identifier → filename.html
+    LinkRule('wiki_page', r'\$WIKI_REFERENCE\$/pages/([^"\'>\s]+)', _wiki_link_to_local),
+    # $CANVAS_OBJECT_REFERENCE$/pages/slug → slug.html
+    LinkRule('page', r'\$CANVAS_OBJECT_REFERENCE\$/pages/([^"\'>\s]+)', _page_link_to_local),
+    # Leave as placeholder since we can't determine local assignment filename
+    LinkRule('assignment', r'\$CANVAS_OBJECT_REFERENCE\$/assignments/([^"\'?>\s]+)', r'[ASSIGNMENT:\1]'),
+    # Module links can't be represented locally; leave a placeholder so user knows what was there
+    LinkRule('module', r'\$CANVAS_OBJECT_REFERENCE\$/modules/([^"\'?>\s]+)', r'[MODULE:\1]'),
+])
 
-def convert_canvas_links_to_local(html_content, page_identifier_to_filename):
+
+def convert_canvas_links_to_local(html_content, index):
     """
     Convert Canvas links back to local format for editing.
     
@@ -171,80 +109,10 @@ def convert_canvas_links_to_local(html_content, page_identifier_to_filename):
     
     Args:
         html_content: The HTML content to process
-        page_identifier_to_filename: Dict mapping page identifier/slug to filename
+        index: ManifestIndex of the archive, to look pages up by
+            identifier, slug or filename
     """
-    # Convert file links: $IMS-CC-FILEBASE$/path/file.ext → ../web_resources/path/file.ext
-    # This handles all paths including web_resources/, Uploaded Media/, etc.
-    html_content = re.sub(
-        r'\$IMS-CC-FILEBASE\$/([^"\'>\s]+)',
-        r'../web_resources/\1',
-        html_content
-    )
-    
-    # Convert wiki page links: $WIKI_REFERENCE$/pages/identifier → filename.html
-    def replace_wiki_link(match):
-        page_id = match.group(1)
-        
-        # Look up filename from identifier
-        if page_id in page_identifier_to_filename:
-            filename = page_identifier_to_filename[page_id]
-        else:
-            # Fallback: can't convert, leave as comment
-            return f'[PAGE:{page_id}]'
-        
-        return f'{filename}.html'
-    
-    html_content = re.sub(
-        r'\$WIKI_REFERENCE\$/pages/([^"\'>\s]+)',
-        replace_wiki_link,
-        html_content
-    )
-    
-    # Convert page links: $CANVAS_OBJECT_REFERENCE$/pages/slug → slug.html
-    def replace_page_link(match):
-        page_slug = match.group(1)
-        
-        # Look up filename from slug
-        if page_slug in page_identifier_to_filename:
-            filename = page_identifier_to_filename[page_slug]
-        else:
-            # Fallback: use slug as filename
-            filename = page_slug
-        
-        return f'{filename}.html'
-    
-    html_content = re.sub(
-        r'\$CANVAS_OBJECT_REFERENCE\$/pages/([^"\'>\s]+)',
-        replace_page_link,
-        html_content
-    )
-    
-    # Convert assignment links: $CANVAS_OBJECT_REFERENCE$/assignments/id → [ASSIGNMENT:id]
-    # Leave as placeholder since we can't determine local assignment filename
-    html_content = re.sub(
-        r'\$CANVAS_OBJECT_REFERENCE\$/assignments/([^"\'?>\s]+)',
-        r'[ASSIGNMENT:\1]',
-        html_content
-    )
-    
-    # Remove module links (can't be represented locally)
-    # Replace with a comment so user knows what was there
-    html_content = re.sub(
-        r'\$CANVAS_OBJECT_REFERENCE\$/modules/([^"\'?>\s]+)',
-        r'[MODULE:\1]',
-        html_content
-    )
-    
-    return html_content
-
-
-def title_to_slug(title):
-    """Convert page title to Canvas-compatible slug."""
-    slug = title.lower()
-    slug = re.sub(r'[^\w\s-]', '', slug)
-    slug = re.sub(r'[-\s]+', '-', slug)
-    slug = slug.strip('-')
-    return slug
+    return CANVAS_TO_LOCAL_LINKS.rewrite(html_content, {'index': index})
 
 
 def title_to_filename(title):
@@ -256,21 +124,337 @@ def title_to_filename(title):
     return filename
 
 
-def create_template_structure(extracted_path, output_dir):
-    """Create the template folder structure from extracted IMSCC."""
+def page_filename(page):
+    """Get the template filename of a page, without .html."""
+    return title_to_filename(page.title)
+
+
+def quiz_filename(quiz):
+    """Get the template filename of a quiz, without .json."""
+    if re.fullmatch(r'[\w.-]+', quiz.identifier):
+        return quiz.identifier
+    return title_to_filename(quiz.read_meta().get('title') or quiz.identifier)
+
+
+# Canvas QTI question_type → question type in quiz JSON files
+QTI_QUESTION_TYPES = {
+    'multiple_choice_question': 'multiple_choice',
+    'true_false_question': 'true_false',
+    'short_answer_question': 'fill_in_blank',
+    'fill_in_multiple_blanks_question': 'fill_in_multiple_blanks',
+    'multiple_answers_question': 'multiple_answers',
+    'multiple_dropdowns_question': 'multiple_dropdowns',
+    'matching_question': 'matching',
+    'numerical_question': 'numerical_answer',
+    'calculated_question': 'formula_question',
+    'essay_question': 'essay_question',
+    'file_upload_question': 'file_upload_question',
+    'text_only_question': 'text_only_question',
+}
+
+# Matches the metadata label of a formula variable bound
+FORMULA_VARIABLE_FIELD = re.compile(r'formula_variable_(.+)_(min|max)$')
+
+
+def _to_number(text):
+    """Parse a QTI number, keeping whole numbers as int."""
+    value = float(text)
+    return int(value) if value.is_integer() and '.' not in text else value
+
+
+def _clean_number(value):
+    """Round float noise off a computed number, keeping whole numbers as int."""
+    value = round(value, 10)
+    return int(value) if value.is_integer() else value
+
+
+def _numerical_bounds(lower_text, upper_text):
+    """
+    Convert the bounds of a numerical answer back to question JSON.
+    
+    NumericalAnswerQuestion writes exact_answer ± margin as bounds, and
+    the float arithmetic leaves noise such as 3.1300000000000003 in them.
+    Noisy bounds that an exact_answer and margin rounded to 10 decimal
+    places produce exactly become those again. Other bounds become an
+    answer_range, with any noise rounded off; exact_answer ± margin whose
+    bounds have no noise comes back this way too, and grades the same.
+    
+    Returns:
+        dict: 'exact_answer' and 'margin', or 'answer_range'
+    """
+    lower, upper = _to_number(lower_text), _to_number(upper_text)
+    if round(lower, 10) == lower and round(upper, 10) == upper:
+        return {'answer_range': [lower, upper]}
+    exact = _clean_number((lower + upper) / 2)
+    margin = _clean_number((upper - lower) / 2)
+    if str(exact - margin) == lower_text and str(exact + margin) == upper_text:
+        return {'exact_answer': exact, 'margin': margin}
+    return {'answer_range': [_clean_number(lower), _clean_number(upper)]}
+
+
+def _label_text(label):
+    """Get the text of a response_label."""
+    return label.findtext('material/mattext') or ''
+
+
+def _correct_responses(item):
+    """
+    Collect the responses that score points in an item.
+    
+    Returns:
+        dict: respident → list of varequal values, in document order
+    """
+    correct = defaultdict(list)
+    for condition in item.iter('respcondition'):
+        setvar = condition.find('setvar')
+        conditionvar = condition.find('conditionvar')
+        if setvar is None or conditionvar is None:
+            continue
+        try:
+            if float(setvar.text or 0) <= 0:
+                continue
+        except ValueError:
+            continue
+        # Values under <not> are answers that must not be chosen
+        for parent in [conditionvar] + conditionvar.findall('and') + conditionvar.findall('or'):
+            for varequal in parent.findall('varequal'):
+                correct[varequal.get('respident')].append(varequal.text or '')
+    return correct
+
+
+def _choices(response, correct_idents):
+    """List the options of a response_lid as answer dicts."""
+    return [
+        {'text': _label_text(label), 'correct': label.get('ident') in correct_idents}
+        for label in response.iter('response_label')
+    ]
+
+
+def qti_item_to_question(item):
+    """
+    Convert a Canvas QTI <item> to the question JSON read by build_from_template.py.
+    
+    Args:
+        item: <item> element with namespaces removed
+    
+    Returns:
+        dict: Question data for create_question_from_json, or None if the
+        question type has no JSON equivalent
+    """
+    fields = {
+        field.findtext('fieldlabel'): field.findtext('fieldentry') or ''
+        for field in item.iter('qtimetadatafield')
+    }
+    qtype = QTI_QUESTION_TYPES.get(fields.get('question_type'))
+    if qtype is None:
+        return None
+    
+    presentation = item.find('presentation')
+    if presentation is None:
+        return None
+    question = {'type': qtype, 'text': presentation.findtext('material/mattext') or ''}
+    correct = _correct_responses(item)
+    responses = [r for r in presentation if r.tag in ('response_lid', 'response_str', 'response_grp')]
+    
+    if qtype in ('multiple_choice', 'multiple_answers') and responses:
+        question['answers'] = _choices(responses[0], set(correct[responses[0].get('ident')]))
+    
+    elif qtype == 'true_false' and responses:
+        answers = _choices(responses[0], set(correct[responses[0].get('ident')]))
+        question['correct_answer'] = any(
+            a['correct'] and a['text'].strip().lower() == 'true' for a in answers
+        )
+    
+    elif qtype in ('fill_in_blank', 'fill_in_multiple_blanks'):
+        if len(responses) == 1 and responses[0].tag == 'response_str' and responses[0].get('ident') == 'response1':
+            # FillInBlankQuestion: one blank with a list of acceptable answers
+            question['type'] = 'fill_in_blank'
+            question['answers'] = correct['response1']
+        else:
+            question['type'] = 'fill_in_multiple_blanks'
+            blanks = {}
+            for response in responses:
+                ident = response.get('ident')
+                if response.tag == 'response_lid':
+                    # Canvas exports: answers are options of response_<blank>
+                    name = ident[len('response_'):] if ident.startswith('response_') else ident
+                    blanks[name] = [a['text'] for a in _choices(response, set(correct[ident])) if a['correct']]
+                else:
+                    blanks[ident] = correct[ident]
+            question['blanks'] = blanks
+    
+    elif qtype == 'multiple_dropdowns':
+        dropdowns = {}
+        for response in responses:
+            ident = response.get('ident')
+            name = ident[len('response_'):] if ident.startswith('response_') else ident
+            dropdowns[name] = _choices(response, set(correct[ident]))
+        question['dropdowns'] = dropdowns
+    
+    elif qtype == 'matching':
+        matches = []
+        options = []
+        for response in responses:
+            choices = {label.get('ident'): _label_text(label) for label in response.iter('response_label')}
+            options = options or list(choices.values())
+            answer = next((choices[i] for i in correct[response.get('ident')] if i in choices), '')
+            matches.append({'prompt': response.findtext('material/mattext') or '', 'answer': answer})
+        answers = {match['answer'] for match in matches}
+        question['matches'] = matches
+        question['distractors'] = [option for option in options if option not in answers]
+    
+    elif qtype == 'numerical_answer':
+        exact = next(item.iter('varequal'), None)
+        lower = next(item.iter('vargte'), None)
+        upper = next(item.iter('varlte'), None)
+        if exact is not None and exact.text:
+            question['exact_answer'] = _to_number(exact.text)
+        elif lower is not None and upper is not None:
+            question.update(_numerical_bounds(lower.text.strip(), upper.text.strip()))
+    
+    elif qtype == 'formula_question':
+        question['formula'] = fields.get('formula_question_formula', '')
+        # Written by this package since it records tolerances; Canvas exports
+        # have answer_tolerance. Without either the default tolerance applies.
+        tolerance = fields.get('formula_question_tolerance') or item.findtext('.//answer_tolerance')
+        if tolerance:
+            try:
+                question['tolerance'] = _to_number(tolerance.strip())
+            except ValueError:
+                pass  # A percentage tolerance, which the JSON format cannot express
+        variables = {}
+        for label, entry in fields.items():
+            match = FORMULA_VARIABLE_FIELD.match(label or '')
+            if match:
+                bounds = variables.setdefault(match.group(1), [0, 0])
+                bounds[0 if match.group(2) == 'min' else 1] = _to_number(entry)
+        question['variables'] = variables
+    
+    if qtype != 'text_only_question':
+        question['points'] = float(fields.get('points_possible') or 1.0)
+    return question
+
+
+def quiz_meta_to_json(meta):
+    """
+    Convert assessment_meta.xml settings to a quiz JSON header.
+    
+    Args:
+        meta: Settings from ArchiveQuiz.read_meta()
+    
+    Returns:
+        dict: 'title', 'description' and 'settings' of a quiz JSON file
+    """
+    settings = {'quiz_type': meta.get('quiz_type') or 'assignment'}
+    if meta.get('allowed_attempts'):
+        settings['allowed_attempts'] = int(meta['allowed_attempts'])
+    if meta.get('time_limit'):
+        settings['time_limit'] = int(meta['time_limit'])
+    for name in ('shuffle_questions', 'shuffle_answers', 'show_correct_answers',
+                 'one_question_at_a_time', 'cant_go_back'):
+        if meta.get(name):
+            settings[name] = meta[name] == 'true'
+    if meta.get('scoring_policy'):
+        settings['scoring_policy'] = meta['scoring_policy']
+    
+    return {
+        'title': meta.get('title') or 'Untitled Quiz',
+        'description': meta.get('description', ''),
+        'settings': settings,
+    }
+
+
+def write_quiz_json(path, quiz_data, questions):
+    """
+    Write a quiz JSON file, streaming its questions.
+    
+    The output is the same as json.dump(..., indent=2) of the quiz with a
+    'questions' list, but questions are written as they are produced, so
+    the question bank is never held in memory.
+    
+    Args:
+        path: File to write
+        quiz_data: Quiz JSON without 'questions'
+        questions: Iterable of question dicts
+    
+    Returns:
+        int: Number of questions written
+    """
+    header = json.dumps(quiz_data, indent=2)
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(header[:-2])  # Reopen the object before its closing brace
+        f.write(',\n  "questions": [')
+        for question in questions:
+            f.write(',\n    ' if count else '\n    ')
+            f.write(json.dumps(question, indent=2).replace('\n', '\n    '))
+            count += 1
+        f.write('\n  ]\n}' if count else ']\n}')
+    return count
+
+
+def extract_quizzes(archive, quizzes_dir):
+    """
+    Write a quizzes/*.json file for every quiz in the archive.
+    
+    Each Canvas QTI file is streamed item by item, so memory use stays flat
+    however large the question bank is.
+    
+    Args:
+        archive: Open ImsccArchive
+        quizzes_dir: Folder to write quiz JSON files to
+    
+    Returns:
+        int: Number of quizzes written
+    """
+    quizzes = archive.index.of_type(ArchiveQuiz)
+    for quiz in quizzes:
+        quiz_data = quiz_meta_to_json(quiz.read_meta())
+        filename = quiz_filename(quiz)
+        
+        skipped = Counter()
+        
+        def questions():
+            for item in quiz.iter_items():
+                question = qti_item_to_question(item)
+                if question is None:
+                    skipped[item.findtext('.//qtimetadatafield[fieldlabel="question_type"]/fieldentry')] += 1
+                    continue
+                yield question
+        
+        quizzes_dir.mkdir(exist_ok=True)
+        count = write_quiz_json(quizzes_dir / f"{filename}.json", quiz_data, questions())
+        print(f"✓ Created quizzes/{filename}.json ({count} questions)")
+        for qtype, n in skipped.items():
+            print(f"⚠️  Skipped {n} unsupported {qtype} question(s) in {filename}")
+    return len(quizzes)
+
+
+def create_template_structure(archive, output_dir):
+    """
+    Create the template folder structure from an IMSCC archive.
+    
+    Members are read straight from the archive: pages and settings into
+    memory, web resources streamed to their place in the template. Nothing
+    is staged on disk, and members the template does not use are never
+    decompressed.
+    
+    Args:
+        archive: Open ImsccArchive
+        output_dir: Template folder to create
+    """
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # Parse course settings
-    course_settings = parse_course_settings(extracted_path)
-    manifest_metadata, resources = parse_manifest(extracted_path / 'imsmanifest.xml')
+    # Course settings are read from the archive on first access
+    course_settings = archive.course_settings
     
     # Merge metadata
     course_data = {}
     if course_settings.get('title'):
         course_data['title'] = course_settings['title']
-    elif manifest_metadata.get('title'):
-        course_data['title'] = manifest_metadata['title']
+    elif archive.title:
+        course_data['title'] = archive.title
     else:
         course_data['title'] = output_path.name
     
@@ -288,8 +472,8 @@ def create_template_structure(extracted_path, output_dir):
         json.dump(course_data, f, indent=2)
     print(f"✓ Created course.json")
     
-    # Parse modules
-    modules_data = parse_module_meta(extracted_path)
+    # Modules from module_meta.xml
+    modules_data = archive.modules
     
     # Create directories
     wiki_dir = output_path / 'wiki_content'
@@ -298,56 +482,14 @@ def create_template_structure(extracted_path, output_dir):
     resources_dir = output_path / 'web_resources'
     resources_dir.mkdir(exist_ok=True)
     
-    # Build identifier/slug-to-filename mapping from manifest
-    page_identifier_to_filename = {}
-    page_identifier_to_info = {}
-    
-    # Process wiki pages
-    wiki_source_dir = extracted_path / 'wiki_content'
-    if wiki_source_dir.exists():
-        for html_file in wiki_source_dir.glob('*.html'):
-            # Read the page
-            content = html_file.read_text(encoding='utf-8')
-            
-            # Try to extract title from HTML
-            title_match = re.search(r'<title>([^<]+)</title>', content, re.IGNORECASE)
-            if title_match:
-                page_title = title_match.group(1)
-            else:
-                page_title = html_file.stem.replace('-', ' ').title()
-            
-            # Extract Canvas identifier from meta tag
-            canvas_id = None
-            id_match = re.search(r'<meta\s+name="identifier"\s+content="([^"]+)"', content, re.IGNORECASE)
-            if id_match:
-                canvas_id = id_match.group(1)
-            
-            # Generate slug and filename
-            page_slug = title_to_slug(page_title)
-            page_filename = title_to_filename(page_title)
-            
-            # Map both slug and Canvas identifier to filename
-            page_identifier_to_filename[page_slug] = page_filename
-            if canvas_id:
-                page_identifier_to_filename[canvas_id] = page_filename
-            # Also map the original HTML filename (without .html)
-            page_identifier_to_filename[html_file.stem] = page_filename
-            
-            # Store for later
-            page_identifier_to_info[html_file.stem] = {
-                'title': page_title,
-                'filename': page_filename,
-                'slug': page_slug,
-                'canvas_id': canvas_id,
-                'content': content
-            }
+    # Pages, links between them and module items are resolved with the
+    # manifest index, built once for the archive
+    index = archive.index
     
     # Convert links in all pages and write them
-    for page_id, page_info in page_identifier_to_info.items():
-        content = page_info['content']
-        
+    for page in index.of_type(ArchivePage):
         # Convert Canvas links to local links
-        content = convert_canvas_links_to_local(content, page_identifier_to_filename)
+        content = convert_canvas_links_to_local(page.html, index)
         
         # Add CANVAS_META comment at the top if not present
         if '<!-- CANVAS_META' not in content:
@@ -355,50 +497,48 @@ def create_template_structure(extracted_path, output_dir):
             body_match = re.search(r'(<body[^>]*>)', content, re.IGNORECASE)
             if body_match:
                 insert_pos = body_match.end()
-                meta_comment = f'\n<!-- CANVAS_META\ntitle: {page_info["title"]}\n-->\n\n'
+                meta_comment = f'\n<!-- CANVAS_META\ntitle: {page.title}\n-->\n\n'
                 content = content[:insert_pos] + meta_comment + content[insert_pos:]
         
         # Write to wiki_content
-        output_file = wiki_dir / f"{page_info['filename']}.html"
+        filename = page_filename(page)
+        output_file = wiki_dir / f"{filename}.html"
         output_file.write_text(content, encoding='utf-8')
-        print(f"✓ Created wiki_content/{page_info['filename']}.html")
-    
-    # Copy web_resources
-    web_resources_source = extracted_path / 'web_resources'
-    if web_resources_source.exists():
-        import shutil
-        for item in web_resources_source.rglob('*'):
-            if item.is_file():
-                rel_path = item.relative_to(web_resources_source)
-                dest_path = resources_dir / rel_path
-                dest_path.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(item, dest_path)
-                print(f"✓ Copied web_resources/{rel_path}")
+        print(f"✓ Created wiki_content/{filename}.html")
+    
+    # Stream web_resources straight from the archive to the template
+    for member_name, rel_path in member_names(archive, 'web_resources'):
+        dest_path = resources_dir.joinpath(*rel_path.parts)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        with archive.open(member_name) as src, open(dest_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        print(f"✓ Copied web_resources/{rel_path}")
+    
+    # Quizzes: assessment_meta.xml settings and streamed Canvas QTI
+    extract_quizzes(archive, output_path / 'quizzes')
     
     # Process modules - map identifiers to filenames
     modules_output = []
     if modules_data:
         for module in modules_data:
-            module_out = {
-                'title': module['title'],
-                'pages': []
-            }
+            items = []
             
             for item in module['items']:
+                resource = index.get(item['identifier'])
                 if item['type'] == 'WikiPage':
-                    # Find the page by identifier
-                    page_id = item['identifier']
-                    if page_id in page_identifier_to_info:
-                        module_out['pages'].append(page_identifier_to_info[page_id]['filename'])
-                    else:
-                        # Try to match by title
-                        for pid, pinfo in page_identifier_to_info.items():
-                            if pinfo['title'] == item['title']:
-                                module_out['pages'].append(pinfo['filename'])
-                                break
+                    # Find the page by identifier, else by title
+                    page = resource if isinstance(resource, ArchivePage) else index.by_title(item['title'])
+                    if page is not None:
+                        items.append({'type': 'page', 'id': page_filename(page)})
+                elif item['type'] in ('Quiz', 'Quizzes::Quiz') and isinstance(resource, ArchiveQuiz):
+                    items.append({'type': 'quiz', 'id': quiz_filename(resource)})
             
-            if module_out['pages']:  # Only add modules with pages
-                modules_output.append(module_out)
+            if not items:  # Only add modules with pages or quizzes
+                continue
+            if all(i['type'] == 'page' for i in items):
+                modules_output.append({'title': module['title'], 'pages': [i['id'] for i in items]})
+            else:
+                modules_output.append({'title': module['title'], 'items': items})
     
     # Write modules.json
     if modules_output:
@@ -517,28 +657,16 @@ This creates a template folder you can edit locally, then rebuild with:
     print(f"Input: {imscc_path}")
     print(f"Output: {output_dir}/\n")
     
-    # Create temporary extraction directory
-    temp_dir = Path('.temp_imscc_extract')
+    # Read members directly from the IMSCC; nothing is extracted to a temp folder
+    with ImsccArchive(imscc_path) as archive:
+        template_path = create_template_structure(archive, output_dir)
     
-    try:
-        # Extract IMSCC
-        extracted_path = extract_imscc(imscc_path, temp_dir)
-        
-        # Create template structure
-        template_path = create_template_structure(extracted_path, output_dir)
-        
-        print(f"\n✅ Template created successfully!")
-        print(f"\nNext steps:")
-        print(f"  1. cd {output_dir}")
-        print(f"  2. Edit files in wiki_content/ and web_resources/")
-        print(f"  3. python ../build_from_template.py .")
-        print(f"  4. Import the generated .imscc to Canvas\n")
-        
-    finally:
-        # Clean up temp directory
-        if temp_dir.exists():
-            import shutil
-            shutil.rmtree(temp_dir)
+    print(f"\n✅ Template created successfully!")
+    print(f"\nNext steps:")
+    print(f"  1. cd {output_dir}")
+    print(f"  2. Edit files in wiki_content/ and web_resources/")
+    print(f"  3. python ../build_from_template.py .")
+    print(f"  4. Import the generated .imscc to Canvas\n")
 
 
 if __name__ == '__main__':